@@ -1,23 +1,60 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import (Flask, Response, render_template, request, redirect, url_for, flash, jsonify, session, g,
+                   has_request_context, before_render_template, template_rendered)
 from werkzeug.utils import secure_filename
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired
 from functools import wraps
+from contextlib import contextmanager
+import atexit
+import hashlib
+import json
 import os
+import queue
 import re
+import select
+import base64
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 import cloudinary
 import cloudinary.uploader
+import cloudinary.utils
 import psycopg2
 from dotenv import load_dotenv
 from psycopg2.extras import RealDictCursor
-import requests  # Slack Webhook + SendGrid API용
-import bleach  # XSS 방어용
+from outbound_http import outbound, CloudinaryConnector  # Slack Webhook + SendGrid + Cloudinary API용
+from schema_migrations import run_migrations
+from content_processing import (
+    build_post_summary, sanitize_html, sanitize_html_cached, rendered_post_content, sanitize_cache,
+    SANITIZER_POLICY_VERSION
+)
+from backfill_posts import resanitize_posts
+from page_cache import PageCache
+from password_hashing import password_hasher, HashingBusy
+from rate_limit import RateLimiter, MemoryBackend, PostgresBackend, parse_limits
+from metrics import registry as metrics_registry, query_listeners, TimedConnection, COUNT_BUCKETS
+from sql_profiler import SqlProfiler, RequestProfile
+from ndjson_backup import ndjson_lines, gzip_stream, BACKUP_TABLES
+from page_queries import (
+    fetch_post_page, fetch_comment_threads, fetch_replies, fetch_comments_since, fetch_thread_root,
+    fetch_profile_page, fetch_profile_version
+)
+from email_outbox import enqueue_email, drain as drain_email_outbox, outbox_status, EMAIL_POLL_INTERVAL
 
 load_dotenv()
 
 app = Flask(__name__)
 
+# ⭐ 앞단 프록시(Render 로드 밸런서) 수만큼만 X-Forwarded-For를 믿음
+#    각 프록시는 자신이 본 주소를 오른쪽 끝에 덧붙임 → 그보다 왼쪽 값은 클라이언트가 마음대로 넣을 수 있음
+#    request.remote_addr = 오른쪽에서 TRUSTED_PROXY_COUNT번째 값 (0이면 프록시 없이 직접 받음)
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1))
+if TRUSTED_PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
 # 환경변수 검증
 app.secret_key = os.environ.get('SECRET_KEY')
 if not app.secret_key:
@@ -60,33 +97,8 @@ def convert_to_kst(utc_time):
     return kst_time.strftime('%Y-%m-%d %H:%M:%S')
 
 # ⭐ Jinja2 필터: HTML Sanitize (XSS 방어)
-@app.template_filter('sanitize')
-def sanitize_html(html):
-    """사용자 입력 HTML을 안전하게 정리 (XSS 방어)"""
-    if not html:
-        return ''
-
-    # 허용할 HTML 태그 (서식 유지용)
-    allowed_tags = [
-        'p', 'br', 'strong', 'b', 'em', 'i', 'u', 'a', 'img',
-        'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-        'ul', 'ol', 'li', 'blockquote', 'code', 'pre',
-        'span', 'div', 'hr'
-    ]
-
-    # 허용할 속성
-    allowed_attrs = {
-        'a': ['href', 'title', 'target'],
-        'img': ['src', 'alt', 'width', 'height'],
-        '*': ['class']  # 모든 태그에 class 속성 허용
-    }
-
-    return bleach.clean(
-        html,
-        tags=allowed_tags,
-        attributes=allowed_attrs,
-        strip=True
-    )
+#    저장된 content_sanitized가 없는 값용, 본문 해시 기준 메모이제이션
+app.template_filter('sanitize')(sanitize_html_cached)
 
 # Cloudinary 설정
 cloudinary.config(
@@ -94,28 +106,662 @@ cloudinary.config(
     api_key=os.environ.get('CLOUDINARY_API_KEY'),
     api_secret=os.environ.get('CLOUDINARY_API_SECRET')
 )
+# 업로드/삭제 API 호출도 공용 keep-alive 세션 사용
+cloudinary.uploader._http = CloudinaryConnector(outbound)
+
+# ==================== DB 커넥션 풀 ====================
+
+class PoolTimeout(Exception):
+    """풀에서 제한 시간 안에 커넥션을 받지 못함"""
+
+
+class ConnectionPool:
+    """gunicorn fork에 안전한 PostgreSQL 커넥션 풀
+
+    - pool_size: 유지할 유휴 커넥션 수
+    - max_overflow: pool_size를 넘어 임시로 만들 수 있는 커넥션 수
+    - timeout: 풀이 가득 찼을 때 커넥션을 기다리는 최대 시간(초)
+    - pre_ping: 체크아웃 시 SELECT 1로 커넥션 상태 확인
+    """
+
+    def __init__(self, dsn, pool_size=5, max_overflow=5, timeout=10.0, pre_ping=True, connection_factory=None):
+        self.dsn = dsn
+        self.connection_factory = connection_factory
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._lock = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        # ⭐ fork 이후에는 부모 프로세스의 커넥션을 닫지 않고 버림
+        #    (자식에서 close()하면 부모와 공유하는 소켓이 끊어짐)
+        #    버린 커넥션은 _abandoned에 계속 붙잡아 둠: 참조가 사라져 GC되면 psycopg2가 PQfinish로
+        #    종료 메시지를 보내 부모의 세션까지 끊음 → 자식 프로세스가 끝날 때까지 절대 닫거나 놓지 않음
+        self._pid = os.getpid()
+        self._idle = []
+        self._checked_out = 0
+        self._abandoned = []
+        self.stats_counters = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'created': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+        }
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            abandoned = self._abandoned + self._idle
+            self._reset()
+            self._abandoned = abandoned   # 읽지 않음, GC 방지용 참조
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=self.connection_factory)
+        self.stats_counters['created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        self.stats_counters['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            self.stats_counters['health_check_failures'] += 1
+            return False
+
+    def getconn(self):
+        """커넥션 체크아웃 (없으면 생성, 한도 초과 시 timeout까지 대기)"""
+        with self._lock:
+            self._check_fork()
+            deadline = time.monotonic() + self.timeout
+            waited = False
+            while not self._idle and self._checked_out >= self.pool_size + self.max_overflow:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats_counters['timeouts'] += 1
+                    raise PoolTimeout(f"DB 커넥션 대기 시간 초과 ({self.timeout}초)")
+                if not waited:
+                    self.stats_counters['waits'] += 1
+                    waited = True
+                self._lock.wait(remaining)
+            conn = self._idle.pop() if self._idle else None
+            self._checked_out += 1
+            self.stats_counters['checkouts'] += 1
+
+        # 네트워크 I/O는 락 밖에서 수행
+        try:
+            if conn is not None and not self._is_healthy(conn):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._checked_out -= 1
+                self._lock.notify()
+            raise
+        return conn
+
+    def putconn(self, conn):
+        """커넥션 반납 (진행 중 트랜잭션은 롤백, 초과분은 닫음)"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+        keep = not conn.closed
+        if keep and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                keep = False
+        with self._lock:
+            self._checked_out -= 1
+            if keep and len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                conn = None
+            self._lock.notify()
+        if conn is not None:
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """요청 컨텍스트 밖(init_db, 백그라운드 작업)에서 쓰는 커넥션"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                'pid': self._pid,
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'timeout': self.timeout,
+                'pre_ping': self.pre_ping,
+                'checked_out': self._checked_out,
+                'idle': len(self._idle),
+                'overflow': max(0, self._checked_out + len(self._idle) - self.pool_size),
+                **self.stats_counters,
+            }
+
+
+db_pool = ConnectionPool(
+    DATABASE_URL,
+    pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+    max_overflow=int(os.environ.get('DB_POOL_MAX_OVERFLOW', 5)),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+    pre_ping=os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    connection_factory=TimedConnection,   # 쿼리 시간 측정
+)
+
 
 def get_db_connection():
-    """PostgreSQL 데이터베이스 연결"""
-    return psycopg2.connect(DATABASE_URL)
+    """요청 단위 PostgreSQL 커넥션 (flask.g에 보관, teardown에서 풀로 반납)"""
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.getconn()
+    return g.db_conn
+
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.putconn(conn)
+
+
+@app.errorhandler(PoolTimeout)
+def handle_pool_timeout(error):
+    print(f"⚠️ {error}")
+    return "서버가 혼잡합니다. 잠시 후 다시 시도해주세요.", 503
+
+@app.errorhandler(HashingBusy)
+def handle_hashing_busy(error):
+    # 로그인 폭주/대입 공격 중: 해시 자리가 날 때까지 스레드를 붙잡지 않고 바로 거절
+    print(f"⚠️ {error}")
+    return "로그인 요청이 많습니다. 잠시 후 다시 시도해주세요.", 503, {'Retry-After': '2'}
+
+# ==================== 요청 시간 측정 ====================
+
+# Server-Timing 헤더: admin = /admin/server-timing으로 켠 브라우저 세션만, all = 모든 응답, off
+SERVER_TIMING = os.environ.get('SERVER_TIMING', 'admin')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')   # Prometheus 스크레이프용 Bearer 토큰 (선택)
+
+def _request_timings():
+    """요청 처리 중이면 이 요청의 측정값, 백그라운드 스레드면 None"""
+    return g.get('timings') if has_request_context() else None
+
+# ⭐ SQL 프로파일러: 지문/시간/행 수 기록, 느린 쿼리 로그, N+1 의심 표시
+sql_profiler = SqlProfiler(
+    slow_ms=float(os.environ.get('SQL_SLOW_MS', 200)),
+    n_plus_one=int(os.environ.get('SQL_N_PLUS_ONE', 5)),
+    explain_sample=float(os.environ.get('SQL_EXPLAIN_SAMPLE', 0)),
+)
+SQL_EXPLAIN_TIMEOUT_MS = int(os.environ.get('SQL_EXPLAIN_TIMEOUT_MS', 5000))
+
+def _record_query(cursor, query, params, seconds):
+    timings = _request_timings()
+    if timings is not None:
+        timings['db'] += seconds
+        timings['queries'] += 1
+        sql_profiler.on_query(timings['sql'], cursor, query, params, seconds, request.endpoint)
+    else:
+        sql_profiler.on_query(None, cursor, query, params, seconds)
+
+def capture_sql_explain(fp, sql):
+    """느린 조회문 표본의 EXPLAIN (ANALYZE, BUFFERS) → /admin/sql-profile (백그라운드 작업)
+
+    풀 커넥션 대신 전용 커넥션을 열고 닫음 → 세션 상태가 풀로 새어 나가지 않음
+    """
+    conn = psycopg2.connect(DATABASE_URL)
+    cursor = conn.cursor()
+    try:
+        # 읽기 전용 트랜잭션 + 시간 제한 → 실제로 다시 실행되어도 데이터는 바뀌지 않음
+        cursor.execute('SET TRANSACTION READ ONLY')
+        cursor.execute('SET LOCAL statement_timeout = %s', (SQL_EXPLAIN_TIMEOUT_MS,))
+        cursor.execute(b'EXPLAIN (ANALYZE, BUFFERS) ' + sql)
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+        sql_profiler.add_explain(fp, plan)
+        print(f"🔍 실행 계획 수집: {fp[:200]}\n{plan}")
+    except psycopg2.Error as e:
+        sql_profiler.add_explain(fp, None, error=f'{type(e).__name__}: {str(e).strip()}')
+    finally:
+        cursor.close()
+        conn.close()
+
+# background_jobs는 아래에서 만들어지므로 호출 시점에 찾음
+sql_profiler.explain_submit = lambda fp, sql: background_jobs.submit(capture_sql_explain, fp, sql)
+
+def _record_outbound(host, seconds, status, error):
+    outcome = error or (f'{status // 100}xx' if status else 'unknown')
+    metrics_registry.observe('outbound_http_duration_seconds', seconds, host=host, outcome=outcome)
+    timings = _request_timings()
+    if timings is not None:
+        timings['outbound'][host] = timings['outbound'].get(host, 0.0) + seconds
+
+query_listeners.append(_record_query)
+outbound.listeners.append(_record_outbound)
+
+@before_render_template.connect_via(app)
+def _render_started(sender, template, context, **extra):
+    timings = _request_timings()
+    if timings is not None:
+        timings['render_started'].append(time.perf_counter())
+
+@template_rendered.connect_via(app)
+def _render_finished(sender, template, context, **extra):
+    timings = _request_timings()
+    if timings is not None and timings['render_started']:
+        timings['render'] += time.perf_counter() - timings['render_started'].pop()
+
+@app.before_request
+def start_request_timer():
+    g.timings = {'start': time.perf_counter(), 'db': 0.0, 'queries': 0,
+                 'render': 0.0, 'render_started': [], 'outbound': {}, 'sql': RequestProfile()}
+
+def _server_timing_header(timings, total):
+    parts = [
+        f'app;dur={total * 1000:.1f}',
+        f'db;dur={timings["db"] * 1000:.1f};desc="{timings["queries"]} queries"',
+        f'render;dur={timings["render"] * 1000:.1f}',
+    ]
+    for host, seconds in timings['outbound'].items():
+        parts.append(f'{re.sub(r"[^A-Za-z0-9]+", "-", host)};dur={seconds * 1000:.1f};desc="{host}"')
+    return ', '.join(parts)
+
+@app.after_request
+def record_request_timing(response):
+    # after_request는 등록 역순으로 실행 → 가장 먼저 등록된 이 함수가 마지막 (다른 후처리 시간까지 포함)
+    timings = g.pop('timings', None)
+    if timings is None or request.endpoint == 'static':
+        return response
+
+    total = time.perf_counter() - timings['start']
+    # 없는 주소(404)는 한 라벨로 묶음 → 라벨 종류가 무한히 늘지 않도록
+    endpoint = request.endpoint or 'unmatched'
+    metrics_registry.observe('http_request_duration_seconds', total,
+                             endpoint=endpoint, method=request.method, status=str(response.status_code))
+    metrics_registry.observe('http_request_db_seconds', timings['db'], endpoint=endpoint)
+    metrics_registry.observe('http_request_db_queries', timings['queries'], buckets=COUNT_BUCKETS, endpoint=endpoint)
+    metrics_registry.observe('http_request_render_seconds', timings['render'], endpoint=endpoint)
+    profile = sql_profiler.finish(timings['sql'], endpoint, request.method, request.full_path.rstrip('?'))
+    try:
+        metrics_registry.flush()
+    except OSError as e:
+        print(f"⚠️ 메트릭 파일 기록 실패: {str(e)}")
+
+    if SERVER_TIMING == 'all' or (SERVER_TIMING == 'admin' and session.get('server_timing')):
+        response.headers['Server-Timing'] = _server_timing_header(timings, total)
+        # 이 요청의 SQL 요약 (자세한 내용: /admin/sql-profile?request=<id>)
+        n_plus_one = ';'.join(f"{item['count']}x" for item in profile['n_plus_one'])
+        response.headers['X-SQL-Profile'] = (f"id={profile['id']}; queries={profile['queries']}; "
+                                             f"db={profile['db_ms']}ms; rows={profile['rows']}"
+                                             + (f"; n+1={n_plus_one}" if n_plus_one else ''))
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus 스크레이프 (모든 gunicorn 워커 합산)"""
+    authorized = request.args.get('password') == ADMIN_PASSWORD
+    if METRICS_TOKEN and request.headers.get('Authorization') == f'Bearer {METRICS_TOKEN}':
+        authorized = True
+    if not authorized:
+        return "Unauthorized", 401
+    return Response(metrics_registry.exposition(), mimetype='text/plain; version=0.0.4')
+
+# ==================== 백그라운드 본문 재정리 ====================
+
+# SANITIZER_POLICY_VERSION이 바뀌면 워커 시작 후 구버전 정리본을 다시 만듦
+RESANITIZE_ON_START = os.environ.get('RESANITIZE_ON_START', 'true').lower() in ('1', 'true', 'yes')
+RESANITIZE_LOCK_KEY = 8_2025_0002
+_resanitize_started_pid = None
+# 종료 훅(atexit)에서 설정 → 재정리는 배치 사이에서 멈춤 (남은 글은 다음 시작 때 이어서)
+_resanitize_stop = threading.Event()
+
+def _resanitize_worker():
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            # 여러 워커/노드 중 한 곳에서만 실행
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', (RESANITIZE_LOCK_KEY,))
+            locked = cursor.fetchone()[0]
+            conn.commit()
+            if not locked:
+                return
+            try:
+                count = resanitize_posts(conn, should_stop=_resanitize_stop.is_set)
+                if _resanitize_stop.is_set():
+                    print(f"⚠️ 본문 HTML 재정리 중단 (앱 종료): {count}개 처리, 나머지는 다음 시작 때")
+                elif count:
+                    print(f"✅ 본문 HTML 재정리 완료: {count}개 (정책 버전 {SANITIZER_POLICY_VERSION})")
+            finally:
+                conn.rollback()
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (RESANITIZE_LOCK_KEY,))
+                conn.commit()
+                cursor.close()
+    except Exception as e:
+        print(f"❌ 본문 HTML 재정리 오류: {type(e).__name__}: {str(e)}")
+
+@app.before_request
+def start_background_resanitize():
+    global _resanitize_started_pid
+    if not RESANITIZE_ON_START or _resanitize_started_pid == os.getpid():
+        return
+    _resanitize_started_pid = os.getpid()
+    threading.Thread(target=_resanitize_worker, name='resanitize', daemon=True).start()
+
+# ==================== DB 알림 (LISTEN/NOTIFY) ====================
+
+# 워커 프로세스마다 LISTEN 전용 연결 1개 (풀 밖) → 채널별 핸들러로 전달
+_notify_handlers = {}        # 채널 → handler(payload 목록)
+_notify_connect_hooks = []   # (재)연결 직후 호출 (연결이 끊긴 동안 놓친 알림 보정용)
+_notify_listener_pid = None
+
+def on_notify(channel, handler, on_connect=None):
+    _notify_handlers[channel] = handler
+    if on_connect is not None:
+        _notify_connect_hooks.append(on_connect)
+
+def _notify_listener():
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            cursor = conn.cursor()
+            for channel in _notify_handlers:
+                cursor.execute(f'LISTEN {channel}')
+            for hook in _notify_connect_hooks:
+                hook()
+
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    cursor.execute('SELECT 1')  # 연결 유지 확인
+                    continue
+                conn.poll()
+                payloads = {}
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    payloads.setdefault(notify.channel, []).append(notify.payload)
+                for channel, items in payloads.items():
+                    _notify_handlers[channel](items)
+        except Exception as e:
+            print(f"⚠️ DB 알림 연결 오류 (5초 후 재연결): {type(e).__name__}: {str(e)}")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            time.sleep(5)
+
+@app.before_request
+def start_notify_listener():
+    global _notify_listener_pid
+    if not _notify_handlers or _notify_listener_pid == os.getpid():
+        return
+    _notify_listener_pid = os.getpid()
+    threading.Thread(target=_notify_listener, name='notify-listener', daemon=True).start()
+
+# ==================== 익명 페이지 캐시 ====================
+
+# 비로그인 + flash 메시지 없는 GET 요청만 캐시 (index / board / view_post)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PAGE_CACHE_CHANNEL = 'page_cache'
+page_cache = PageCache(
+    maxsize=int(os.environ.get('PAGE_CACHE_SIZE', 500)),
+    ttl=float(os.environ.get('PAGE_CACHE_TTL', 60)),
+)
+
+def _template_version():
+    """템플릿 파일 내용 해시 → 배포로 템플릿이 바뀌면 캐시 키도 바뀜"""
+    digest = hashlib.sha1()
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(template_dir)):
+        with open(os.path.join(template_dir, name), 'rb') as f:
+            digest.update(name.encode('utf-8'))
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+PAGE_CACHE_TEMPLATE_VERSION = _template_version()
+
+def _page_cacheable():
+    return (
+        PAGE_CACHE_ENABLED
+        and request.method == 'GET'
+        and 'user_id' not in session
+        and '_flashes' not in session
+    )
+
+def cached_page(view):
+    """익명 요청 응답을 캐시하는 데코레이터 (뷰에서 tag_page()로 태그를 달아야 저장됨)"""
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        if not _page_cacheable():
+            return view(*args, **kwargs)
+
+        key = (
+            request.endpoint,
+            tuple(sorted(kwargs.items())),
+            tuple(sorted(request.args.items(multi=True))),
+            PAGE_CACHE_TEMPLATE_VERSION,
+        )
+        cached = page_cache.get(key)
+        if cached is not None:
+            body, content_type, validators = cached
+            response = app.response_class(body, content_type=content_type)
+            response.headers.extend(validators)
+            response.headers['X-Page-Cache'] = 'HIT'
+            # 같은 URL이라도 로그인 쿠키가 있으면 다른 응답 (공유 캐시/브라우저용)
+            response.vary.add('Cookie')
+            return response.make_conditional(request)
+
+        generation = page_cache.generation
+        g.page_tags = set()
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and g.page_tags and not response.direct_passthrough:
+            validators = [(name, response.headers[name]) for name in ('ETag', 'Last-Modified')
+                          if name in response.headers]
+            page_cache.set(key, (response.get_data(), response.content_type, validators),
+                           frozenset(g.page_tags), generation)
+        response.headers['X-Page-Cache'] = 'MISS'
+        response.vary.add('Cookie')
+        return response
+    return decorated_function
+
+def tag_page(*tags):
+    """현재 응답이 어떤 게시판/게시글 내용을 담고 있는지 기록"""
+    if 'page_tags' in g:
+        g.page_tags.update(tags)
+
+def invalidate_pages(cursor, *tags):
+    """글/댓글 변경 시 커밋 전에 호출
+
+    - pg_notify는 커밋될 때만 전달 → 모든 워커/노드의 캐시에서 삭제
+    - 이 워커는 응답 직후(after_request) 바로 삭제 (리다이렉트 다음 요청이 옛 페이지를 받지 않도록)
+    """
+    if not PAGE_CACHE_ENABLED:
+        return
+    cursor.execute('SELECT pg_notify(%s, %s)', (PAGE_CACHE_CHANNEL, ' '.join(tags)))
+    g.setdefault('page_invalidations', []).extend(tags)
+
+@app.after_request
+def apply_page_invalidations(response):
+    tags = g.pop('page_invalidations', None)
+    if tags:
+        page_cache.invalidate(tags)
+    return response
+
+def _handle_page_cache_notify(payloads):
+    tags = set()
+    for payload in payloads:
+        tags.update(payload.split())
+    page_cache.invalidate(tags)
+
+if PAGE_CACHE_ENABLED:
+    # 알림 연결이 없던 동안(첫 연결 전 포함)의 무효화는 받을 수 없으므로 연결될 때마다 전부 비움
+    on_notify(PAGE_CACHE_CHANNEL, _handle_page_cache_notify, on_connect=page_cache.clear)
+
+# ==================== 조건부 요청 (ETag / 304) ====================
+
+def page_etag(*parts):
+    """강한 ETag: 내용 버전 + 보는 사람(로그인 여부에 따라 화면이 다름) + 템플릿 버전 + 본문 정리 정책 버전
+
+    flash 메시지가 남아 있으면 None → 이번 응답은 메시지가 포함되므로 검증값을 주지 않음
+    """
+    if '_flashes' in session:
+        return None
+    # 정책 버전: 허용 목록을 좁히면(예: XSS 대응) 브라우저가 캐시한 옛 HTML도 304 없이 다시 받도록
+    raw = '|'.join(str(part) for part in (*parts, session.get('user_id') or 'anon', PAGE_CACHE_TEMPLATE_VERSION,
+                                          SANITIZER_POLICY_VERSION))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:24]
+
+def wants_conditional():
+    return bool(request.if_none_match or request.if_modified_since)
+
+def not_modified(etag, last_modified):
+    """조건부 요청이 현재 버전과 같으면 304 응답, 아니면 None (본문 조회/렌더링 전에 호출)"""
+    if etag is None or not wants_conditional():
+        return None
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return None
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.vary.add('Cookie')
+    return response
+
+def conditional_response(body, etag, last_modified):
+    """렌더링 결과에 ETag / Last-Modified를 붙여서 반환"""
+    response = app.make_response(body)
+    response.vary.add('Cookie')
+    if etag is None:
+        return response
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response.make_conditional(request)
 
 def get_client_ip():
-    """실제 클라이언트 IP 가져오기"""
-    if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0].strip()
+    """실제 클라이언트 IP 가져오기
+
+    X-Forwarded-For의 첫 번째 값은 클라이언트가 보낸 그대로라 위조 가능 (요청마다 바꾸면 IP별 빈도 제한 우회)
+    → ProxyFix가 믿을 수 있는 프록시가 덧붙인 값으로 바꿔 둔 remote_addr 사용
+    """
     return request.remote_addr
 
-def extract_first_image(html_content):
-    """HTML 콘텐츠에서 첫 번째 이미지 URL 추출"""
-    if not html_content:
+# ==================== 요청 빈도 제한 ====================
+
+# 정책별 기본값 (RATE_LIMIT_LOGIN="ip=20/minute,username=10/minute" 처럼 환경 변수로 변경)
+# ip: get_client_ip(), user: 로그인한 user_id, username: 로그인 폼에 입력한 아이디 (대입 공격 대상 계정)
+RATE_LIMIT_DEFAULTS = {
+    'login': 'ip=20/minute,username=10/minute',
+    'register': 'ip=5/hour',                       # 인증 메일 (SendGrid 한도)
+    'upload': 'user=30/minute,ip=60/minute',       # Cloudinary 한도
+    'comment': 'user=10/minute,ip=30/minute',
+}
+RATE_LIMITED_ENDPOINTS = {
+    'login': 'login',
+    'register': 'register',
+    'upload_image': 'upload',
+    'upload_signature': 'upload',
+    'add_comment': 'comment',
+}
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+# memory: 워커마다 따로 셈 / postgres: rate_limits 테이블을 모든 워커·노드가 공유
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+
+rate_limiter = RateLimiter(
+    PostgresBackend(get_db_connection) if RATE_LIMIT_BACKEND == 'postgres' else MemoryBackend(),
+    {
+        name: parse_limits(os.environ.get(f'RATE_LIMIT_{name.upper()}', spec))
+        for name, spec in RATE_LIMIT_DEFAULTS.items()
+    }
+)
+
+@app.before_request
+def apply_rate_limit():
+    if not RATE_LIMIT_ENABLED or request.method != 'POST':
+        return
+    policy = RATE_LIMITED_ENDPOINTS.get(request.endpoint)
+    if policy is None:
+        return
+
+    identities = {'ip': get_client_ip(), 'user': session.get('user_id')}
+    # 폼 본문은 필요할 때만 읽음 (업로드 요청의 파일까지 미리 파싱하지 않도록)
+    if 'username' in rate_limiter.scopes(policy):
+        identities['username'] = request.form.get('username', '').lower()
+
+    retry_after = rate_limiter.check(policy, identities)
+    if retry_after is None:
+        return
+
+    print(f"⚠️ 요청 빈도 제한: {policy} ip={identities['ip']} user={identities['user']} ({retry_after}초 후 재시도)")
+    message = f'요청이 너무 많습니다. {retry_after}초 후에 다시 시도해주세요.'
+    headers = {'Retry-After': str(retry_after)}
+    if policy == 'upload' or wants_json():
+        return jsonify({'error': message, 'retry_after': retry_after}), 429, headers
+    return message, 429, headers
+
+# ==================== 게시판 페이지네이션 ====================
+
+BOARD_PAGE_SIZE = int(os.environ.get('BOARD_PAGE_SIZE', 20))
+BOARD_MAX_PAGE_SIZE = int(os.environ.get('BOARD_MAX_PAGE_SIZE', 100))
+# 추정치가 이 값보다 작으면 정확한 COUNT(*) 사용
+BOARD_EXACT_COUNT_THRESHOLD = int(os.environ.get('BOARD_EXACT_COUNT_THRESHOLD', 1000))
+
+def encode_page_cursor(created_at, post_id):
+    """(created_at, id) → URL용 커서 문자열"""
+    raw = f"{created_at.isoformat()}|{post_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_page_cursor(value):
+    """커서 문자열 → (created_at, id), 잘못된 값이면 None"""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        created_at, post_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeDecodeError):
         return None
 
-    img_pattern = r'<img[^>]+src=["\']([^"\']+)["\']'
-    match = re.search(img_pattern, html_content, re.IGNORECASE)
+def estimate_board_count(cursor, board_type):
+    """게시판 글 수 (플래너 추정치, 작은 게시판은 정확한 값)
+
+    Returns: (count, is_estimate)
+    """
+    cursor.execute(
+        'EXPLAIN (FORMAT JSON) SELECT 1 FROM posts WHERE board_type = %s',
+        (board_type,)
+    )
+    plan = cursor.fetchone()
+    plan = plan['QUERY PLAN'] if isinstance(plan, dict) else plan[0]
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+
+    if estimate >= BOARD_EXACT_COUNT_THRESHOLD:
+        return estimate, True
 
-    if match:
-        return match.group(1)
-    return None
+    cursor.execute('SELECT COUNT(*) AS cnt FROM posts WHERE board_type = %s', (board_type,))
+    row = cursor.fetchone()
+    return (row['cnt'] if isinstance(row, dict) else row[0]), False
 
 def login_required(f):
     """로그인 필요 데코레이터"""
@@ -127,79 +773,316 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def send_slack_notification(username, email, event_type="회원가입", verified=False):
-    """Slack Webhook으로 알림 전송"""
-    webhook_url = os.environ.get('SLACK_WEBHOOK_URL')
-    
-    if not webhook_url:
+# ==================== 작성자 확인 ====================
+
+# 권한 확인에 필요한 컬럼만 조회 (본문, IP, User-Agent 등 큰/불필요한 컬럼은 읽지 않음)
+OWNER_COLUMNS = {
+    'posts': ('id', 'user_id', 'password', 'board_type'),
+    'comments': ('id', 'user_id', 'password', 'post_id'),
+}
+
+def fetch_owner(cursor, table, row_id, *extra_columns):
+    """작성자 확인용 컬럼(+ extra_columns) → dict, 없으면 None (RealDictCursor 필요)"""
+    columns = ', '.join(OWNER_COLUMNS[table] + extra_columns)
+    cursor.execute(f'SELECT {columns} FROM {table} WHERE id = %s', (row_id,))
+    return cursor.fetchone()
+
+def can_modify(row, password):
+    """관리자 비밀번호 / 로그인한 작성자 본인 / 익명 글 비밀번호 일치 → True"""
+    if password == ADMIN_PASSWORD:
+        return True
+    # 1순위: 로그인한 본인이 쓴 글
+    if row['user_id'] and 'user_id' in session and row['user_id'] == session['user_id']:
+        return True
+    # 2순위: 익명 글 + 비밀번호 일치
+    if row['password'] and password:
+        return password_hasher.verify(row['password'], password)
+    return False
+
+# ==================== 백그라운드 작업 큐 ====================
+
+class BackgroundDispatcher:
+    """프로세스 내 백그라운드 작업 큐 (요청 스레드를 막지 않는 외부 호출용)
+
+    - 큐 크기 제한: 가득 차면 가장 오래된 작업을 버림 (drop-oldest)
+    - 실패(예외) 시 지수 백오프로 재시도
+    - 종료 시(atexit) 대기 중인 작업을 timeout까지 처리
+    - 워커 스레드는 프로세스(gunicorn 워커)별로 첫 submit 때 시작
+    """
+
+    def __init__(self, workers=1, max_queue=500, max_retries=3, backoff=1.0, max_backoff=60.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._jobs = deque()
+        self._pid = None
+        self._threads = []
+        self._stopping = False
+        self.counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'retried': 0, 'dropped': 0}
+
+    def _ensure_started(self):
+        # fork 이후 부모의 스레드는 자식에 없음 → 프로세스마다 새로 시작
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._jobs = deque()
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f'background-job-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, *args, delay=0, **kwargs):
+        """작업 등록 (delay초 뒤 실행)"""
+        with self._cond:
+            self._ensure_started()
+            if self._stopping:
+                return False
+            if len(self._jobs) >= self.max_queue:
+                dropped = self._jobs.popleft()
+                self.counters['dropped'] += 1
+                print(f"⚠️ 작업 큐 가득 참: {dropped['func'].__name__} 작업 버림")
+            self._jobs.append({
+                'func': func,
+                'args': args,
+                'kwargs': kwargs,
+                'attempt': 0,
+                'not_before': time.monotonic() + delay,
+            })
+            self.counters['submitted'] += 1
+            self._cond.notify()
+        return True
+
+    def _next_job(self):
+        """실행 가능한 작업을 꺼냄 (없으면 가장 빠른 예정 시각까지 대기)"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = None
+                for job in self._jobs:
+                    if job['not_before'] <= now or self._stopping:
+                        self._jobs.remove(job)
+                        return job
+                    remaining = job['not_before'] - now
+                    wait = remaining if wait is None else min(wait, remaining)
+                if self._stopping and not self._jobs:
+                    return None
+                self._cond.wait(wait)
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                job['func'](*job['args'], **job['kwargs'])
+                with self._cond:
+                    self.counters['completed'] += 1
+            except Exception as e:
+                job['attempt'] += 1
+                name = job['func'].__name__
+                with self._cond:
+                    if job['attempt'] > self.max_retries or self._stopping:
+                        self.counters['failed'] += 1
+                        print(f"❌ 백그라운드 작업 실패 ({name}): {type(e).__name__}: {str(e)}")
+                        continue
+                    delay = min(self.backoff * (2 ** (job['attempt'] - 1)), self.max_backoff)
+                    job['not_before'] = time.monotonic() + delay
+                    self._jobs.append(job)
+                    self.counters['retried'] += 1
+                    self._cond.notify()
+                print(f"⚠️ 백그라운드 작업 재시도 예정 ({name}, {job['attempt']}회차, {delay:.1f}초 후): {str(e)}")
+
+    def shutdown(self, timeout=5.0):
+        """대기 중인 작업을 즉시 실행하고 timeout까지 기다림"""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def stats(self):
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'queued': len(self._jobs) if self._pid == os.getpid() else 0,
+                'max_queue': self.max_queue,
+                **self.counters,
+            }
+
+
+background_jobs = BackgroundDispatcher(
+    workers=int(os.environ.get('JOB_WORKERS', 1)),
+    max_queue=int(os.environ.get('JOB_QUEUE_SIZE', 500)),
+    max_retries=int(os.environ.get('JOB_MAX_RETRIES', 3)),
+    backoff=float(os.environ.get('JOB_RETRY_BACKOFF', 1.0)),
+)
+
+
+def _shutdown_background_jobs():
+    _resanitize_stop.set()
+    # 대기 중인 Slack 요약을 먼저 큐에 넣은 뒤 큐를 비움
+    flush_slack_digest()
+    background_jobs.shutdown(timeout=float(os.environ.get('JOB_SHUTDOWN_TIMEOUT', 5)))
+
+atexit.register(_shutdown_background_jobs)
+
+# ==================== Slack 알림 ====================
+
+SITE_URL = os.environ.get('SITE_URL', 'https://nvidia8th-board.onrender.com/')
+# 이 시간(초) 안에 들어온 알림은 하나의 요약 메시지로 묶음 (0이면 즉시 개별 전송)
+SLACK_DIGEST_WINDOW = float(os.environ.get('SLACK_DIGEST_WINDOW', 10))
+
+SLACK_EMOJI_MAP = {
+    "회원가입": "🎉",
+    "이메일인증": "✅",
+    "새글작성": "📝",
+    "댓글작성": "💬"
+}
+
+_slack_lock = threading.Lock()
+_slack_pending = []
+# 요약 전송 작업을 예약한 시각 (None이면 예약 없음)
+# 큐가 가득 차 예약 작업이 버려지면 아무도 풀어 주지 않음 → 2 × SLACK_DIGEST_WINDOW가 지나도 그대로면 다시 예약
+_slack_flush_scheduled_at = None
+
+def notify_slack(event_type, username, email=None, verified=False, detail=None, url=None):
+    """Slack 알림 등록 (요청 스레드에서는 큐에 넣기만 함)"""
+    global _slack_flush_scheduled_at
+
+    if not os.environ.get('SLACK_WEBHOOK_URL'):
         print("⚠️ SLACK_WEBHOOK_URL이 설정되지 않았습니다. Slack 알림을 건너뜁니다.")
         return False
-    
-    # 이벤트 타입에 따라 이모지 변경
-    emoji_map = {
-        "회원가입": "🎉",
-        "이메일인증": "✅",
-        "새글작성": "📝",
-        "댓글작성": "💬"
+
+    event = {
+        'event_type': event_type,
+        'username': username,
+        'email': email,
+        'verified': verified,
+        'detail': detail,
+        'url': url,
+        # 현재 시각 (발생 시점 기준)
+        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
     }
-    emoji = emoji_map.get(event_type, "📢")
-    
-    # 현재 시각 (한국 시간으로 표시)
-    now = datetime.now()
-    time_str = now.strftime('%Y-%m-%d %H:%M:%S')
-    
-    # 인증 상태에 따른 메시지
-    if event_type == "회원가입":
-        status_text = "✅ 이메일 인증 완료" if verified else "⏳ 이메일 인증 대기"
-        status_emoji = "✅" if verified else "⏳"
-    else:
-        status_text = ""
-        status_emoji = ""
-    
-    # 메시지 구성
+
+    if SLACK_DIGEST_WINDOW <= 0:
+        return background_jobs.submit(post_slack_message, build_slack_message([event]))
+
+    now = time.monotonic()
+    with _slack_lock:
+        _slack_pending.append(event)
+        if _slack_flush_scheduled_at is not None and now - _slack_flush_scheduled_at < 2 * SLACK_DIGEST_WINDOW:
+            return True
+        if _slack_flush_scheduled_at is not None:
+            print("⚠️ Slack 요약 전송 작업이 실행되지 않음 (작업 큐에서 버려짐) → 다시 예약")
+        _slack_flush_scheduled_at = now
+    if background_jobs.submit(flush_slack_digest, delay=SLACK_DIGEST_WINDOW):
+        return True
+    # 종료 중이라 예약 못 함 → 다음 알림이 다시 예약하도록 풀어 둠 (남은 알림은 종료 훅이 보냄)
+    with _slack_lock:
+        _slack_flush_scheduled_at = None
+    return False
+
+def flush_slack_digest():
+    """모아 둔 알림을 메시지 하나로 만들어 전송 작업으로 넘김"""
+    global _slack_flush_scheduled_at
+
+    with _slack_lock:
+        events = list(_slack_pending)
+        _slack_pending.clear()
+        _slack_flush_scheduled_at = None
+
+    if events:
+        background_jobs.submit(post_slack_message, build_slack_message(events))
+
+def _slack_event_fields(event):
     fields = [
         {
             "type": "mrkdwn",
-            "text": f"*아이디:*\n{username}"
-        },
-        {
-            "type": "mrkdwn",
-            "text": f"*이메일:*\n{email}"
+            "text": f"*아이디:*\n{event['username']}"
         }
     ]
-    
-    if status_text:
-        fields.extend([
-            {
-                "type": "mrkdwn",
-                "text": f"*상태:*\n{status_emoji} {status_text}"
-            },
-            {
-                "type": "mrkdwn",
-                "text": f"*시각:*\n{time_str}"
-            }
-        ])
-    else:
+
+    if event['email']:
         fields.append({
             "type": "mrkdwn",
-            "text": f"*시각:*\n{time_str}"
+            "text": f"*이메일:*\n{event['email']}"
         })
-    
-    message = {
-        "text": f"{emoji} {event_type} 알림",
+
+    # 인증 상태에 따른 메시지
+    if event['event_type'] == "회원가입":
+        status_text = "✅ 이메일 인증 완료" if event['verified'] else "⏳ 이메일 인증 대기"
+        status_emoji = "✅" if event['verified'] else "⏳"
+        fields.append({
+            "type": "mrkdwn",
+            "text": f"*상태:*\n{status_emoji} {status_text}"
+        })
+
+    if event['detail']:
+        detail = f"<{event['url']}|{event['detail']}>" if event['url'] else event['detail']
+        fields.append({
+            "type": "mrkdwn",
+            "text": f"*내용:*\n{detail}"
+        })
+
+    fields.append({
+        "type": "mrkdwn",
+        "text": f"*시각:*\n{event['time']}"
+    })
+    return fields
+
+def build_slack_message(events):
+    """알림 1건이면 기존 형식, 여러 건이면 요약(digest) 메시지"""
+    if len(events) == 1:
+        event = events[0]
+        emoji = SLACK_EMOJI_MAP.get(event['event_type'], "📢")
+        title = f"{emoji} {event['event_type']} 알림"
+        body_blocks = [
+            {
+                "type": "section",
+                "fields": _slack_event_fields(event)
+            }
+        ]
+    else:
+        title = f"📢 알림 요약 ({len(events)}건)"
+        lines = []
+        for event in events:
+            emoji = SLACK_EMOJI_MAP.get(event['event_type'], "📢")
+            line = f"{emoji} *{event['event_type']}* · {event['username']}"
+            if event['email']:
+                line += f" ({event['email']})"
+            if event['detail']:
+                line += f" · <{event['url']}|{event['detail']}>" if event['url'] else f" · {event['detail']}"
+            lines.append(f"{line} · {event['time'][11:]}")
+        # Slack section 텍스트는 3000자 제한
+        body_blocks = [
+            {
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": chunk}
+            }
+            for chunk in _chunk_lines(lines, 2900)
+        ]
+
+    return {
+        "text": title,
         "blocks": [
             {
                 "type": "header",
                 "text": {
                     "type": "plain_text",
-                    "text": f"{emoji} {event_type} 알림",
+                    "text": title,
                     "emoji": True
                 }
             },
-            {
-                "type": "section",
-                "fields": fields
-            },
+            *body_blocks,
             {
                 "type": "actions",
                 "elements": [
@@ -210,7 +1093,7 @@ def send_slack_notification(username, email, event_type="회원가입", verified
                             "text": "🌐 사이트 방문",
                             "emoji": True
                         },
-                        "url": "https://nvidia8th-board.onrender.com/"
+                        "url": SITE_URL
                     }
                 ]
             },
@@ -219,187 +1102,65 @@ def send_slack_notification(username, email, event_type="회원가입", verified
             }
         ]
     }
-    
-    try:
-        response = requests.post(webhook_url, json=message, timeout=5)
-        if response.status_code == 200:
-            print(f"✅ Slack 알림 전송 성공: {event_type} - {username}")
-            return True
-        else:
-            print(f"❌ Slack 알림 실패: {response.status_code} - {response.text}")
-            return False
-    except requests.exceptions.Timeout:
-        print(f"⚠️ Slack 알림 타임아웃 (5초 초과)")
-        return False
-    except Exception as e:
-        print(f"❌ Slack 알림 오류: {type(e).__name__}: {str(e)}")
-        return False
-
-def send_verification_email(username, email, token):
-    """SendGrid API를 사용한 인증 이메일 발송 (HTTP API - Render 호환)"""
-    
-    if not SENDGRID_API_KEY:
-        print("⚠️ SENDGRID_API_KEY 미설정: 이메일 발송 건너뜀")
-        return False
-    
-    # 인증 링크 생성
-    confirm_url = url_for('confirm_email', token=token, _external=True)
-    
-    # SendGrid API 요청
-    url = "https://api.sendgrid.com/v3/mail/send"
-    headers = {
-        "Authorization": f"Bearer {SENDGRID_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "personalizations": [
-            {
-                "to": [{"email": email}],
-                "subject": "NVIDIA 8th 게시판 - 이메일 인증"
-            }
-        ],
-        "from": {
-            "email": SENDGRID_FROM_EMAIL,
-            "name": "NVIDIA 8th Board"
-        },
-        "content": [
-            {
-                "type": "text/plain",
-                "value": f"""
-안녕하세요 {username}님,
-
-NVIDIA 8th 게시판 가입을 환영합니다!
 
-아래 링크를 클릭하여 이메일을 인증해주세요:
-{confirm_url}
-
-※ 이 링크는 1시간 동안 유효합니다.
-
-감사합니다.
-NVIDIA 8th Board
-"""
-            },
-            {
-                "type": "text/html",
-                "value": f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <style>
-        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-        .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                   color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-        .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-        .button {{ display: inline-block; padding: 15px 30px; background: #667eea;
-                  color: white; text-decoration: none; border-radius: 5px; 
-                  font-weight: bold; margin: 20px 0; }}
-        .button:hover {{ background: #5568d3; }}
-        .footer {{ text-align: center; margin-top: 20px; color: #666; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🎉 가입을 환영합니다!</h1>
-        </div>
-        <div class="content">
-            <p>안녕하세요 <strong>{username}</strong>님,</p>
-            <p>NVIDIA 8th 게시판 가입을 환영합니다!</p>
-            <p>아래 버튼을 클릭하여 이메일 인증을 완료해주세요:</p>
-            <p style="text-align: center;">
-                <a href="{confirm_url}" class="button">이메일 인증하기</a>
-            </p>
-            <p><small>※ 이 링크는 1시간 동안 유효합니다.</small></p>
-            <p>감사합니다.<br>NVIDIA 8th Board 팀</p>
-        </div>
-        <div class="footer">
-            <p>이 이메일은 NVIDIA 8th Board에서 자동으로 발송되었습니다.</p>
-        </div>
-    </div>
-</body>
-</html>
-"""
-            }
-        ]
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        
-        if response.status_code == 202:  # SendGrid 성공 코드
-            print(f"✅ SendGrid 이메일 발송 성공: {email}")
-            return True
-        else:
-            print(f"❌ SendGrid 이메일 발송 실패: {response.status_code}")
-            print(f"   Response: {response.text}")
-            return False
-            
-    except requests.exceptions.Timeout:
-        print(f"⚠️ SendGrid API 타임아웃 (10초 초과)")
-        return False
-    except Exception as e:
-        print(f"❌ SendGrid API 오류: {type(e).__name__}: {str(e)}")
-        return False
+def _chunk_lines(lines, limit):
+    chunk = ''
+    for line in lines:
+        if chunk and len(chunk) + len(line) + 1 > limit:
+            yield chunk
+            chunk = ''
+        chunk = f"{chunk}\n{line}" if chunk else line
+    if chunk:
+        yield chunk
+
+def post_slack_message(message):
+    """Slack Webhook 전송 (백그라운드 작업, 실패 시 예외 → 재시도)"""
+    webhook_url = os.environ.get('SLACK_WEBHOOK_URL')
+    if not webhook_url:
+        return
+
+    response = outbound.post(webhook_url, json=message)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RuntimeError(f"Slack 응답 {response.status_code}")
+    if response.status_code != 200:
+        # 4xx(잘못된 payload 등)는 재시도해도 같은 결과
+        print(f"❌ Slack 알림 실패: {response.status_code} - {response.text}")
+        return
+    print(f"✅ Slack 알림 전송 성공: {message['text']}")
+
+# ==================== 이메일 아웃박스 발송 ====================
+
+# 각 워커 프로세스에서 아웃박스를 비우는 스레드 (false면 python email_outbox.py worker를 따로 실행)
+EMAIL_OUTBOX_WORKER = os.environ.get('EMAIL_OUTBOX_WORKER', 'true').lower() in ('1', 'true', 'yes')
+_email_outbox_wakeup = threading.Event()
+_email_outbox_started_pid = None
+
+def _email_outbox_worker():
+    while True:
+        _email_outbox_wakeup.clear()
+        try:
+            drain_email_outbox(db_pool.connection, outbound)
+        except Exception as e:
+            print(f"❌ 이메일 아웃박스 오류: {type(e).__name__}: {str(e)}")
+        # 새 메일이 등록되면 바로, 아니면 EMAIL_POLL_INTERVAL마다 (재시도 대상 확인)
+        _email_outbox_wakeup.wait(EMAIL_POLL_INTERVAL)
+
+@app.before_request
+def start_email_outbox_worker():
+    global _email_outbox_started_pid
+    if not EMAIL_OUTBOX_WORKER or not SENDGRID_API_KEY or _email_outbox_started_pid == os.getpid():
+        return
+    _email_outbox_started_pid = os.getpid()
+    threading.Thread(target=_email_outbox_worker, name='email-outbox', daemon=True).start()
+
+def wake_email_outbox():
+    """커밋 직후 호출 → 발송 스레드가 대기 없이 바로 처리"""
+    _email_outbox_wakeup.set()
 
 def init_db():
-    """데이터베이스 초기화 (PostgreSQL 전용)"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # users 테이블
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            username VARCHAR(50) UNIQUE NOT NULL,
-            email VARCHAR(100) UNIQUE NOT NULL,
-            password VARCHAR(200) NOT NULL,
-            email_verified BOOLEAN DEFAULT FALSE,
-            verification_token VARCHAR(100),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # posts 테이블
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id SERIAL PRIMARY KEY,
-            board_type VARCHAR(20) NOT NULL,
-            title VARCHAR(200) NOT NULL,
-            author VARCHAR(100) NOT NULL,
-            password VARCHAR(200),
-            content TEXT,
-            filename VARCHAR(200),
-            cloudinary_url TEXT,
-            cloudinary_public_id TEXT,
-            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
-            ip_address VARCHAR(45),
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # comments 테이블
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS comments (
-            id SERIAL PRIMARY KEY,
-            post_id INTEGER REFERENCES posts(id) ON DELETE CASCADE,
-            parent_id INTEGER REFERENCES comments(id) ON DELETE CASCADE,
-            author VARCHAR(100) NOT NULL,
-            password VARCHAR(200),
-            content TEXT NOT NULL,
-            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
-            ip_address VARCHAR(45),
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
+    """데이터베이스 초기화 (PostgreSQL 전용, schema_migrations.py의 마이그레이션 적용)"""
+    with db_pool.connection() as conn:
+        run_migrations(conn)
     print("✅ PostgreSQL 데이터베이스 초기화 완료")
 
 # ==================== 회원 시스템 ====================
@@ -420,7 +1181,7 @@ def register():
             flash('비밀번호는 8자 이상이어야 합니다.', 'error')
             return redirect(url_for('register'))
         
-        password_hash = generate_password_hash(password)
+        password_hash = password_hasher.hash(password)
         token = serializer.dumps(email, salt='email-confirm')
         
         conn = get_db_connection()
@@ -432,21 +1193,22 @@ def register():
                 INSERT INTO users (username, email, password, verification_token, email_verified)
                 VALUES (%s, %s, %s, %s, %s)
             ''', (username, email, password_hash, token, False))
+
+            # ⭐ 인증 메일은 같은 트랜잭션에서 아웃박스에 등록 (발송은 백그라운드 워커)
+            enqueue_email(cursor, 'verify_email', email, {
+                'username': username,
+                'confirm_url': url_for('confirm_email', token=token, _external=True),
+            })
             
             conn.commit()
+            wake_email_outbox()
             
-            # ⭐ 1. Slack 알림 (관리자용 - 실패해도 OK)
-            try:
-                send_slack_notification(username, email, "회원가입")
-            except Exception as slack_error:
-                print(f"⚠️ Slack 알림 실패 (무시): {slack_error}")
-            
-            # ⭐ 2. SendGrid 이메일 발송 (사용자 인증용 - HTTP API 사용)
-            email_sent = send_verification_email(username, email, token)
+            # ⭐ Slack 알림 (관리자용 - 백그라운드 전송, 실패해도 OK)
+            notify_slack("회원가입", username, email)
             
             # ⭐ 사용자 피드백
-            if email_sent:
-                flash('📧 인증 이메일이 발송되었습니다! 이메일을 확인하여 인증을 완료해주세요.', 'success')
+            if SENDGRID_API_KEY:
+                flash('📧 인증 이메일을 발송했습니다! 이메일을 확인하여 인증을 완료해주세요.', 'success')
             else:
                 flash('⚠️ 회원가입은 완료되었으나 인증 이메일 발송에 실패했습니다. 관리자에게 문의하세요.', 'warning')
             
@@ -469,7 +1231,6 @@ def register():
                 flash(f'회원가입 실패: {error_msg}', 'error')
         finally:
             cursor.close()
-            conn.close()
     
     return render_template('register.html')
 
@@ -494,7 +1255,6 @@ def confirm_email(token):
     if not user:
         flash('사용자를 찾을 수 없습니다.', 'error')
         cursor.close()
-        conn.close()
         return redirect(url_for('register'))
     
     cursor.execute('''
@@ -505,13 +1265,9 @@ def confirm_email(token):
     
     conn.commit()
     cursor.close()
-    conn.close()
     
-    # ⭐ Slack 알림: 이메일 인증 완료
-    try:
-        send_slack_notification(user['username'], email, "이메일인증", verified=True)
-    except Exception as slack_error:
-        print(f"⚠️ Slack 알림 실패 (무시): {slack_error}")
+    # ⭐ Slack 알림: 이메일 인증 완료 (백그라운드 전송)
+    notify_slack("이메일인증", user['username'], email, verified=True)
     
     flash('✅ 이메일 인증이 완료되었습니다! 로그인해주세요.', 'success')
     return redirect(url_for('login'))
@@ -528,21 +1284,35 @@ def login():
         cursor.execute('SELECT * FROM users WHERE username = %s', (username,))
         user = cursor.fetchone()
         
-        cursor.close()
-        conn.close()
-        
         if user:
             user = dict(user)
-            if check_password_hash(user['password'], password):
+            if password_hasher.verify(user['password'], password):
                 if not user['email_verified']:
+                    cursor.close()
                     flash('이메일 인증을 먼저 완료해주세요.', 'error')
                     return redirect(url_for('login'))
+
+                # ⭐ 예전 방식/강도로 저장된 해시는 평문을 아는 지금 새 설정으로 다시 저장
+                #    해싱이 포화 상태면 건너뜀 (비밀번호가 맞았으니 로그인은 진행, 다음 로그인 때 다시 시도)
+                if password_hasher.needs_rehash(user['password']):
+                    try:
+                        new_hash = password_hasher.hash(password)
+                    except HashingBusy:
+                        new_hash = None
+                    if new_hash:
+                        cursor.execute('UPDATE users SET password = %s WHERE id = %s AND password = %s',
+                                       (new_hash, user['id'], user['password']))
+                        conn.commit()
+                        password_hasher.record_rehash()
+                
+                cursor.close()
                 
                 session['user_id'] = user['id']
                 session['username'] = user['username']
                 flash(f'{username}님 환영합니다!', 'success')
                 return redirect(url_for('index'))
         
+        cursor.close()
         flash('아이디 또는 비밀번호가 일치하지 않습니다.', 'error')
     
     return render_template('login.html')
@@ -559,62 +1329,58 @@ def logout():
 def user_profile(user_id):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('SELECT id, username, created_at FROM users WHERE id = %s', (user_id,))
-    user = cursor.fetchone()
+
+    # ⭐ 조건부 요청이면 버전만 먼저 확인 → 같으면 목록 조회와 렌더링 없이 304
+    if wants_conditional():
+        current = fetch_profile_version(cursor, user_id)
+        if current is not None:
+            response = not_modified(*profile_validators(current))
+            if response is not None:
+                cursor.close()
+                return response
+
+    # ⭐ 사용자 + 작성 글 + 작성 댓글을 한 번의 쿼리로 조회
+    user = fetch_profile_page(cursor, user_id)
+    cursor.close()
     
     if not user:
-        cursor.close()
-        conn.close()
         return "사용자를 찾을 수 없습니다.", 404
-    
-    user = dict(user)
-    
-    # 작성 글
-    cursor.execute('''
-        SELECT id, title, board_type, created_at 
-        FROM posts 
-        WHERE user_id = %s 
-        ORDER BY created_at DESC
-        LIMIT 20
-    ''', (user_id,))
-    posts = [dict(row) for row in cursor.fetchall()]
-    
-    # 작성 댓글
-    cursor.execute('''
-        SELECT c.id, c.content, c.created_at, p.id as post_id, p.title as post_title
-        FROM comments c
-        JOIN posts p ON c.post_id = p.id
-        WHERE c.user_id = %s
-        ORDER BY c.created_at DESC
-        LIMIT 20
-    ''', (user_id,))
-    comments = [dict(row) for row in cursor.fetchall()]
-    
-    cursor.close()
-    conn.close()
-    
-    return render_template('user_profile.html', user=user, posts=posts, comments=comments)
+
+    etag, last_modified = profile_validators(user)
+    return conditional_response(
+        render_template('user_profile.html', user=user, posts=user['posts'], comments=user['comments']),
+        etag, last_modified
+    )
+
+def profile_validators(user):
+    """프로필 버전 정보 → (ETag, Last-Modified)"""
+    etag = page_etag('user', user['id'], user['post_count'], user['post_max_id'], user['post_updated_at'],
+                     user['comment_count'], user['comment_max_id'], user['comment_updated_at'])
+    last_modified = max(filter(None, (user['created_at'], user['post_updated_at'], user['comment_updated_at'])))
+    return etag, last_modified
 
 # ==================== 게시판 ====================
 
 @app.route('/')
+@cached_page
 def index():
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
     
     cursor.execute(
-        "SELECT * FROM posts WHERE board_type = %s ORDER BY created_at DESC LIMIT 5",
+        "SELECT id, title, author, created_at FROM posts WHERE board_type = %s ORDER BY created_at DESC, id DESC LIMIT 5",
         ('project',)
     )
     recent_projects = [dict(row) for row in cursor.fetchall()]
     
     cursor.close()
-    conn.close()
+
+    tag_page('board:project', *(f"post:{post['id']}" for post in recent_projects))
     
     return render_template('index.html', recent_projects=recent_projects)
 
 @app.route('/board/<board_type>')
+@cached_page
 def board(board_type):
     if board_type not in ['free', 'project', 'share']:
         return "잘못된 게시판입니다.", 404
@@ -626,37 +1392,156 @@ def board(board_type):
     }
     board_name = board_names.get(board_type, '게시판')
     
+    # ⭐ 키셋 페이지네이션: (created_at, id) 기준
+    #    after  = 이 커서보다 오래된 글 (다음 페이지)
+    #    before = 이 커서보다 최신 글 (이전 페이지)
+    after = decode_page_cursor(request.args.get('after'))
+    before = None if after else decode_page_cursor(request.args.get('before'))
+    per_page = request.args.get('per_page', type=int) or BOARD_PAGE_SIZE
+    per_page = max(1, min(per_page, BOARD_MAX_PAGE_SIZE))
+
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    # ⭐ 댓글 수 포함해서 가져오기 (댓글 + 대댓글 모두)
-    cursor.execute('''
-            SELECT p.*, COUNT(c.id) as comment_count
-            FROM posts p
-            LEFT JOIN comments c ON p.id = c.post_id
-            WHERE p.board_type = %s
-            GROUP BY p.id
-            ORDER BY p.created_at DESC
-        ''', (board_type,))
+    # ⭐ 게시판 버전 (posts 변경 시 트리거로 증가) → 같으면 목록 조회 없이 304
+    cursor.execute('SELECT version, updated_at FROM board_versions WHERE board_type = %s', (board_type,))
+    board_version = cursor.fetchone() or {'version': 0, 'updated_at': None}
+    etag = page_etag('board', board_type, board_version['version'])
+    last_modified = board_version['updated_at']
+
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        cursor.close()
+        return response
+
+    # ⭐ 목록에 필요한 컬럼만 조회 (본문 content는 가져오지 않음)
+    #    - 댓글 수: posts.comment_count (댓글 트리거로 유지, 댓글 + 대댓글 모두)
+    #    - 썸네일/요약: 작성·수정 시 저장한 thumbnail_url / excerpt
+    query = '''
+        SELECT p.id, p.board_type, p.title, p.author, p.user_id, p.filename,
+               p.comment_count, p.excerpt, p.created_at,
+               COALESCE(p.thumbnail_url, p.cloudinary_url) AS thumbnail
+        FROM posts p
+        WHERE p.board_type = %s
+    '''
+    params = [board_type]
+
+    if before:
+        query += ' AND (p.created_at, p.id) > (%s, %s) ORDER BY p.created_at ASC, p.id ASC LIMIT %s'
+        params.extend([before[0], before[1], per_page + 1])
+    elif after:
+        query += ' AND (p.created_at, p.id) < (%s, %s) ORDER BY p.created_at DESC, p.id DESC LIMIT %s'
+        params.extend([after[0], after[1], per_page + 1])
+    else:
+        query += ' ORDER BY p.created_at DESC, p.id DESC LIMIT %s'
+        params.append(per_page + 1)
+
+    cursor.execute(query, params)
     posts = [dict(row) for row in cursor.fetchall()]
 
-    # ⭐ 썸네일 우선순위 적용: 본문 이미지 → 첨부 파일
-    for post in posts:
-        # 1순위: 본문 첫 이미지
-        content_image = extract_first_image(post.get('content', ''))
-
-        if content_image:
-            post['thumbnail'] = content_image
-        elif post.get('cloudinary_url'):
-            # 2순위: 첨부 파일
-            post['thumbnail'] = post['cloudinary_url']
-        else:
-            post['thumbnail'] = None
+    has_more = len(posts) > per_page
+    posts = posts[:per_page]
+
+    if before:
+        posts.reverse()
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = after is not None, has_more
+
+    # 빈 페이지(잘못된 커서 등)에서는 이동 링크 없음
+    if not posts:
+        has_newer = has_older = False
+
+    next_cursor = encode_page_cursor(posts[-1]['created_at'], posts[-1]['id']) if has_older else None
+    prev_cursor = encode_page_cursor(posts[0]['created_at'], posts[0]['id']) if has_newer else None
+
+    total_count, count_is_estimate = estimate_board_count(cursor, board_type)
 
     cursor.close()
-    conn.close()
-    
-    return render_template('board.html', posts=posts, board_type=board_type, board_name=board_name)
+
+    tag_page(f'board:{board_type}', *(f"post:{post['id']}" for post in posts))
+    
+    return conditional_response(render_template(
+        'board.html',
+        posts=posts,
+        board_type=board_type,
+        board_name=board_name,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        per_page=per_page if per_page != BOARD_PAGE_SIZE else None,
+        total_count=total_count,
+        count_is_estimate=count_is_estimate
+    ), etag, last_modified)
+
+# ⭐ 브라우저 → Cloudinary 직접 업로드 (서명만 서버에서 발급, 파일은 워커를 거치지 않음)
+#    실패하거나 꺼져 있으면 기존 방식(서버 경유 업로드)으로 동작
+DIRECT_UPLOAD_ENABLED = (
+    os.environ.get('DIRECT_UPLOAD_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    and bool(os.environ.get('CLOUDINARY_API_SECRET'))
+)
+UPLOAD_FOLDERS = {
+    'free': 'nvidia8th_board/free',
+    'project': 'nvidia8th_board/project',
+    'share': 'nvidia8th_board/share',
+    'content_images': 'nvidia8th_board/content_images',
+}
+# 서명 발급 후 이 시간(초)이 지난 업로드 결과는 받지 않음
+UPLOAD_MAX_AGE = int(os.environ.get('UPLOAD_MAX_AGE', 3600))
+
+def verified_direct_upload(form, folder):
+    """직접 업로드 결과 검증 → (secure_url, public_id, filename), 없으면 None
+
+    Cloudinary 응답의 signature(public_id + version을 API secret으로 서명)를 확인하므로
+    브라우저가 다른 파일/폴더의 값을 임의로 보내도 받아들이지 않음
+    """
+    public_id = form.get('uploaded_public_id')
+    if not public_id:
+        return None
+
+    version = form.get('uploaded_version', '')
+    secure_url = form.get('uploaded_url', '')
+    signature = form.get('uploaded_signature', '')
+
+    if not version.isdigit() or not cloudinary.utils.verify_api_response_signature(public_id, version, signature):
+        raise ValueError('업로드 서명이 올바르지 않습니다.')
+    if not public_id.startswith(folder + '/'):
+        raise ValueError('업로드 경로가 올바르지 않습니다.')
+    if time.time() - int(version) > UPLOAD_MAX_AGE:
+        raise ValueError('업로드가 만료되었습니다. 파일을 다시 선택해주세요.')
+
+    url = urlparse(secure_url)
+    cloud_name = cloudinary.config().cloud_name
+    if (url.scheme != 'https' or url.netloc != 'res.cloudinary.com'
+            or not url.path.startswith(f'/{cloud_name}/')
+            or f'/v{version}/{public_id}' not in url.path):
+        raise ValueError('업로드 URL이 올바르지 않습니다.')
+
+    filename = secure_filename(form.get('uploaded_filename', '')) or public_id.rsplit('/', 1)[-1]
+    return secure_url, public_id, filename
+
+@app.route('/upload-signature', methods=['POST'])
+@login_required
+def upload_signature():
+    """직접 업로드용 서명 발급 (DB/파일 처리 없음 → 수 ms)"""
+    if not DIRECT_UPLOAD_ENABLED:
+        return jsonify({'error': '직접 업로드가 비활성화되어 있습니다.'}), 404
+
+    folder = UPLOAD_FOLDERS.get(request.form.get('target', ''))
+    if folder is None:
+        return jsonify({'error': '잘못된 업로드 대상입니다.'}), 400
+
+    config = cloudinary.config()
+    params = {'timestamp': int(time.time()), 'folder': folder}
+    signature = cloudinary.utils.api_sign_request(params, config.api_secret)
+    resource_type = 'image' if folder.endswith('content_images') else 'auto'
+
+    return jsonify({
+        'upload_url': f'https://api.cloudinary.com/v1_1/{config.cloud_name}/{resource_type}/upload',
+        'api_key': config.api_key,
+        'timestamp': params['timestamp'],
+        'folder': folder,
+        'signature': signature,
+    })
 
 @app.route('/upload-image', methods=['POST'])
 @login_required
@@ -715,8 +1600,17 @@ def write(board_type):
         cloudinary_url = None
         cloudinary_public_id = None
         filename = None
-        
-        if file and file.filename:
+
+        # 브라우저에서 직접 업로드한 파일 (서명 검증 후 기록만)
+        try:
+            uploaded = verified_direct_upload(request.form, UPLOAD_FOLDERS[board_type])
+        except ValueError as e:
+            flash(f'파일 업로드 실패: {str(e)}', 'error')
+            return redirect(url_for('write', board_type=board_type))
+
+        if uploaded:
+            cloudinary_url, cloudinary_public_id, filename = uploaded
+        elif file and file.filename:
             filename = secure_filename(file.filename)
             try:
                 upload_result = cloudinary.uploader.upload(
@@ -730,19 +1624,31 @@ def write(board_type):
                 flash(f'파일 업로드 실패: {str(e)}', 'error')
                 return redirect(url_for('write', board_type=board_type))
         
+        # ⭐ 목록용 썸네일/요약, 보기용 정리된 HTML은 작성 시 한 번만 계산
+        thumbnail_url, excerpt = build_post_summary(content, cloudinary_url)
+        content_sanitized = sanitize_html(content)
+
         conn = get_db_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT INTO posts (board_type, title, author, password, content, filename, 
-                              cloudinary_url, cloudinary_public_id, user_id, ip_address, user_agent)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                              cloudinary_url, cloudinary_public_id, user_id, ip_address, user_agent,
+                              thumbnail_url, excerpt, content_sanitized, sanitizer_version)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
         ''', (board_type, title, author, password_hash, content, filename, 
-              cloudinary_url, cloudinary_public_id, user_id, ip_address, user_agent))
+              cloudinary_url, cloudinary_public_id, user_id, ip_address, user_agent,
+              thumbnail_url, excerpt, content_sanitized, SANITIZER_POLICY_VERSION))
+        post_id = cursor.fetchone()[0]
+        invalidate_pages(cursor, f'board:{board_type}')
         
         conn.commit()
         cursor.close()
-        conn.close()
+
+        # ⭐ Slack 알림: 새 글 (백그라운드 전송, 짧은 시간 안의 알림은 요약으로 묶음)
+        notify_slack("새글작성", author, detail=title,
+                     url=url_for('view_post', post_id=post_id, _external=True))
         
         flash('게시글이 작성되었습니다.', 'success')
         return redirect(url_for('board', board_type=board_type))
@@ -754,109 +1660,309 @@ def write(board_type):
     }
     board_name = board_names.get(board_type, '게시판')
     is_logged_in = 'user_id' in session
-    return render_template('write.html', board_type=board_type, board_name=board_name, is_logged_in=is_logged_in)
+    return render_template('write.html', board_type=board_type, board_name=board_name, is_logged_in=is_logged_in,
+                           direct_upload=DIRECT_UPLOAD_ENABLED)
 
 @app.route('/post/<int:post_id>')
+@cached_page
 def view_post(post_id):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('SELECT * FROM posts WHERE id = %s', (post_id,))
-    post = cursor.fetchone()
+
+    # ⭐ 조건부 요청이면 버전만 먼저 확인 → 같으면 본문/댓글 조회와 렌더링 없이 304
+    if wants_conditional():
+        cursor.execute('SELECT version, updated_at FROM posts WHERE id = %s', (post_id,))
+        current = cursor.fetchone()
+        if current is not None:
+            response = not_modified(page_etag('post', post_id, current['version']), current['updated_at'])
+            if response is not None:
+                cursor.close()
+                return response
+    
+    # ⭐ 게시글 + 최상위 댓글 첫 페이지(답글 미리보기 포함)를 한 번의 쿼리로 조회
+    post = fetch_post_page(cursor, post_id, COMMENT_PAGE_SIZE, REPLY_PREVIEW_COUNT)
+    cursor.close()
     
     if post is None:
-        cursor.close()
-        conn.close()
         return "게시글을 찾을 수 없습니다.", 404
     
-    post = dict(post)
-    
-    # 댓글 및 대댓글 조회
-    cursor.execute(
-        'SELECT * FROM comments WHERE post_id = %s ORDER BY created_at ASC',
-        (post_id,)
-    )
-    all_comments = [dict(row) for row in cursor.fetchall()]
-    
-    # 댓글 계층 구조 생성
-    comments = []
-    comment_dict = {}
-    
-    for comment in all_comments:
-        comment['replies'] = []
-        comment_dict[comment['id']] = comment
-        
-        if comment['parent_id'] is None:
-            comments.append(comment)
-        else:
-            if comment['parent_id'] in comment_dict:
-                comment_dict[comment['parent_id']]['replies'].append(comment)
-    
-    cursor.close()
-    conn.close()
+    tag_page(f'post:{post_id}')
+
+    # ⭐ 저장된 정리본 사용 (구버전/미처리 글만 즉석 정리 + 메모이제이션)
+    post['content_html'] = rendered_post_content(post)
+
+    comments, next_cursor = comment_page(post['comments'])
     
     # 작성자 확인
     is_author = False
     if 'user_id' in session and post['user_id'] == session['user_id']:
         is_author = True
     
-    return render_template('view.html', post=post, comments=comments, is_author=is_author)
+    # flash 메시지 여부는 렌더링(메시지 소비) 전에 확인해야 함
+    etag = page_etag('post', post_id, post['version'])
+    return conditional_response(
+        render_template('view.html', post=post, comments=comments, next_cursor=next_cursor, is_author=is_author),
+        etag, post['updated_at']
+    )
+
+
+# ==================== 댓글 페이지 ====================
+
+COMMENT_PAGE_SIZE = int(os.environ.get('COMMENT_PAGE_SIZE', 50))
+REPLY_PREVIEW_COUNT = int(os.environ.get('REPLY_PREVIEW_COUNT', 3))
+REPLY_PAGE_SIZE = int(os.environ.get('REPLY_PAGE_SIZE', 50))
+
+def comment_page(threads):
+    """최상위 댓글 목록(limit+1개 조회) → (이번 페이지, 다음 페이지 커서)"""
+    has_more = len(threads) > COMMENT_PAGE_SIZE
+    threads = threads[:COMMENT_PAGE_SIZE]
+    for thread in threads:
+        # 미리보기 다음부터 이어서 불러올 답글 커서
+        last = thread['replies'][-1] if thread['replies'] else None
+        thread['replies_cursor'] = encode_page_cursor(last['created_at'], last['id']) if last else None
+    next_cursor = encode_page_cursor(threads[-1]['created_at'], threads[-1]['id']) if has_more else None
+    return threads, next_cursor
+
+@app.route('/post/<int:post_id>/comments')
+@cached_page
+def post_comments(post_id):
+    """댓글 더 보기: 최상위 댓글 다음 페이지 HTML 조각"""
+    after = decode_page_cursor(request.args.get('after'))
+    if after is None:
+        return "잘못된 요청입니다.", 400
+
+    cursor = get_db_connection().cursor(cursor_factory=RealDictCursor)
+    threads = fetch_comment_threads(cursor, post_id, after, COMMENT_PAGE_SIZE, REPLY_PREVIEW_COUNT)
+    cursor.close()
+
+    tag_page(f'post:{post_id}')
+    comments, next_cursor = comment_page(threads)
+    return render_template('_comments.html', comments=comments, next_cursor=next_cursor, post_id=post_id)
 
+@app.route('/comment/<int:comment_id>/replies')
+@cached_page
+def comment_replies(comment_id):
+    """답글 더 보기: 최상위 댓글의 답글 다음 페이지 HTML 조각"""
+    after = decode_page_cursor(request.args.get('after'))
+
+    cursor = get_db_connection().cursor(cursor_factory=RealDictCursor)
+    post_id, replies = fetch_replies(cursor, comment_id, after, REPLY_PAGE_SIZE)
+    cursor.close()
+
+    if post_id is None:
+        return "댓글을 찾을 수 없습니다.", 404
+
+    tag_page(f'post:{post_id}')
+    has_more = len(replies) > REPLY_PAGE_SIZE
+    replies = replies[:REPLY_PAGE_SIZE]
+    next_cursor = encode_page_cursor(replies[-1]['created_at'], replies[-1]['id']) if has_more else None
+    return render_template('_replies.html', replies=replies, next_cursor=next_cursor, comment_id=comment_id)
+
+# ==================== 새 댓글 실시간 전달 ====================
+
+# 보고 있는 글에 댓글이 달리면: add_comment → NOTIFY comment_events → 워커별 LISTEN 연결 1개
+# → 이 워커에 열린 SSE 스트림들에 "새 댓글 있음" 전달 → 브라우저가 새 댓글만 조회(/comments/since)
+COMMENT_EVENTS_CHANNEL = 'comment_events'
+COMMENT_DELTA_LIMIT = int(os.environ.get('COMMENT_DELTA_LIMIT', 100))
+# 스트림마다 gthread 스레드 1개를 SSE_STREAM_TIMEOUT 동안 점유 → 워커 스레드의 1/4까지만 허용
+# (나머지는 페이지 요청용, 자리가 없으면 브라우저는 간격을 늘려 가며 /comments/since 조회)
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 32))      # Procfile/render.yaml의 --threads와 같은 값
+SSE_MAX_STREAMS = min(int(os.environ.get('SSE_MAX_STREAMS', GUNICORN_THREADS // 4)), GUNICORN_THREADS // 4)
+SSE_HEARTBEAT = float(os.environ.get('SSE_HEARTBEAT', 25))           # 프록시 유휴 타임아웃 방지용 주석 줄 간격
+SSE_STREAM_TIMEOUT = float(os.environ.get('SSE_STREAM_TIMEOUT', 300)) # 이후 스트림을 닫고 브라우저가 재연결
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 5000))
+
+class CommentEventHub:
+    """게시글별 구독자(스트림마다 작은 큐) 관리 → 알림을 구독자 큐로 나눠 줌"""
+
+    SYNC = 'sync'   # 알림을 놓쳤을 수 있음 (LISTEN 재연결 / 큐 넘침) → 클라이언트가 새 댓글 재조회
+
+    def __init__(self, max_streams, queue_size=16):
+        self.max_streams = max_streams
+        self.queue_size = queue_size
+        self._subscribers = {}   # post_id → set(queue)
+        self._count = 0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.rejected = 0
+        self.overflows = 0
+
+    def subscribe(self, post_id):
+        """구독 큐 반환, 워커당 스트림 수를 넘으면 None"""
+        with self._lock:
+            if self._count >= self.max_streams:
+                self.rejected += 1
+                return None
+            q = queue.Queue(self.queue_size)
+            self._subscribers.setdefault(post_id, set()).add(q)
+            self._count += 1
+            return q
+
+    def unsubscribe(self, post_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(post_id)
+            if subscribers and q in subscribers:
+                subscribers.discard(q)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[post_id]
+
+    def _put(self, q, item):
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            # 밀린 알림은 버리고 재조회 신호만 남김 (어차피 클라이언트는 last id 이후를 조회)
+            self.overflows += 1
+            try:
+                while True:
+                    q.get_nowait()
+            except queue.Empty:
+                pass
+            q.put_nowait(self.SYNC)
+
+    def publish(self, post_id, comment_id):
+        with self._lock:
+            subscribers = list(self._subscribers.get(post_id, ()))
+            self.published += 1
+        for q in subscribers:
+            self._put(q, comment_id)
+
+    def resync(self):
+        with self._lock:
+            subscribers = [q for qs in self._subscribers.values() for q in qs]
+        for q in subscribers:
+            self._put(q, self.SYNC)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'streams': self._count,
+                'max_streams': self.max_streams,
+                'posts': len(self._subscribers),
+                'published': self.published,
+                'rejected': self.rejected,
+                'overflows': self.overflows,
+            }
+
+comment_events = CommentEventHub(SSE_MAX_STREAMS)
+
+def _handle_comment_notify(payloads):
+    for payload in payloads:
+        try:
+            post_id, comment_id = (int(part) for part in payload.split())
+        except ValueError:
+            continue
+        comment_events.publish(post_id, comment_id)
+
+on_notify(COMMENT_EVENTS_CHANNEL, _handle_comment_notify, on_connect=comment_events.resync)
+
+def notify_new_comment(cursor, post_id, comment_id):
+    """add_comment 트랜잭션 안에서 호출 → 커밋될 때 모든 워커로 전달"""
+    cursor.execute('SELECT pg_notify(%s, %s)', (COMMENT_EVENTS_CHANNEL, f'{post_id} {comment_id}'))
+
+@app.route('/post/<int:post_id>/comments/since')
+def comments_since(post_id):
+    """after_id 이후의 새 댓글 → JSON {comments: [{id, root_id, html}], last_id, has_more}
+
+    페이지 캐시를 쓰지 않음: 다른 워커에서 SSE 이벤트를 받고 바로 요청하면 이 워커는 아직 캐시 무효화
+    알림을 처리하기 전일 수 있음 → 빈 결과가 캐시되어 모든 비로그인 사용자에게 새 댓글이 빠짐
+    (after_id 이후 인덱스 조회라 매번 DB로 가도 가벼움)
+    """
+    after_id = request.args.get('after_id', type=int)
+    if after_id is None:
+        return jsonify({'error': 'after_id가 필요합니다.'}), 400
+
+    cursor = get_db_connection().cursor(cursor_factory=RealDictCursor)
+    rows = fetch_comments_since(cursor, post_id, after_id, COMMENT_DELTA_LIMIT)
+    cursor.close()
+
+    has_more = len(rows) > COMMENT_DELTA_LIMIT
+    rows = rows[:COMMENT_DELTA_LIMIT]
+
+    comments = []
+    for row in rows:
+        if row['root_id'] == row['id']:
+            row.update(replies=[], reply_count=0, replies_cursor=None)
+            html = render_template('_comment.html', comment=row, post_id=post_id)
+        else:
+            html = render_template('_reply.html', reply=row)
+        comments.append({'id': row['id'], 'root_id': row['root_id'], 'html': html})
+
+    return jsonify({
+        'comments': comments,
+        'last_id': rows[-1]['id'] if rows else after_id,
+        'has_more': has_more,
+    })
+
+@app.route('/post/<int:post_id>/events')
+def comment_event_stream(post_id):
+    """새 댓글 알림 SSE 스트림 (DB 커넥션을 잡지 않음, 댓글 내용은 /comments/since로 조회)"""
+    q = comment_events.subscribe(post_id)
+    if q is None:
+        # 스트림 자리가 없으면 클라이언트는 새 댓글 조회를 주기적으로 호출하는 방식으로 전환
+        response = Response('event: busy\ndata: \n\n', status=503, mimetype='text/event-stream')
+        response.headers['Retry-After'] = '60'
+        return response
+
+    # 재연결이면 끊긴 사이의 댓글이 있을 수 있으므로 바로 재조회 신호
+    resume = request.headers.get('Last-Event-ID') is not None
+
+    def stream():
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            if resume:
+                yield f'event: {CommentEventHub.SYNC}\ndata: \n\n'
+            deadline = time.monotonic() + SSE_STREAM_TIMEOUT
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    item = q.get(timeout=min(SSE_HEARTBEAT, remaining))
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if item == CommentEventHub.SYNC:
+                    yield f'event: {CommentEventHub.SYNC}\ndata: \n\n'
+                else:
+                    yield f'id: {item}\nevent: comment\ndata: {item}\n\n'
+        finally:
+            comment_events.unsubscribe(post_id, q)
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'   # 프록시 버퍼링 끄기
+    return response
 
 @app.route('/post/<int:post_id>/edit', methods=['GET', 'POST'])
 def edit_post(post_id):
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    cursor.execute('SELECT * FROM posts WHERE id = %s', (post_id,))
-    post = cursor.fetchone()
+    # 수정 폼에 필요한 컬럼 + 작성자 확인용 컬럼만
+    post = fetch_owner(cursor, 'posts', post_id, 'title', 'content', 'filename', 'cloudinary_url')
+    cursor.close()
 
     if post is None:
-        cursor.close()
-        conn.close()
         flash('게시글을 찾을 수 없습니다.', 'error')
         return redirect(url_for('index'))
 
-    post = dict(post)
-
     # GET 요청: 로그인한 사용자가 자기 글 수정
     if request.method == 'GET':
         # 로그인한 사용자가 본인 글인 경우
         if post['user_id'] and 'user_id' in session and post['user_id'] == session['user_id']:
-            cursor.close()
-            conn.close()
-            return render_template('edit.html', post=post)
+            return render_template('edit.html', post=post, direct_upload=DIRECT_UPLOAD_ENABLED)
         else:
             # 익명 글이거나 다른 사람 글 → 비밀번호 필요
-            cursor.close()
-            conn.close()
             flash('비밀번호 인증이 필요합니다.', 'error')
             return redirect(url_for('view_post', post_id=post_id))
 
     # POST 요청: 비밀번호 검증
-    password = request.form.get('password', '')
-
-    # 권한 확인
-    is_admin = password == ADMIN_PASSWORD
-    is_author = False
-
-    # 1순위: 로그인한 본인이 쓴 글
-    if post['user_id'] and 'user_id' in session and post['user_id'] == session['user_id']:
-        is_author = True
-    # 2순위: 익명 글 + 비밀번호 일치
-    elif post['password'] and password:
-        is_author = check_password_hash(post['password'], password)
-
-    if not (is_admin or is_author):
-        cursor.close()
-        conn.close()
+    if not can_modify(post, request.form.get('password', '')):
         flash('비밀번호가 일치하지 않습니다.', 'error')
         return redirect(url_for('view_post', post_id=post_id))
     
-    cursor.close()
-    conn.close()
-    
-    return render_template('edit.html', post=post)
+    return render_template('edit.html', post=post, direct_upload=DIRECT_UPLOAD_ENABLED)
 
 @app.route('/post/<int:post_id>/update', methods=['POST'])
 def update_post(post_id):
@@ -864,37 +1970,47 @@ def update_post(post_id):
     content = request.form.get('content', '')  # ← 안전
     password = request.form.get('password', '')  # ← 안전
     
+    file = request.files.get('file')
+    keeps_file = (request.form.get('delete_file') != 'on' and not request.form.get('uploaded_public_id')
+                  and not (file and file.filename))
+    
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('SELECT * FROM posts WHERE id = %s', (post_id,))
-    post = cursor.fetchone()
+
+    # ⭐ 로그인한 작성자가 첨부 파일을 그대로 두는 경우: 권한 확인 + 수정을 UPDATE 한 번으로
+    #    (첨부 파일 썸네일은 DB의 cloudinary_url로 채움 → 기존 값을 미리 읽지 않아도 됨)
+    if 'user_id' in session and keeps_file:
+        thumbnail_url, excerpt = build_post_summary(content)
+        cursor.execute('''
+            UPDATE posts
+            SET title = %s, content = %s, thumbnail_url = COALESCE(%s, cloudinary_url), excerpt = %s,
+                content_sanitized = %s, sanitizer_version = %s,
+                updated_at = CURRENT_TIMESTAMP, version = version + 1
+            WHERE id = %s AND user_id = %s
+            RETURNING id
+        ''', (title, content, thumbnail_url, excerpt, sanitize_html(content), SANITIZER_POLICY_VERSION,
+              post_id, session['user_id']))
+        if cursor.fetchone() is not None:
+            invalidate_pages(cursor, f'post:{post_id}')
+            conn.commit()
+            cursor.close()
+            flash('게시글이 수정되었습니다.', 'success')
+            return redirect(url_for('view_post', post_id=post_id))
+
+    # 그 외(익명 글 비밀번호 / 관리자 / 파일 변경): 작성자 확인용 컬럼 + 첨부 파일 정보만 조회
+    post = fetch_owner(cursor, 'posts', post_id, 'cloudinary_url', 'cloudinary_public_id', 'filename')
 
     if post is None:
         cursor.close()
-        conn.close()
         flash('게시글을 찾을 수 없습니다.', 'error')
         return redirect(url_for('index'))
     
-    post = dict(post)
-    
-    # 권한 확인
-    is_admin = password == ADMIN_PASSWORD
-    is_author = False
-    
-    if post['user_id'] and 'user_id' in session and post['user_id'] == session['user_id']:
-        is_author = True
-    elif post['password']:
-        is_author = check_password_hash(post['password'], password)
-    
-    if not (is_admin or is_author):
+    if not can_modify(post, password):
         cursor.close()
-        conn.close()
         flash('비밀번호가 일치하지 않습니다.', 'error')
         return redirect(url_for('view_post', post_id=post_id))
     
     # 파일 수정 처리
-    file = request.files.get('file')
     cloudinary_url = post['cloudinary_url']
     cloudinary_public_id = post['cloudinary_public_id']
     filename = post['filename']
@@ -909,7 +2025,21 @@ def update_post(post_id):
         cloudinary_public_id = None
         filename = None
     
-    if file and file.filename:
+    try:
+        uploaded = verified_direct_upload(request.form, UPLOAD_FOLDERS.get(post['board_type'], ''))
+    except ValueError as e:
+        uploaded = None
+        flash(f'파일 업로드 실패: {str(e)}', 'error')
+
+    if uploaded:
+        if cloudinary_public_id:
+            try:
+                cloudinary.uploader.destroy(cloudinary_public_id)
+            except:
+                pass
+
+        cloudinary_url, cloudinary_public_id, filename = uploaded
+    elif file and file.filename:
         if cloudinary_public_id:
             try:
                 cloudinary.uploader.destroy(cloudinary_public_id)
@@ -928,15 +2058,21 @@ def update_post(post_id):
         except Exception as e:
             flash(f'파일 업로드 실패: {str(e)}', 'error')
     
+    thumbnail_url, excerpt = build_post_summary(content, cloudinary_url)
+    content_sanitized = sanitize_html(content)
+
     cursor.execute('''
         UPDATE posts 
-        SET title = %s, content = %s, filename = %s, cloudinary_url = %s, cloudinary_public_id = %s
+        SET title = %s, content = %s, filename = %s, cloudinary_url = %s, cloudinary_public_id = %s,
+            thumbnail_url = %s, excerpt = %s, content_sanitized = %s, sanitizer_version = %s,
+            updated_at = CURRENT_TIMESTAMP, version = version + 1
         WHERE id = %s
-    ''', (title, content, filename, cloudinary_url, cloudinary_public_id, post_id))
+    ''', (title, content, filename, cloudinary_url, cloudinary_public_id,
+          thumbnail_url, excerpt, content_sanitized, SANITIZER_POLICY_VERSION, post_id))
+    invalidate_pages(cursor, f'post:{post_id}')
     
     conn.commit()
     cursor.close()
-    conn.close()
     
     flash('게시글이 수정되었습니다.', 'success')
     return redirect(url_for('view_post', post_id=post_id))
@@ -947,57 +2083,60 @@ def delete_post(post_id):
     
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('SELECT * FROM posts WHERE id = %s', (post_id,))
-    post = cursor.fetchone()
-    
+
+    # ⭐ 로그인한 작성자: 권한 확인 + 삭제를 DELETE 한 번으로 (댓글은 ON DELETE CASCADE)
+    post = None
+    if 'user_id' in session:
+        cursor.execute('''
+            DELETE FROM posts WHERE id = %s AND user_id = %s
+            RETURNING board_type, cloudinary_public_id
+        ''', (post_id, session['user_id']))
+        post = cursor.fetchone()
+
     if post is None:
-        cursor.close()
-        conn.close()
-        flash('게시글을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('index'))
-    
-    post = dict(post)
-    
-    # 권한 확인
-    is_admin = password == ADMIN_PASSWORD
-    is_author = False
+        # 익명 글 비밀번호 / 관리자: 작성자 확인용 컬럼만 조회 후 삭제
+        post = fetch_owner(cursor, 'posts', post_id, 'cloudinary_public_id')
 
-    # 1순위: 로그인한 본인이 쓴 글
-    if post['user_id'] and 'user_id' in session and post['user_id'] == session['user_id']:
-        is_author = True
-    # 2순위: 익명 글 + 비밀번호 일치
-    elif post['password'] and password:
-        is_author = check_password_hash(post['password'], password)
-    
-    if not (is_admin or is_author):
-        cursor.close()
-        conn.close()
-        flash('비밀번호가 일치하지 않습니다.', 'error')
-        return redirect(url_for('view_post', post_id=post_id))
+        if post is None:
+            cursor.close()
+            flash('게시글을 찾을 수 없습니다.', 'error')
+            return redirect(url_for('index'))
+
+        if not can_modify(post, password):
+            cursor.close()
+            flash('비밀번호가 일치하지 않습니다.', 'error')
+            return redirect(url_for('view_post', post_id=post_id))
+
+        cursor.execute('DELETE FROM posts WHERE id = %s', (post_id,))
+
+    board_type = post['board_type']
+    invalidate_pages(cursor, f'post:{post_id}', f"board:{board_type}")
     
-    # Cloudinary 파일 삭제
+    conn.commit()
+    cursor.close()
+
+    # Cloudinary 파일 삭제 (DB 삭제가 확정된 뒤에)
     if post['cloudinary_public_id']:
         try:
             cloudinary.uploader.destroy(post['cloudinary_public_id'])
         except:
             pass
     
-    cursor.execute('DELETE FROM comments WHERE post_id = %s', (post_id,))
-    cursor.execute('DELETE FROM posts WHERE id = %s', (post_id,))
-    
-    conn.commit()
-    board_type = post['board_type']
-    cursor.close()
-    conn.close()
-    
     flash('게시글이 삭제되었습니다.', 'success')
     return redirect(url_for('board', board_type=board_type))
 
+def wants_json():
+    """fetch()로 보낸 요청(Accept: application/json)이면 리다이렉트 대신 JSON 응답"""
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
 @app.route('/post/<int:post_id>/comment', methods=['POST'])
 def add_comment(post_id):
+    as_json = wants_json()
+
     # ⭐ 로그인 필수 (익명 댓글 차단)
     if 'user_id' not in session:
+        if as_json:
+            return jsonify({'error': '댓글을 작성하려면 로그인이 필요합니다.', 'login_url': url_for('login')}), 401
         flash('댓글을 작성하려면 로그인이 필요합니다.', 'error')
         return redirect(url_for('login'))
 
@@ -1009,6 +2148,21 @@ def add_comment(post_id):
     else:
         parent_id = None
 
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+
+    # 답글의 부모는 같은 게시글의 댓글이어야 함 (다른 글의 댓글을 가리키면 스레드에서 보이지 않음)
+    # 조각을 끼워 넣을 스레드(최상위 댓글)도 같이 확인
+    root_id = None
+    if parent_id is not None:
+        root_id = fetch_thread_root(cursor, post_id, parent_id)
+        if root_id is None:
+            cursor.close()
+            if as_json:
+                return jsonify({'error': '답글을 달 댓글을 찾을 수 없습니다.'}), 404
+            flash('답글을 달 댓글을 찾을 수 없습니다.', 'error')
+            return redirect(url_for('view_post', post_id=post_id))
+
     ip_address = get_client_ip()
     user_agent = request.headers.get('User-Agent', '')
 
@@ -1017,63 +2171,72 @@ def add_comment(post_id):
     author = session['username']
     password_hash = None
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+    # ⭐ 조각 렌더링에 필요한 값은 INSERT에서 바로 돌려받음 (다시 조회하지 않음)
     cursor.execute('''
         INSERT INTO comments (post_id, parent_id, author, password, content, user_id, ip_address, user_agent)
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id, author, content, user_id, created_at
     ''', (post_id, parent_id, author, password_hash, content, user_id, ip_address, user_agent))
+    comment = cursor.fetchone()
+    # 캐시 무효화 알림이 먼저 → 새 댓글 알림을 받은 클라이언트가 옛 캐시를 읽지 않음
+    invalidate_pages(cursor, f'post:{post_id}')
+    notify_new_comment(cursor, post_id, comment['id'])
     
     conn.commit()
     cursor.close()
-    conn.close()
+
+    # ⭐ Slack 알림: 새 댓글 (백그라운드 전송)
+    notify_slack("댓글작성", author, detail=content[:50],
+                 url=url_for('view_post', post_id=post_id, _external=True))
+
+    # ⭐ fetch 요청: 새 댓글 HTML 조각만 반환 → 페이지 전체를 다시 불러오지 않음
+    if as_json:
+        if root_id is None:
+            comment.update(replies=[], reply_count=0, replies_cursor=None)
+            html = render_template('_comment.html', comment=comment, post_id=post_id)
+            root_id = comment['id']
+        else:
+            html = render_template('_reply.html', reply=comment)
+        return jsonify({'id': comment['id'], 'root_id': root_id, 'html': html}), 201
     
     flash('댓글이 작성되었습니다.', 'success')
     return redirect(url_for('view_post', post_id=post_id))
 
 @app.route('/comment/<int:comment_id>/delete', methods=['POST'])
 def delete_comment(comment_id):
-    password = request.form['password']
+    password = request.form.get('password', '')
     
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
-    
-    cursor.execute('SELECT * FROM comments WHERE id = %s', (comment_id,))
-    comment = cursor.fetchone()
-    
+
+    # ⭐ 로그인한 작성자: 권한 확인 + 삭제를 DELETE 한 번으로
+    comment = None
+    if 'user_id' in session:
+        cursor.execute('DELETE FROM comments WHERE id = %s AND user_id = %s RETURNING post_id',
+                       (comment_id, session['user_id']))
+        comment = cursor.fetchone()
+
     if comment is None:
-        cursor.close()
-        conn.close()
-        flash('댓글을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('index'))
-    
-    comment = dict(comment)
-    
-    # 권한 확인
-    is_admin = password == ADMIN_PASSWORD
-    is_author = False
-    
-    # 1순위: 로그인한 본인이 쓴 댓글
-    if comment['user_id'] and 'user_id' in session and comment['user_id'] == session['user_id']:
-        is_author = True
-    # 2순위: 익명 댓글 + 비밀번호 일치
-    elif comment['password'] and password:
-        is_author = check_password_hash(comment['password'], password)
-    
-    if not (is_admin or is_author):
-        cursor.close()
-        conn.close()
-        flash('비밀번호가 일치하지 않습니다.', 'error')
-        return redirect(url_for('view_post', post_id=comment['post_id']))
-    
+        # 익명 댓글 비밀번호 / 관리자: 작성자 확인용 컬럼만 조회 후 삭제
+        comment = fetch_owner(cursor, 'comments', comment_id)
+
+        if comment is None:
+            cursor.close()
+            flash('댓글을 찾을 수 없습니다.', 'error')
+            return redirect(url_for('index'))
+
+        if not can_modify(comment, password):
+            cursor.close()
+            flash('비밀번호가 일치하지 않습니다.', 'error')
+            return redirect(url_for('view_post', post_id=comment['post_id']))
+
+        cursor.execute('DELETE FROM comments WHERE id = %s', (comment_id,))
+
     post_id = comment['post_id']
-    
-    cursor.execute('DELETE FROM comments WHERE id = %s', (comment_id,))
+    invalidate_pages(cursor, f'post:{post_id}')
     
     conn.commit()
     cursor.close()
-    conn.close()
     
     flash('댓글이 삭제되었습니다.', 'success')
     return redirect(url_for('view_post', post_id=post_id))
@@ -1086,6 +2249,10 @@ def admin_backup():
     
     if admin_password != ADMIN_PASSWORD:
         return "Unauthorized", 401
+
+    # ⭐ 대용량: ?format=ndjson → 스트리밍 (메모리 일정, 이어받기 가능)
+    if request.args.get('format') == 'ndjson':
+        return stream_backup()
     
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -1105,7 +2272,6 @@ def admin_backup():
             comment['created_at'] = comment['created_at'].isoformat()
     
     cursor.close()
-    conn.close()
     
     backup_data = {
         'backup_date': datetime.now().isoformat(),
@@ -1118,6 +2284,100 @@ def admin_backup():
     
     return jsonify(backup_data)
 
+BACKUP_ITERSIZE = int(os.environ.get('BACKUP_ITERSIZE', 2000))
+
+def stream_backup():
+    """NDJSON(+gzip) 백업 스트림
+
+    ?table=comments&after_id=1234 : 그 테이블의 id 1234 다음부터 이어받기
+    ?gzip=0                        : 압축하지 않은 NDJSON
+    """
+    start_table = request.args.get('table')
+    if start_table is not None and start_table not in BACKUP_TABLES:
+        return jsonify({'error': f'table은 {", ".join(BACKUP_TABLES)} 중 하나여야 합니다.'}), 400
+    after_id = request.args.get('after_id', 0, type=int)
+    compress = request.args.get('gzip', '1') != '0'
+
+    def generate():
+        # 요청이 끝난 뒤에도 이어지는 스트림 → 요청용 풀 커넥션 대신 전용 커넥션 (풀 자리를 오래 잡지 않음)
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            yield from ndjson_lines(conn, BACKUP_TABLES, start_table, after_id, BACKUP_ITERSIZE)
+        except Exception as e:
+            # 상태 코드는 이미 나갔으므로 오류 줄을 남기고 종료 (done 줄이 없으면 불완전한 백업)
+            print(f"❌ 백업 스트림 오류: {type(e).__name__}: {str(e)}")
+            yield json.dumps({'type': 'error', 'error': f'{type(e).__name__}: {str(e)}'},
+                             ensure_ascii=False).encode('utf-8') + b'\n'
+        finally:
+            conn.close()
+
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    suffix = f'-{start_table}-after-{after_id}' if start_table else ''
+    if compress:
+        body = gzip_stream(generate())
+        mimetype = 'application/gzip'
+        filename = f'backup-{stamp}{suffix}.ndjson.gz'
+    else:
+        body = generate()
+        mimetype = 'application/x-ndjson'
+        filename = f'backup-{stamp}{suffix}.ndjson'
+
+    response = Response(body, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/admin/stats')
+def admin_stats():
+    password = request.args.get('password')
+    if password != ADMIN_PASSWORD:
+        return "Unauthorized", 401
+
+    return jsonify({
+        'db_pool': db_pool.stats(),
+        'sanitize_cache': sanitize_cache.stats(),
+        'background_jobs': background_jobs.stats(),
+        'email_outbox': outbox_status(get_db_connection()),
+        'outbound_http': outbound.stats(),
+        'page_cache': page_cache.stats(),
+        'comment_events': comment_events.stats(),
+        'password_hashing': password_hasher.stats(),
+        'rate_limit': rate_limiter.stats(),
+    })
+
+@app.route('/admin/sql-profile')
+def admin_sql_profile():
+    """SQL 프로파일: 지문별 누적, 엔드포인트별 쿼리 수/N+1, 최근 요청, 수집된 실행 계획
+
+    ?request=<id>: 특정 요청 하나의 요약 (X-SQL-Profile 헤더의 id)
+    """
+    password = request.args.get('password')
+    if password != ADMIN_PASSWORD:
+        return "Unauthorized", 401
+
+    request_id = request.args.get('request', type=int)
+    if request_id is not None:
+        summary = sql_profiler.report(request_id=request_id)
+        if summary is None:
+            return jsonify({'error': '최근 요청 목록에 없습니다.'}), 404
+        return jsonify(summary)
+    return jsonify(sql_profiler.report(top=request.args.get('top', 20, type=int)))
+
+@app.route('/admin/server-timing')
+def admin_server_timing():
+    """이 브라우저 세션에 Server-Timing 헤더 켜기/끄기 (?enable=0 이면 끄기)"""
+    password = request.args.get('password')
+    if password != ADMIN_PASSWORD:
+        return "Unauthorized", 401
+
+    enabled = request.args.get('enable', '1') != '0'
+    if enabled:
+        session['server_timing'] = True
+    else:
+        session.pop('server_timing', None)
+    return jsonify({'server_timing': enabled, 'mode': SERVER_TIMING})
+
 @app.route('/admin/user-activity')
 def admin_user_activity():
     password = request.args.get('password')
@@ -1141,7 +2401,6 @@ def admin_user_activity():
     users = [dict(row) for row in cursor.fetchall()]
     
     cursor.close()
-    conn.close()
     
     html = '<h1>사용자 활동 현황</h1><table border="1"><tr><th>ID</th><th>아이디</th><th>이메일</th><th>게시글</th><th>댓글</th><th>가입일</th></tr>'
     for user in users:
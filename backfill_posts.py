@@ -0,0 +1,133 @@
+"""
+게시글 파생 컬럼 일괄 채우기 (배치 작업)
+
+실행 방법:
+    python backfill_posts.py summaries           # thumbnail_url / excerpt 미처리 글만
+    python backfill_posts.py summaries --all     # 전체 다시 계산
+    python backfill_posts.py summaries --batch-size 500
+    python backfill_posts.py sanitize            # 구버전 정책으로 정리된 본문 다시 정리
+"""
+
+from dotenv import load_dotenv
+import argparse
+import os
+import sys
+import psycopg2
+from psycopg2.extras import execute_values
+
+from content_processing import build_post_summary, sanitize_html, SANITIZER_POLICY_VERSION
+
+load_dotenv()
+
+
+def backfill_summaries(conn, batch_size=200, recompute_all=False):
+    """posts.thumbnail_url / excerpt 채우기 (id 순 키셋 배치, 배치마다 커밋)"""
+    cursor = conn.cursor()
+    last_id = 0
+    total = 0
+
+    while True:
+        cursor.execute(f'''
+            SELECT id, content, cloudinary_url
+            FROM posts
+            WHERE id > %s {'' if recompute_all else 'AND excerpt IS NULL'}
+            ORDER BY id
+            LIMIT %s
+        ''', (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        values = []
+        for post_id, content, cloudinary_url in rows:
+            thumbnail_url, excerpt = build_post_summary(content, cloudinary_url)
+            values.append((post_id, thumbnail_url, excerpt))
+
+        execute_values(cursor, '''
+            UPDATE posts p
+            SET thumbnail_url = v.thumbnail_url, excerpt = v.excerpt
+            FROM (VALUES %s) AS v (id, thumbnail_url, excerpt)
+            WHERE p.id = v.id
+        ''', values)
+        conn.commit()
+
+        last_id = rows[-1][0]
+        total += len(rows)
+        print(f"   - {total}개 처리 (마지막 id: {last_id})")
+
+    cursor.close()
+    return total
+
+
+def resanitize_posts(conn, batch_size=100, should_stop=None):
+    """content_sanitized를 현재 SANITIZER_POLICY_VERSION으로 다시 정리
+
+    sanitizer_version이 다른(또는 NULL인) 글만 id 순서로 처리하고 배치마다 커밋.
+    should_stop: 배치 사이에 호출되어 True면 중단 (앱 종료 시)
+    """
+    cursor = conn.cursor()
+    last_id = 0
+    total = 0
+
+    while not (should_stop and should_stop()):
+        cursor.execute('''
+            SELECT id, content
+            FROM posts
+            WHERE id > %s AND sanitizer_version IS DISTINCT FROM %s
+            ORDER BY id
+            LIMIT %s
+        ''', (last_id, SANITIZER_POLICY_VERSION, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        values = [
+            (post_id, sanitize_html(content), SANITIZER_POLICY_VERSION)
+            for post_id, content in rows
+        ]
+
+        # 정리하는 동안 글이 수정됐으면(이미 최신 버전) 덮어쓰지 않음
+        # version 증가 → 게시글 보기 ETag가 바뀌어 브라우저/페이지 캐시가 새로 정리된 HTML을 받음
+        execute_values(cursor, '''
+            UPDATE posts p
+            SET content_sanitized = v.content_sanitized, sanitizer_version = v.version, version = p.version + 1
+            FROM (VALUES %s) AS v (id, content_sanitized, version)
+            WHERE p.id = v.id AND p.sanitizer_version IS DISTINCT FROM v.version
+        ''', values)
+        conn.commit()
+
+        last_id = rows[-1][0]
+        total += len(rows)
+
+    conn.commit()
+    cursor.close()
+    return total
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='게시글 파생 컬럼 일괄 채우기')
+    parser.add_argument('job', choices=['summaries', 'sanitize'], help='summaries: 썸네일/요약, sanitize: 본문 HTML 정리')
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--all', action='store_true', help='이미 처리된 글도 다시 계산')
+    args = parser.parse_args()
+
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if not DATABASE_URL:
+        print("❌ DATABASE_URL이 설정되지 않았습니다!")
+        sys.exit(1)
+
+    if DATABASE_URL.startswith("postgres://"):
+        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        if args.job == 'summaries':
+            print("🔄 썸네일/요약 채우는 중...")
+            count = backfill_summaries(conn, batch_size=args.batch_size, recompute_all=args.all)
+            print(f"✅ 완료: {count}개 게시글")
+        elif args.job == 'sanitize':
+            print(f"🔄 본문 HTML 다시 정리 중... (정책 버전 {SANITIZER_POLICY_VERSION})")
+            count = resanitize_posts(conn, batch_size=args.batch_size)
+            print(f"✅ 완료: {count}개 게시글")
+    finally:
+        conn.close()
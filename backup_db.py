@@ -1,6 +1,41 @@
+"""
+데이터베이스 백업/복원 도구
+
+PostgreSQL: 테이블마다 COPY ... TO STDOUT → gzip/zstd 파일로 바로 스트리밍 (메모리/왕복 없이 디스크 속도)
+    backup_<시각>/
+        manifest.json          # 종류(full/delta), 기준 백업, 기준 시각, 테이블/컬럼/행 수/SHA-256
+        users.copy.gz
+        posts.copy.gz
+        ...
+        tombstones.copy.gz     # 증분 백업만: 이전 백업 이후 삭제된 행 (테이블, 기본 키)
+
+    전체 백업(full)  : 모든 행
+    증분 백업(delta) : 이전 백업의 기준 시각(high_water) 이후 updated_at이 바뀐 행 + 삭제 기록
+                       (updated_at/삭제 기록 트리거는 마이그레이션 10)
+                       기준 시각에서 BACKUP_DELTA_OVERLAP초 앞부터 다시 담음
+                       → 백업 시점에 아직 커밋 전이던 긴 트랜잭션의 변경도 빠지지 않음 (중복은 복원 때 덮어씀)
+    예: 매시간 backup --incremental, 하루 한 번 backup (전체)
+
+    복원: 마지막 백업 → base를 따라 전체 백업까지 체인 확인(체크섬) →
+          테이블마다 병렬로 스테이징 테이블에 전체 + 증분을 차례로 적용 →
+          한 트랜잭션에서 실제 테이블 TRUNCATE → 스테이징에서 INSERT → 시퀀스 재설정
+          (사용자 트리거는 교체 동안 끔 → 댓글 수 등 백업된 값을 그대로 유지, 실패하면 기존 데이터 그대로)
+
+SQLite(로컬 개발) 또는 --json: 예전 JSON 형식 (게시글/댓글만)
+
+사용법:
+    python backup_db.py backup [--incremental] [--base=백업] [--zstd] [--out=디렉터리]
+    python backup_db.py restore <백업 디렉터리 | backup_*.json> [--yes] [--jobs=4]
+    python backup_db.py verify <백업 디렉터리>
+    python backup_db.py list
+"""
+
 import os
 import json
-from datetime import datetime
+import gzip
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 
 # 환경 감지
 DATABASE_URL = os.environ.get('DATABASE_URL')
@@ -8,43 +43,407 @@ USE_POSTGRES = DATABASE_URL is not None
 
 if USE_POSTGRES:
     import psycopg2
+    from psycopg2 import sql
     from psycopg2.extras import RealDictCursor
-    
+
     if DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
-    
+
     def get_db_connection():
         return psycopg2.connect(DATABASE_URL)
 else:
     import sqlite3
-    
+
     def get_db_connection():
         conn = sqlite3.connect('board.db')
         conn.row_factory = sqlite3.Row
         return conn
 
-def backup_database():
-    """데이터베이스를 JSON 파일로 백업"""
-    
+BACKUP_FORMAT_VERSION = 2
+
+# 백업하지 않는 테이블: 마이그레이션 기록(복원 대상 DB가 직접 관리), 빈도 제한 버킷(일시 데이터),
+# 증분 백업용 삭제 기록/체인 id (복원하면 새로 시작)
+EXCLUDED_TABLES = {'schema_migrations', 'rate_limits', 'backup_tombstones', 'backup_state'}
+
+# 증분 백업이 이전 기준 시각보다 몇 초 앞부터 다시 담을지 (이보다 긴 트랜잭션의 변경은 놓칠 수 있음)
+DELTA_OVERLAP = int(os.environ.get('BACKUP_DELTA_OVERLAP', 300))
+# 삭제 기록 보관 기간: 이보다 오래된 백업에는 증분을 이어 붙이지 않음 (전체 백업으로 전환)
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('BACKUP_TOMBSTONE_RETENTION_DAYS', 35))
+# 복원 시 동시에 준비할 테이블 수 (테이블마다 DB 커넥션 1개)
+RESTORE_JOBS = int(os.environ.get('BACKUP_RESTORE_JOBS', 4))
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+COMPRESSIONS = {
+    'gzip': '.copy.gz',
+    'zstd': '.copy.zst',
+}
+
+TOMBSTONES_NAME = 'tombstones'
+STAGING_PREFIX = '_restore_'
+
+
+class BackupError(Exception):
+    """백업/복원을 진행할 수 없음 (메시지를 그대로 출력하고 종료)"""
+
+
+# ==================== 압축 파일 열기 ====================
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise BackupError("zstd 압축에는 zstandard 패키지가 필요합니다: pip install zstandard")
+    return zstandard
+
+
+def open_compressed(path, mode, compression):
+    """mode: 'wb' / 'rb' → 파일 객체 (COPY가 바로 읽고 씀)"""
+    if compression == 'gzip':
+        # 속도 우선 (백업 시간이 디스크 속도에 맞도록)
+        return gzip.open(path, mode, compresslevel=6)
+    zstandard = _zstandard()
+    raw = open(path, mode)
+    if mode == 'wb':
+        return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(raw, closefd=True)
+    return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ==================== 테이블 정보 ====================
+
+def list_tables(cursor):
+    """백업할 테이블 → 외래 키 순서 (참조되는 테이블이 먼저)"""
+    cursor.execute('''
+        SELECT c.relname
+        FROM pg_class c
+        WHERE c.relnamespace = current_schema()::regnamespace
+          AND c.relkind IN ('r', 'p')
+          AND c.relpersistence = 'p'
+          AND NOT c.relispartition
+          AND c.relname NOT LIKE %s
+        ORDER BY c.relname
+    ''', (STAGING_PREFIX.replace('_', r'\_') + '%',))
+    tables = [row[0] for row in cursor.fetchall() if row[0] not in EXCLUDED_TABLES]
+
+    cursor.execute('''
+        SELECT src.relname, dst.relname
+        FROM pg_constraint con
+        JOIN pg_class src ON src.oid = con.conrelid
+        JOIN pg_class dst ON dst.oid = con.confrelid
+        WHERE con.contype = 'f' AND src.relnamespace = current_schema()::regnamespace
+    ''')
+    depends = {table: set() for table in tables}
+    for src, dst in cursor.fetchall():
+        if src in depends and dst in depends and src != dst:
+            depends[src].add(dst)
+
+    ordered = []
+    while depends:
+        ready = sorted(table for table, deps in depends.items() if not deps - set(ordered))
+        if not ready:
+            # 순환 참조 → 남은 것은 이름 순 (복원은 한 트랜잭션이라 결과는 같음)
+            ready = sorted(depends)
+        for table in ready:
+            ordered.append(table)
+            del depends[table]
+    return ordered
+
+
+def table_columns(cursor, table):
+    cursor.execute('''
+        SELECT attname
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+          AND attgenerated = ''
+        ORDER BY attnum
+    ''', (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def primary_key(cursor, table):
+    """단일 컬럼 기본 키 이름 (없거나 복합 키면 None → 증분 대상 아님)"""
+    cursor.execute('''
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = %s::regclass AND i.indisprimary
+    ''', (table,))
+    rows = cursor.fetchall()
+    return rows[0][0] if len(rows) == 1 else None
+
+
+def tracked_tables(cursor):
+    """삭제 기록 트리거가 걸린 테이블 (마이그레이션 10) → 증분 백업 가능"""
+    cursor.execute("SELECT to_regproc('backup_tombstones_trg') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return set()
+    cursor.execute('''
+        SELECT DISTINCT c.relname
+        FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        WHERE t.tgfoid = 'backup_tombstones_trg'::regproc
+    ''')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def schema_version(cursor):
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return None
+    cursor.execute('SELECT MAX(version) FROM schema_migrations')
+    return cursor.fetchone()[0]
+
+
+def database_id(cursor):
+    """백업 체인 id (복원할 때마다 바뀜, 마이그레이션 10 이전이면 None)"""
+    cursor.execute("SELECT to_regclass('backup_state') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return None
+    cursor.execute('SELECT database_id FROM backup_state')
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+# ==================== 매니페스트 ====================
+
+def read_manifest(backup_dir):
+    try:
+        with open(os.path.join(backup_dir, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise BackupError(f"매니페스트를 읽을 수 없습니다 ({backup_dir}): {e}")
+    if manifest.get('format') != 'copy' or manifest.get('format_version', 0) > BACKUP_FORMAT_VERSION:
+        raise BackupError(f"지원하지 않는 백업 형식입니다: {manifest.get('format')} v{manifest.get('format_version')}")
+    # 형식 1 (증분 이전) 백업은 체크섬 없는 전체 백업
+    manifest.setdefault('kind', 'full')
+    manifest.setdefault('id', os.path.basename(os.path.normpath(backup_dir)))
+    manifest.setdefault('base', None)
+    manifest.setdefault('database_id', None)
+    manifest.setdefault('tombstones', None)
+    return manifest
+
+
+def find_backups(directory='.'):
+    """directory 안의 COPY 백업 디렉터리 → [(경로, manifest)] 오래된 순"""
+    backups = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.startswith('backup_') and os.path.isfile(os.path.join(path, 'manifest.json')):
+            try:
+                backups.append((path, read_manifest(path)))
+            except BackupError:
+                continue
+    return backups
+
+
+def load_chain(backup_dir):
+    """마지막 백업부터 base를 따라 전체 백업까지 → [(경로, manifest)] (전체, 증분1, 증분2, ...)"""
+    parent = os.path.dirname(os.path.abspath(backup_dir))
+    chain = []
+    path = backup_dir
+    while True:
+        manifest = read_manifest(path)
+        chain.append((path, manifest))
+        if manifest['kind'] == 'full':
+            break
+        path = os.path.join(parent, manifest['base'])
+        if not os.path.isdir(path):
+            raise BackupError(f"{manifest['id']}의 기준 백업 {manifest['base']}이(가) {parent}에 없습니다.")
+    chain.reverse()
+
+    full = chain[0][1]
+    columns = {entry['name']: entry['columns'] for entry in full['tables']}
+    for (_, previous), (_, manifest) in zip(chain, chain[1:]):
+        if manifest['base'] != previous['id'] or manifest['database_id'] != previous['database_id']:
+            raise BackupError(f"{manifest['id']}이(가) {previous['id']}에 이어지지 않습니다.")
+        if manifest['schema_version'] != full['schema_version']:
+            raise BackupError(f"{manifest['id']}의 스키마 버전이 전체 백업과 다릅니다.")
+        if {entry['name']: entry['columns'] for entry in manifest['tables']} != columns:
+            raise BackupError(f"{manifest['id']}의 테이블/컬럼 구성이 전체 백업과 다릅니다.")
+    return chain
+
+
+def verify_chain(chain):
+    """모든 파일의 존재/SHA-256 확인 (DB를 건드리기 전에)"""
+    for path, manifest in chain:
+        entries = list(manifest['tables'])
+        if manifest['tombstones']:
+            entries.append(manifest['tombstones'])
+        for entry in entries:
+            file_path = os.path.join(path, entry['file'])
+            if not os.path.isfile(file_path):
+                raise BackupError(f"파일이 없습니다: {file_path}")
+            if entry.get('sha256') and file_sha256(file_path) != entry['sha256']:
+                raise BackupError(f"체크섬 불일치 (손상된 파일): {file_path}")
+
+
+# ==================== 백업 ====================
+
+def _copy_out(cursor, query, path, compression):
+    """COPY (...) TO STDOUT → 압축 파일 → (행 수, 크기, SHA-256)"""
+    with open_compressed(path, 'wb', compression) as f:
+        cursor.copy_expert(query.as_string(cursor.connection), f, size=COPY_BUFFER_SIZE)
+    rows = cursor.rowcount
+    return rows, os.path.getsize(path), file_sha256(path)
+
+
+def choose_base(cursor, current_id, base_path, search_dir):
+    """증분 백업의 기준 백업 → (경로, manifest), 이어 붙일 수 없으면 이유를 출력하고 None"""
+    if current_id is None:
+        print("ℹ️  증분 추적 테이블이 없습니다 (마이그레이션 10 이전) → 전체 백업")
+        return None
+
+    if base_path:
+        base = (base_path, read_manifest(base_path))
+    else:
+        backups = find_backups(search_dir)
+        if not backups:
+            print("ℹ️  이전 백업이 없습니다 → 전체 백업")
+            return None
+        base = backups[-1]
+
+    manifest = base[1]
+    if manifest['database_id'] != current_id:
+        print(f"ℹ️  {manifest['id']} 이후 복원되었거나 다른 DB의 백업입니다 → 전체 백업")
+        return None
+    if manifest['schema_version'] != schema_version(cursor):
+        print(f"ℹ️  {manifest['id']} 이후 스키마가 바뀌었습니다 → 전체 백업")
+        return None
+    cursor.execute('SELECT LOCALTIMESTAMP')
+    if datetime.fromisoformat(manifest['high_water']) < cursor.fetchone()[0] - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        print(f"ℹ️  {manifest['id']}이(가) 삭제 기록 보관 기간({TOMBSTONE_RETENTION_DAYS}일)보다 오래되었습니다 → 전체 백업")
+        return None
+    return base
+
+
+def backup_database(compression='gzip', out_dir=None, incremental=False, base_path=None):
+    """테이블마다 COPY TO STDOUT → 압축 파일 (한 스냅샷), incremental이면 이전 백업 이후 변경분만"""
+    if compression == 'zstd':
+        _zstandard()
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_dir = out_dir or f'backup_{timestamp}'
+    search_dir = os.path.dirname(os.path.abspath(backup_dir))
+
+    conn = get_db_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+
+    current_id = database_id(cursor)
+    if current_id is not None:
+        # 보관 기간이 지난 삭제 기록 정리 (그보다 오래된 백업에는 증분을 만들지 않음)
+        cursor.execute("DELETE FROM backup_tombstones WHERE deleted_at < LOCALTIMESTAMP - %s * INTERVAL '1 day'",
+                       (TOMBSTONE_RETENTION_DAYS,))
+    base = choose_base(cursor, current_id, base_path, search_dir) if incremental else None
+    base_manifest = base[1] if base else None
+
+    # 모든 테이블을 같은 시점으로 (게시글과 댓글이 서로 맞도록)
+    conn.autocommit = False
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+    cursor.execute('SELECT LOCALTIMESTAMP')   # 첫 쿼리에서 스냅샷 고정 → 이 시각이 다음 증분의 기준
+    high_water = cursor.fetchone()[0]
+    since = None
+    if base_manifest:
+        since = datetime.fromisoformat(base_manifest['high_water']) - timedelta(seconds=DELTA_OVERLAP)
+
+    kind = 'delta' if base_manifest else 'full'
+    os.makedirs(backup_dir, exist_ok=False)
+    print(f"🔄 {'증분' if base_manifest else '전체'} 백업 시작... ({backup_dir}, {compression}"
+          + (f", 기준 {base_manifest['id']}" if base_manifest else '') + ")")
+
+    manifest = {
+        'format': 'copy',
+        'format_version': BACKUP_FORMAT_VERSION,
+        'kind': kind,
+        'id': os.path.basename(os.path.normpath(backup_dir)),
+        'base': base_manifest['id'] if base_manifest else None,
+        'database_id': current_id,
+        'backup_date': timestamp,
+        'database_type': 'PostgreSQL',
+        'high_water': high_water.isoformat(),
+        'since': since.isoformat() if since else None,
+        'schema_version': schema_version(cursor),
+        'compression': compression,
+        'tables': [],
+        'tombstones': None,
+    }
+
+    started = datetime.now()
+    tracked = tracked_tables(cursor)
+    base_tables = {entry['name'] for entry in base_manifest['tables']} if base_manifest else set()
+    for table in list_tables(cursor):
+        columns = table_columns(cursor, table)
+        key = primary_key(cursor, table)
+        # 증분: updated_at + 삭제 기록이 있는 테이블만, 나머지는 매번 전체
+        mode = 'delta' if (table in base_tables and table in tracked and key and 'updated_at' in columns) else 'full'
+
+        where = sql.SQL('')
+        if mode == 'delta':
+            where = sql.SQL(' WHERE updated_at > {}').format(sql.Literal(since))
+        order = sql.SQL(' ORDER BY {}').format(sql.Identifier(key)) if key else sql.SQL('')
+        query = sql.SQL('COPY (SELECT {} FROM {}{}{}) TO STDOUT').format(
+            sql.SQL(', ').join(map(sql.Identifier, columns)), sql.Identifier(table), where, order)
+
+        filename = table + COMPRESSIONS[compression]
+        rows, size, digest = _copy_out(cursor, query, os.path.join(backup_dir, filename), compression)
+        manifest['tables'].append({
+            'name': table, 'file': filename, 'columns': columns, 'key': key, 'mode': mode,
+            'rows': rows, 'bytes': size, 'sha256': digest,
+        })
+        print(f"   - {table}: {rows}행{' (변경분)' if mode == 'delta' else ''} ({size / 1024:.1f}KB)")
+
+    if base_manifest:
+        filename = TOMBSTONES_NAME + COMPRESSIONS[compression]
+        query = sql.SQL('COPY (SELECT table_name, row_key FROM backup_tombstones '
+                        'WHERE deleted_at > {} ORDER BY id) TO STDOUT').format(sql.Literal(since))
+        rows, size, digest = _copy_out(cursor, query, os.path.join(backup_dir, filename), compression)
+        manifest['tombstones'] = {'file': filename, 'rows': rows, 'bytes': size, 'sha256': digest}
+        print(f"   - 삭제 기록: {rows}건")
+
+    conn.rollback()
+    cursor.close()
+    conn.close()
+
+    # 매니페스트는 마지막에 기록 → 중간에 실패한 디렉터리는 백업 목록/체인에 나타나지 않음
+    with open(os.path.join(backup_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"✅ 백업 완료! ({elapsed:.1f}초)")
+    print(f"   디렉터리: {backup_dir}")
+    return backup_dir
+
+
+def backup_database_json():
+    """데이터베이스를 JSON 파일로 백업 (SQLite / 예전 형식)"""
+
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     backup_file = f'backup_{timestamp}.json'
-    
+
     print(f"🔄 백업 시작... ({backup_file})")
-    
+
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor) if USE_POSTGRES else conn.cursor()
-    
+
     # 게시글 백업
     cursor.execute('SELECT * FROM posts ORDER BY id')
     posts = [dict(row) for row in cursor.fetchall()]
-    
+
     # 댓글 백업
     cursor.execute('SELECT * FROM comments ORDER BY id')
     comments = [dict(row) for row in cursor.fetchall()]
-    
+
     cursor.close()
     conn.close()
-    
+
     # JSON으로 저장
     backup_data = {
         'backup_date': timestamp,
@@ -54,93 +453,288 @@ def backup_database():
         'posts': posts,
         'comments': comments
     }
-    
+
     with open(backup_file, 'w', encoding='utf-8') as f:
         json.dump(backup_data, f, ensure_ascii=False, indent=2, default=str)
-    
+
     print(f"✅ 백업 완료!")
     print(f"   파일: {backup_file}")
     print(f"   게시글: {len(posts)}개")
     print(f"   댓글: {len(comments)}개")
-    
+
     return backup_file
 
-def restore_database(backup_file):
-    """JSON 백업 파일에서 데이터베이스 복원"""
-    
+
+# ==================== 복원 ====================
+
+def reset_sequences(cursor, table, columns):
+    """serial/identity 컬럼의 시퀀스를 복원된 최댓값으로 맞춤 (다음 INSERT가 id 충돌하지 않도록)"""
+    for column in columns:
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', (table, column))
+        sequence = cursor.fetchone()[0]
+        if sequence is None:
+            continue
+        cursor.execute(
+            sql.SQL('SELECT setval(%s, COALESCE(MAX({col}), 1), MAX({col}) IS NOT NULL) FROM {table}').format(
+                col=sql.Identifier(column), table=sql.Identifier(table)),
+            (sequence,)
+        )
+
+
+def _copy_in(cursor, table, columns, path, compression):
+    query = sql.SQL('COPY {} ({}) FROM STDIN').format(
+        sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, columns)))
+    with open_compressed(path, 'rb', compression) as f:
+        cursor.copy_expert(query.as_string(cursor.connection), f, size=COPY_BUFFER_SIZE)
+    return cursor.rowcount
+
+
+def stage_table(table, chain):
+    """한 테이블의 전체 + 증분을 스테이징 테이블(_restore_<테이블>)에 차례로 적용 (전용 커넥션) → 최종 행 수"""
+    entries = [(path, manifest, next(e for e in manifest['tables'] if e['name'] == table))
+               for path, manifest in chain]
+    columns = entries[0][2]['columns']
+    key = entries[0][2].get('key') if len(chain) > 1 else None
+    staging = STAGING_PREFIX + table
+    column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # 제약/트리거/기본값 없는 UNLOGGED 복사본 (WAL 없이 빠르게 적재)
+        cursor.execute(sql.SQL('DROP TABLE IF EXISTS {}').format(sql.Identifier(staging)))
+        cursor.execute(sql.SQL('CREATE UNLOGGED TABLE {} AS SELECT {} FROM {} WITH NO DATA').format(
+            sql.Identifier(staging), column_list, sql.Identifier(table)))
+
+        for path, manifest, entry in entries:
+            if entry['mode'] == 'full':
+                cursor.execute(sql.SQL('TRUNCATE {}').format(sql.Identifier(staging)))
+                rows = _copy_in(cursor, staging, columns, os.path.join(path, entry['file']), manifest['compression'])
+                if key:
+                    cursor.execute(sql.SQL('CREATE INDEX IF NOT EXISTS {} ON {} ({})').format(
+                        sql.Identifier(staging + '_key'), sql.Identifier(staging), sql.Identifier(key)))
+            else:
+                # 1) 삭제 기록 적용 2) 바뀐 행은 지우고 다시 넣음 (같은 스냅샷에서 삭제 후 재생성된 키도 올바름)
+                if manifest['tombstones']:
+                    cursor.execute('CREATE TEMP TABLE IF NOT EXISTS _restore_tombstones (table_name TEXT, row_key TEXT)')
+                    cursor.execute('TRUNCATE _restore_tombstones')
+                    _copy_in(cursor, '_restore_tombstones', ['table_name', 'row_key'],
+                             os.path.join(path, manifest['tombstones']['file']), manifest['compression'])
+                    cursor.execute(sql.SQL(
+                        'DELETE FROM {staging} WHERE {key}::text IN '
+                        '(SELECT row_key FROM _restore_tombstones WHERE table_name = %s)'
+                    ).format(staging=sql.Identifier(staging), key=sql.Identifier(key)), (table,))
+
+                cursor.execute('DROP TABLE IF EXISTS _restore_delta')
+                cursor.execute(sql.SQL('CREATE TEMP TABLE _restore_delta AS SELECT {} FROM {} WITH NO DATA').format(
+                    column_list, sql.Identifier(staging)))
+                rows = _copy_in(cursor, '_restore_delta', columns, os.path.join(path, entry['file']),
+                                manifest['compression'])
+                cursor.execute(sql.SQL('DELETE FROM {staging} s USING _restore_delta d WHERE s.{key} = d.{key}').format(
+                    staging=sql.Identifier(staging), key=sql.Identifier(key)))
+                cursor.execute(sql.SQL('INSERT INTO {} ({}) SELECT {} FROM _restore_delta').format(
+                    sql.Identifier(staging), column_list, column_list))
+
+            if rows != entry['rows']:
+                raise BackupError(f"{manifest['id']}/{entry['file']}: 매니페스트 {entry['rows']}행 ≠ 읽은 행 {rows}행")
+
+        cursor.execute(sql.SQL('SELECT COUNT(*) FROM {}').format(sql.Identifier(staging)))
+        total = cursor.fetchone()[0]
+        conn.commit()
+        return total
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def drop_staging(tables):
+    conn = get_db_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    for table in tables:
+        cursor.execute(sql.SQL('DROP TABLE IF EXISTS {}').format(sql.Identifier(STAGING_PREFIX + table)))
+    cursor.close()
+    conn.close()
+
+
+def restore_backup(backup_dir, assume_yes=False, jobs=RESTORE_JOBS):
+    """COPY 백업(전체 + 증분 체인) 복원: 테이블별 병렬 준비 → 한 트랜잭션으로 교체"""
+    from schema_migrations import run_migrations
+
+    chain = load_chain(backup_dir)
+    full, last = chain[0][1], chain[-1][1]
+    print(f"🔄 복원 시작... ({full['id']} + 증분 {len(chain) - 1}개, 시점 {last['high_water']})")
+
+    print("🔍 체크섬 확인...")
+    verify_chain(chain)
+
+    conn = get_db_connection()
+    # 복원 대상 DB의 스키마를 먼저 최신으로 (테이블/컬럼이 없으면 COPY 불가)
+    run_migrations(conn, verbose=False)
+    cursor = conn.cursor()
+
+    current_version = schema_version(cursor)
+    if full.get('schema_version') and current_version and full['schema_version'] > current_version:
+        raise BackupError(f"백업의 스키마 버전({full['schema_version']})이 "
+                          f"이 코드({current_version})보다 최신입니다. 코드를 먼저 업데이트하세요.")
+
+    tables = full['tables']
+    for entry in tables:
+        target_columns = set(table_columns(cursor, entry['name']))
+        missing = [c for c in entry['columns'] if c not in target_columns]
+        if missing:
+            raise BackupError(f"{entry['name']} 테이블에 없는 컬럼: {', '.join(missing)}")
+    conn.rollback()
+
+    if not assume_yes:
+        confirm = input("⚠️  기존 데이터를 모두 삭제하고 복원하시겠습니까? (yes/no): ")
+        if confirm.lower() != 'yes':
+            print("❌ 복원 취소")
+            return
+
+    started = datetime.now()
+    names = [entry['name'] for entry in tables]
+    try:
+        # 1) 테이블마다 스테이징 준비 (서로 독립 → 병렬, 실제 테이블은 아직 그대로)
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {pool.submit(stage_table, name, chain): name for name in names}
+            for future in as_completed(futures):
+                print(f"   - {futures[future]}: {future.result()}행 준비")
+
+        # 2) 교체: 한 트랜잭션 (실패하면 기존 데이터 그대로)
+        identifiers = [sql.Identifier(name) for name in names]
+        cursor.execute(sql.SQL('TRUNCATE {}').format(sql.SQL(', ').join(identifiers)))
+
+        # 댓글 수/버전/updated_at 갱신 같은 사용자 트리거는 끔 → 백업된 값을 그대로 복원
+        # (외래 키 검사는 그대로, 테이블은 참조되는 쪽부터 복원)
+        for identifier in identifiers:
+            cursor.execute(sql.SQL('ALTER TABLE {} DISABLE TRIGGER USER').format(identifier))
+
+        for entry in tables:
+            column_list = sql.SQL(', ').join(map(sql.Identifier, entry['columns']))
+            cursor.execute(sql.SQL('INSERT INTO {} ({}) SELECT {} FROM {}').format(
+                sql.Identifier(entry['name']), column_list, column_list,
+                sql.Identifier(STAGING_PREFIX + entry['name'])))
+            reset_sequences(cursor, entry['name'], entry['columns'])
+
+        for identifier in identifiers:
+            cursor.execute(sql.SQL('ALTER TABLE {} ENABLE TRIGGER USER').format(identifier))
+
+        # 복원 이전의 삭제 기록/백업 체인은 더 이상 이 데이터와 맞지 않음 → 다음 증분은 전체 백업부터
+        if database_id(cursor) is not None:
+            cursor.execute('TRUNCATE backup_tombstones')
+            cursor.execute('''
+                UPDATE backup_state
+                SET database_id = md5(random()::text || clock_timestamp()::text),
+                    restored_at = NOW(), restored_from = %s
+            ''', (last['id'],))
+
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ 복원 실패 (변경 사항 취소됨): {type(e).__name__}: {str(e)}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+        drop_staging(names)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"✅ 복원 완료! ({elapsed:.1f}초)")
+
+
+def restore_database(backup_file, assume_yes=False):
+    """JSON 백업 파일에서 데이터베이스 복원 (예전 형식: 게시글/댓글의 기본 컬럼만)"""
+
     if not os.path.exists(backup_file):
         print(f"❌ 백업 파일을 찾을 수 없습니다: {backup_file}")
         return
-    
+
     print(f"🔄 복원 시작... ({backup_file})")
-    
+
     with open(backup_file, 'r', encoding='utf-8') as f:
         backup_data = json.load(f)
-    
+
     conn = get_db_connection()
     cursor = conn.cursor()
-    
+
     # 기존 데이터 삭제 확인
-    confirm = input("⚠️  기존 데이터를 모두 삭제하고 복원하시겠습니까? (yes/no): ")
-    if confirm.lower() != 'yes':
-        print("❌ 복원 취소")
-        return
-    
+    if not assume_yes:
+        confirm = input("⚠️  기존 데이터를 모두 삭제하고 복원하시겠습니까? (yes/no): ")
+        if confirm.lower() != 'yes':
+            print("❌ 복원 취소")
+            return
+
     # 기존 데이터 삭제
     cursor.execute('DELETE FROM comments')
     cursor.execute('DELETE FROM posts')
-    
+
     # 게시글 복원
     for post in backup_data['posts']:
         if USE_POSTGRES:
             cursor.execute('''
                 INSERT INTO posts (id, board_type, title, author, password, content, filename, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (post['id'], post['board_type'], post['title'], post['author'], 
+            ''', (post['id'], post['board_type'], post['title'], post['author'],
                   post['password'], post['content'], post['filename'], post['created_at']))
         else:
             cursor.execute('''
                 INSERT INTO posts (id, board_type, title, author, password, content, filename, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (post['id'], post['board_type'], post['title'], post['author'], 
+            ''', (post['id'], post['board_type'], post['title'], post['author'],
                   post['password'], post['content'], post['filename'], post['created_at']))
-    
+
     # 댓글 복원
     for comment in backup_data['comments']:
         if USE_POSTGRES:
             cursor.execute('''
                 INSERT INTO comments (id, post_id, author, password, content, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s)
-            ''', (comment['id'], comment['post_id'], comment['author'], 
+            ''', (comment['id'], comment['post_id'], comment['author'],
                   comment['password'], comment['content'], comment['created_at']))
         else:
             cursor.execute('''
                 INSERT INTO comments (id, post_id, author, password, content, created_at)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (comment['id'], comment['post_id'], comment['author'], 
+            ''', (comment['id'], comment['post_id'], comment['author'],
                   comment['password'], comment['content'], comment['created_at']))
-    
+
     conn.commit()
     cursor.close()
     conn.close()
-    
+
     print(f"✅ 복원 완료!")
     print(f"   게시글: {len(backup_data['posts'])}개")
     print(f"   댓글: {len(backup_data['comments'])}개")
 
 def list_backups():
-    """백업 파일 목록 보기"""
-    backups = [f for f in os.listdir('.') if f.startswith('backup_') and f.endswith('.json')]
-    
+    """백업 목록 보기 (COPY 백업 디렉터리 + JSON 파일)"""
+    backups = [f for f in os.listdir('.') if f.startswith('backup_') and
+               (f.endswith('.json') or os.path.exists(os.path.join(f, 'manifest.json')))]
+
     if not backups:
         print("❌ 백업 파일이 없습니다.")
         return
-    
-    print(f"\n📁 백업 파일 목록 ({len(backups)}개):")
+
+    print(f"\n📁 백업 목록 ({len(backups)}개):")
     print("=" * 60)
-    
+
     for backup in sorted(backups, reverse=True):
         try:
+            if os.path.isdir(backup):
+                manifest = read_manifest(backup)
+                total = sum(entry['bytes'] for entry in manifest['tables'])
+                kind = f"증분 ← {manifest['base']}" if manifest['kind'] == 'delta' else '전체'
+                print(f"🗂️  {backup}/ [{kind}]")
+                print(f"   - 날짜: {manifest['backup_date']} ({manifest['compression']}, {total / 1024:.1f}KB)")
+                print(f"   - " + ", ".join(f"{entry['name']} {entry['rows']}행" for entry in manifest['tables']))
+                if manifest['tombstones']:
+                    print(f"   - 삭제 기록: {manifest['tombstones']['rows']}건")
+                print()
+                continue
             with open(backup, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             print(f"📄 {backup}")
@@ -150,41 +744,67 @@ def list_backups():
             print()
         except:
             print(f"❌ {backup} (손상된 파일)")
-    
+
     print("=" * 60)
 
 if __name__ == "__main__":
     import sys
-    
+
     print("=" * 60)
     print("🗄️  데이터베이스 백업/복원 도구")
     print("=" * 60)
     print()
-    
-    if len(sys.argv) < 2:
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    options = dict(flag[2:].split('=', 1) for flag in flags if '=' in flag)
+
+    if not args:
         print("사용법:")
-        print("  python backup_db.py backup           # 백업")
-        print("  python backup_db.py restore <파일>   # 복원")
-        print("  python backup_db.py list             # 백업 목록")
+        print("  python backup_db.py backup [--zstd]          # 전체 백업 (PostgreSQL: COPY + 압축)")
+        print("  python backup_db.py backup --incremental     # 마지막 백업 이후 변경분만")
+        print("  python backup_db.py backup --json            # 예전 JSON 형식 백업")
+        print("  python backup_db.py restore <백업> [--yes]     # 복원 (디렉터리 또는 .json, 증분은 체인 전체)")
+        print("  python backup_db.py verify <백업>             # 체인/체크섬 확인")
+        print("  python backup_db.py list                     # 백업 목록")
         print()
         print("예시:")
         print("  python backup_db.py backup")
-        print("  python backup_db.py restore backup_20251209_120000.json")
+        print("  python backup_db.py restore backup_20251209_120000")
         sys.exit(1)
-    
-    command = sys.argv[1]
-    
-    if command == 'backup':
-        backup_database()
-    elif command == 'restore':
-        if len(sys.argv) < 3:
-            print("❌ 복원할 백업 파일을 지정하세요.")
-            print("   예: python backup_db.py restore backup_20251209_120000.json")
+
+    command = args[0]
+
+    try:
+        if command == 'backup':
+            if not USE_POSTGRES or '--json' in flags:
+                backup_database_json()
+            else:
+                backup_database('zstd' if '--zstd' in flags else 'gzip', options.get('out'),
+                                incremental='--incremental' in flags, base_path=options.get('base'))
+        elif command in ('restore', 'verify'):
+            if len(args) < 2:
+                print("❌ 백업을 지정하세요.")
+                print(f"   예: python backup_db.py {command} backup_20251209_120000")
+                sys.exit(1)
+            target = args[1].rstrip('/')
+            if command == 'verify':
+                chain = load_chain(target)
+                verify_chain(chain)
+                print(f"✅ 정상: {' → '.join(manifest['id'] for _, manifest in chain)}")
+            elif os.path.isdir(target):
+                if not USE_POSTGRES:
+                    print("❌ COPY 백업은 PostgreSQL(DATABASE_URL)로만 복원할 수 있습니다.")
+                    sys.exit(1)
+                restore_backup(target, assume_yes='--yes' in flags, jobs=int(options.get('jobs', RESTORE_JOBS)))
+            else:
+                restore_database(target, assume_yes='--yes' in flags)
+        elif command == 'list':
+            list_backups()
+        else:
+            print(f"❌ 알 수 없는 명령어: {command}")
+            print("   사용 가능한 명령어: backup, restore, verify, list")
             sys.exit(1)
-        restore_database(sys.argv[2])
-    elif command == 'list':
-        list_backups()
-    else:
-        print(f"❌ 알 수 없는 명령어: {command}")
-        print("   사용 가능한 명령어: backup, restore, list")
+    except BackupError as e:
+        print(f"❌ {e}")
         sys.exit(1)
@@ -0,0 +1,141 @@
+"""
+게시글 본문 처리 유틸리티 (app.py와 배치 스크립트에서 공용)
+
+글 작성/수정 시 한 번만 계산해서 저장하는 값들:
+- thumbnail_url: 본문 첫 이미지 → 첨부 파일 순
+- excerpt: 목록용 짧은 평문 요약
+- content_sanitized: XSS 방어용으로 정리한 본문 HTML (sanitizer_version과 함께 저장)
+"""
+
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+
+import bleach
+
+EXCERPT_LENGTH = 150
+
+_IMG_PATTERN = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']', re.IGNORECASE)
+_SCRIPT_STYLE_PATTERN = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def extract_first_image(html_content):
+    """HTML 콘텐츠에서 첫 번째 이미지 URL 추출"""
+    if not html_content:
+        return None
+
+    match = _IMG_PATTERN.search(html_content)
+    if match:
+        return match.group(1)
+    return None
+
+
+def build_excerpt(html_content, length=EXCERPT_LENGTH):
+    """HTML 본문 → 태그를 제거한 평문 요약 (최대 length자)"""
+    if not html_content:
+        return ''
+
+    text = _SCRIPT_STYLE_PATTERN.sub(' ', html_content)
+    text = _TAG_PATTERN.sub(' ', text)
+    text = html.unescape(text)
+    text = _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+    if len(text) > length:
+        text = text[:length - 1].rstrip() + '…'
+    return text
+
+
+def build_post_summary(content, cloudinary_url=None):
+    """목록 페이지용 (thumbnail_url, excerpt) 계산
+
+    썸네일 우선순위: 본문 첫 이미지 → 첨부 파일
+    """
+    thumbnail_url = extract_first_image(content) or cloudinary_url
+    return thumbnail_url, build_excerpt(content)
+
+
+# ==================== HTML Sanitize (XSS 방어) ====================
+
+# ⭐ 허용 목록(아래 상수)을 바꾸면 반드시 버전을 올릴 것
+#    → 저장된 content_sanitized가 구버전으로 판단되어 백그라운드에서 다시 정리됨
+SANITIZER_POLICY_VERSION = 1
+
+# 허용할 HTML 태그 (서식 유지용)
+ALLOWED_TAGS = [
+    'p', 'br', 'strong', 'b', 'em', 'i', 'u', 'a', 'img',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'ul', 'ol', 'li', 'blockquote', 'code', 'pre',
+    'span', 'div', 'hr'
+]
+
+# 허용할 속성
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title', 'target'],
+    'img': ['src', 'alt', 'width', 'height'],
+    '*': ['class']  # 모든 태그에 class 속성 허용
+}
+
+# Cleaner는 허용 목록/파서 설정을 미리 만들어 두고 재사용
+_cleaner = bleach.Cleaner(tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+_cleaner_lock = threading.Lock()
+
+
+def sanitize_html(html_content):
+    """사용자 입력 HTML을 안전하게 정리 (XSS 방어)"""
+    if not html_content:
+        return ''
+    # bleach.Cleaner 인스턴스는 스레드 안전하지 않음
+    with _cleaner_lock:
+        return _cleaner.clean(html_content)
+
+
+class _SanitizeCache:
+    """본문 해시 → 정리된 HTML (LRU, 저장값이 없는 구버전 글용)"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_sanitize(self, html_content):
+        key = hashlib.sha256(html_content.encode('utf-8')).digest()
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        cleaned = sanitize_html(html_content)
+        with self._lock:
+            self._data[key] = cleaned
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return cleaned
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+sanitize_cache = _SanitizeCache(maxsize=256)
+
+
+def sanitize_html_cached(html_content):
+    """sanitize_html + 본문 해시 기준 메모이제이션"""
+    if not html_content:
+        return ''
+    return sanitize_cache.get_or_sanitize(html_content)
+
+
+def rendered_post_content(post):
+    """게시글 보기용 HTML: 현재 정책 버전으로 저장된 값이 있으면 그대로 사용"""
+    if post.get('sanitizer_version') == SANITIZER_POLICY_VERSION and post.get('content_sanitized') is not None:
+        return post['content_sanitized']
+    return sanitize_html_cached(post.get('content'))
@@ -0,0 +1,416 @@
+"""
+트랜잭션 이메일 아웃박스 (email_outbox 테이블 + SendGrid 일괄 발송 워커)
+
+- 요청 처리 중에는 email_outbox에 INSERT만 함 (회원 INSERT와 같은 트랜잭션)
+  → 가입이 롤백되면 메일도 사라지고, 가입이 커밋되면 메일은 반드시 남음
+- 워커는 FOR UPDATE SKIP LOCKED로 행을 선점(claim)하므로 여러 gunicorn 워커/노드가
+  동시에 비워도 같은 행을 중복 발송하지 않음
+- 같은 종류의 메일은 SendGrid personalizations 하나의 요청으로 묶어서 발송
+- 실패 시 지수 백오프로 재시도, EMAIL_MAX_ATTEMPTS 초과 시 failed로 남김
+
+발송 보장은 at-least-once: SendGrid가 수락(202)한 뒤 상태 기록 전에 프로세스가 죽으면
+선점 기한(EMAIL_CLAIM_LEASE) 후 한 번 더 발송될 수 있음
+
+실행 방법:
+    python email_outbox.py worker              # 아웃박스 계속 비우기 (별도 프로세스)
+    python email_outbox.py drain               # 지금 발송 가능한 메일만 보내고 종료
+    python email_outbox.py status              # 상태별 개수
+    python email_outbox.py stub --port 8025    # 로컬 SendGrid 대역 서버
+        → SENDGRID_API_URL=http://127.0.0.1:8025/v3/mail/send 로 설정해서 테스트
+"""
+
+from dotenv import load_dotenv
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+from psycopg2.extras import Json, RealDictCursor
+import requests
+
+from outbound_http import outbound
+
+load_dotenv()
+
+SENDGRID_API_URL = os.environ.get('SENDGRID_API_URL', 'https://api.sendgrid.com/v3/mail/send')
+SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
+SENDGRID_FROM_EMAIL = os.environ.get('SENDGRID_FROM_EMAIL', 'noreply@nvidia8board.com')
+
+# SendGrid는 요청 하나에 personalizations 최대 1000개
+EMAIL_BATCH_SIZE = min(int(os.environ.get('EMAIL_BATCH_SIZE', 100)), 1000)
+EMAIL_SEND_CONCURRENCY = int(os.environ.get('EMAIL_SEND_CONCURRENCY', 4))
+EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 6))
+EMAIL_RETRY_BACKOFF = float(os.environ.get('EMAIL_RETRY_BACKOFF', 30))
+EMAIL_RETRY_MAX_BACKOFF = float(os.environ.get('EMAIL_RETRY_MAX_BACKOFF', 3600))
+# 선점한 행을 이 시간(초) 안에 처리하지 못하면 다른 워커가 다시 가져감
+EMAIL_CLAIM_LEASE = int(os.environ.get('EMAIL_CLAIM_LEASE', 120))
+EMAIL_POLL_INTERVAL = float(os.environ.get('EMAIL_POLL_INTERVAL', 5))
+
+
+# ==================== 메일 템플릿 ====================
+# 수신자별 값은 SendGrid substitutions(-키-)로 넣음 → 같은 종류는 본문 하나로 묶어 발송
+
+VERIFY_EMAIL_TEXT = """
+안녕하세요 -username-님,
+
+NVIDIA 8th 게시판 가입을 환영합니다!
+
+아래 링크를 클릭하여 이메일을 인증해주세요:
+-confirm_url-
+
+※ 이 링크는 1시간 동안 유효합니다.
+
+감사합니다.
+NVIDIA 8th Board
+"""
+
+VERIFY_EMAIL_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                   color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
+        .button { display: inline-block; padding: 15px 30px; background: #667eea;
+                  color: white; text-decoration: none; border-radius: 5px;
+                  font-weight: bold; margin: 20px 0; }
+        .button:hover { background: #5568d3; }
+        .footer { text-align: center; margin-top: 20px; color: #666; font-size: 12px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🎉 가입을 환영합니다!</h1>
+        </div>
+        <div class="content">
+            <p>안녕하세요 <strong>-username-</strong>님,</p>
+            <p>NVIDIA 8th 게시판 가입을 환영합니다!</p>
+            <p>아래 버튼을 클릭하여 이메일 인증을 완료해주세요:</p>
+            <p style="text-align: center;">
+                <a href="-confirm_url-" class="button">이메일 인증하기</a>
+            </p>
+            <p><small>※ 이 링크는 1시간 동안 유효합니다.</small></p>
+            <p>감사합니다.<br>NVIDIA 8th Board 팀</p>
+        </div>
+        <div class="footer">
+            <p>이 이메일은 NVIDIA 8th Board에서 자동으로 발송되었습니다.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+# kind → (제목, 텍스트 본문, HTML 본문, substitutions에 쓸 payload 키)
+EMAIL_TEMPLATES = {
+    'verify_email': (
+        'NVIDIA 8th 게시판 - 이메일 인증',
+        VERIFY_EMAIL_TEXT,
+        VERIFY_EMAIL_HTML,
+        ('username', 'confirm_url'),
+    ),
+}
+
+
+def enqueue_email(cursor, kind, recipient, payload):
+    """아웃박스에 메일 등록 (커밋은 호출한 쪽 트랜잭션에서)"""
+    if kind not in EMAIL_TEMPLATES:
+        raise ValueError(f"알 수 없는 메일 종류: {kind}")
+    cursor.execute('''
+        INSERT INTO email_outbox (kind, recipient, payload)
+        VALUES (%s, %s, %s)
+    ''', (kind, recipient, Json(payload)))
+
+
+# ==================== 선점 / 결과 기록 ====================
+
+def claim_batch(conn, limit):
+    """발송할 행을 선점 (다른 워커가 잡고 있는 행은 건너뜀)
+
+    pending이면서 발송 시각이 된 행 + 선점 기한이 지난 sending 행(워커 비정상 종료)
+    선점 기한이 지난 sending 행 중 EMAIL_MAX_ATTEMPTS에 도달한 행은 가져가지 않고 failed로 남김
+    """
+    claim_token = uuid.uuid4().hex
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    # 발송 도중 워커가 계속 죽는 행(예: 발송 코드를 죽게 만드는 payload)은 무한히 다시 가져가지 않음
+    cursor.execute('''
+        UPDATE email_outbox
+        SET status = 'failed', locked_until = NULL,
+            last_error = LEFT('선점 기한 초과로 발송 결과를 기록하지 못함 (' || attempts || '회); ' ||
+                              COALESCE(last_error, ''), 1000)
+        WHERE status = 'sending' AND locked_until < NOW() AND attempts >= %s
+    ''', (EMAIL_MAX_ATTEMPTS,))
+    cursor.execute('''
+        UPDATE email_outbox o
+        SET status = 'sending',
+            claim_token = %s,
+            locked_until = NOW() + make_interval(secs => %s),
+            attempts = o.attempts + 1
+        WHERE o.id IN (
+            SELECT id FROM email_outbox
+            WHERE (status = 'pending' AND next_attempt_at <= NOW())
+               OR (status = 'sending' AND locked_until < NOW() AND attempts < %s)
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING o.id, o.kind, o.recipient, o.payload, o.attempts
+    ''', (claim_token, EMAIL_CLAIM_LEASE, EMAIL_MAX_ATTEMPTS, limit))
+    rows = cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    return claim_token, rows
+
+
+def mark_sent(conn, claim_token, ids):
+    cursor = conn.cursor()
+    # claim_token 조건: 선점 기한이 지나 다른 워커가 다시 가져간 행은 건드리지 않음
+    cursor.execute('''
+        UPDATE email_outbox
+        SET status = 'sent', sent_at = NOW(), locked_until = NULL, last_error = NULL
+        WHERE id = ANY(%s) AND claim_token = %s AND status = 'sending'
+    ''', (ids, claim_token))
+    conn.commit()
+    cursor.close()
+
+
+def mark_failed(conn, claim_token, ids, error, retryable=True):
+    """실패 기록: 재시도 가능하면 백오프 후 pending, 아니면(또는 횟수 초과) failed"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE email_outbox
+        SET status = CASE WHEN %s AND attempts < %s THEN 'pending' ELSE 'failed' END,
+            next_attempt_at = NOW() + make_interval(
+                secs => LEAST(%s * power(2, attempts - 1), %s)
+            ),
+            locked_until = NULL,
+            last_error = %s
+        WHERE id = ANY(%s) AND claim_token = %s AND status = 'sending'
+    ''', (retryable, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_BACKOFF, EMAIL_RETRY_MAX_BACKOFF,
+          error[:1000], ids, claim_token))
+    conn.commit()
+    cursor.close()
+
+
+# ==================== SendGrid 발송 ====================
+
+class EmailSendError(Exception):
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def build_sendgrid_payload(kind, rows):
+    """같은 kind의 행들 → personalizations 묶음 요청 하나"""
+    subject, text_body, html_body, keys = EMAIL_TEMPLATES[kind]
+    personalizations = []
+    for row in rows:
+        personalizations.append({
+            "to": [{"email": row['recipient']}],
+            "subject": subject,
+            "substitutions": {f"-{key}-": str(row['payload'].get(key, '')) for key in keys},
+            # SendGrid 이벤트 웹훅/활동 로그에서 아웃박스 행을 찾을 수 있도록
+            "custom_args": {"outbox_id": str(row['id'])},
+        })
+
+    return {
+        "personalizations": personalizations,
+        "from": {
+            "email": SENDGRID_FROM_EMAIL,
+            "name": "NVIDIA 8th Board"
+        },
+        "content": [
+            {"type": "text/plain", "value": text_body},
+            {"type": "text/html", "value": html_body},
+        ]
+    }
+
+
+def send_batch(http, kind, rows):
+    """SendGrid 요청 1회, 실패 시 EmailSendError"""
+    headers = {
+        "Authorization": f"Bearer {SENDGRID_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    try:
+        response = http.post(SENDGRID_API_URL, headers=headers,
+                             json=build_sendgrid_payload(kind, rows))
+    except requests.exceptions.RequestException as e:
+        raise EmailSendError(f"{type(e).__name__}: {str(e)}")
+
+    if response.status_code == 202:  # SendGrid 성공 코드
+        return
+    # 429/5xx는 일시적 오류, 나머지 4xx(잘못된 주소/요청)는 재시도해도 같은 결과
+    retryable = response.status_code == 429 or response.status_code >= 500
+    raise EmailSendError(f"SendGrid {response.status_code}: {response.text[:500]}", retryable)
+
+
+def send_rows(http, kind, rows):
+    """묶음 발송 → [(행 id 목록, EmailSendError 또는 None)]
+
+    SendGrid는 주소 하나만 잘못돼도 요청 전체를 400으로 거절함
+    → 재시도 불가 오류로 묶음이 거절되면 한 건씩 다시 보내서 실제로 거절된 행만 실패로 남김
+    """
+    ids = [row['id'] for row in rows]
+    try:
+        send_batch(http, kind, rows)
+        return [(ids, None)]
+    except EmailSendError as e:
+        if e.retryable or len(rows) == 1:
+            return [(ids, e)]
+        print(f"⚠️ 묶음 발송 거절 ({len(rows)}건), 한 건씩 다시 보냄: {str(e)[:200]}")
+
+    results = []
+    for row in rows:
+        try:
+            send_batch(http, kind, [row])
+            results.append(([row['id']], None))
+        except EmailSendError as e:
+            results.append(([row['id']], e))
+    return results
+
+
+def _chunks(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def drain(get_conn, http=None, max_rounds=None):
+    """발송 가능한 메일을 모두 보냄 (보낸 개수 반환)
+
+    get_conn: 커넥션을 돌려주는 context manager 팩토리 (앱 풀 또는 단독 연결)
+    """
+    if not SENDGRID_API_KEY:
+        print("⚠️ SENDGRID_API_KEY 미설정: 이메일 발송 건너뜀")
+        return 0
+
+    http = http or outbound
+    sent = 0
+    rounds = 0
+
+    with ThreadPoolExecutor(max_workers=EMAIL_SEND_CONCURRENCY) as executor:
+        while max_rounds is None or rounds < max_rounds:
+            rounds += 1
+            with get_conn() as conn:
+                claim_token, rows = claim_batch(conn, EMAIL_BATCH_SIZE * EMAIL_SEND_CONCURRENCY)
+            if not rows:
+                break
+
+            by_kind = {}
+            for row in rows:
+                by_kind.setdefault(row['kind'], []).append(row)
+
+            # 종류별 / EMAIL_BATCH_SIZE 단위 요청을 동시에 발송
+            futures = []
+            for kind, kind_rows in by_kind.items():
+                for chunk in _chunks(kind_rows, EMAIL_BATCH_SIZE):
+                    futures.append(executor.submit(send_rows, http, kind, chunk))
+
+            with get_conn() as conn:
+                for future in futures:
+                    sent_ids = []
+                    for ids, error in future.result():
+                        if error is not None:
+                            print(f"❌ 이메일 발송 실패 ({len(ids)}건): {str(error)}")
+                            mark_failed(conn, claim_token, ids, str(error), error.retryable)
+                        else:
+                            sent_ids.extend(ids)
+                    if sent_ids:
+                        mark_sent(conn, claim_token, sent_ids)
+                        sent += len(sent_ids)
+                        print(f"✅ SendGrid 이메일 발송 성공: {len(sent_ids)}건")
+
+    return sent
+
+
+def outbox_status(conn):
+    cursor = conn.cursor()
+    cursor.execute('SELECT status, COUNT(*) FROM email_outbox GROUP BY status ORDER BY status')
+    rows = cursor.fetchall()
+    conn.commit()
+    cursor.close()
+    return dict(rows)
+
+
+# ==================== 로컬 SendGrid 대역 서버 ====================
+
+class _StubHandler(BaseHTTPRequestHandler):
+    fail_next = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if _StubHandler.fail_next > 0:
+            _StubHandler.fail_next -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        for p in body.get('personalizations', []):
+            subs = p.get('substitutions', {})
+            print(f"📧 [stub] {p['to'][0]['email']} · {p.get('subject')} · {subs}")
+        self.send_response(202)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_stub(port, fail_first=0):
+    """SendGrid 대신 요청을 받아 출력만 하는 서버 (fail_first: 처음 N번은 503)"""
+    _StubHandler.fail_next = fail_first
+    server = ThreadingHTTPServer(('127.0.0.1', port), _StubHandler)
+    print(f"🧪 SendGrid 대역 서버: http://127.0.0.1:{port}/v3/mail/send")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    from contextlib import contextmanager
+
+    parser = argparse.ArgumentParser(description='이메일 아웃박스 발송')
+    parser.add_argument('command', choices=['worker', 'drain', 'status', 'stub'])
+    parser.add_argument('--port', type=int, default=8025, help='stub 서버 포트')
+    parser.add_argument('--fail-first', type=int, default=0, help='stub: 처음 N번 요청은 503 응답')
+    args = parser.parse_args()
+
+    if args.command == 'stub':
+        run_stub(args.port, args.fail_first)
+        sys.exit(0)
+
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if not DATABASE_URL:
+        print("❌ DATABASE_URL이 설정되지 않았습니다!")
+        sys.exit(1)
+
+    if DATABASE_URL.startswith("postgres://"):
+        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+    conn = psycopg2.connect(DATABASE_URL)
+
+    @contextmanager
+    def get_conn():
+        yield conn
+
+    try:
+        if args.command == 'status':
+            for status, count in outbox_status(conn).items():
+                print(f"   - {status}: {count}")
+        elif args.command == 'drain':
+            print(f"✅ 발송 완료: {drain(get_conn)}건")
+        else:
+            print(f"🔄 아웃박스 워커 시작 (간격 {EMAIL_POLL_INTERVAL}초)")
+            while True:
+                drain(get_conn)
+                time.sleep(EMAIL_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
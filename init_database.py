@@ -9,6 +9,7 @@ import os
 import psycopg2
 from psycopg2 import sql
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from schema_migrations import run_migrations
 
 load_dotenv()
 
@@ -80,58 +81,9 @@ try:
     cursor = conn.cursor()
     print("✅ 연결 성공")
 
-    # 4. 테이블 생성 (app.py의 init_db 함수 내용)
-    print("\n[4/4] 테이블 생성 중...")
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            username VARCHAR(50) UNIQUE NOT NULL,
-            email VARCHAR(100) UNIQUE NOT NULL,
-            password VARCHAR(200) NOT NULL,
-            email_verified BOOLEAN DEFAULT FALSE,
-            verification_token VARCHAR(100),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    print("✅ users 테이블")
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS posts (
-            id SERIAL PRIMARY KEY,
-            board_type VARCHAR(20) NOT NULL,
-            title VARCHAR(200) NOT NULL,
-            author VARCHAR(100) NOT NULL,
-            password VARCHAR(200),
-            content TEXT,
-            filename VARCHAR(200),
-            cloudinary_url TEXT,
-            cloudinary_public_id TEXT,
-            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
-            ip_address VARCHAR(45),
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    print("✅ posts 테이블")
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS comments (
-            id SERIAL PRIMARY KEY,
-            post_id INTEGER REFERENCES posts(id) ON DELETE CASCADE,
-            parent_id INTEGER REFERENCES comments(id) ON DELETE CASCADE,
-            author VARCHAR(100) NOT NULL,
-            password VARCHAR(200),
-            content TEXT NOT NULL,
-            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
-            ip_address VARCHAR(45),
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    print("✅ comments 테이블")
-
-    conn.commit()
+    # 4. 테이블/인덱스 생성 (schema_migrations.py의 버전 관리 마이그레이션)
+    print("\n[4/4] 스키마 마이그레이션 적용 중...")
+    run_migrations(conn)
 
     # 기존 데이터 확인
     cursor.execute('SELECT COUNT(*) FROM users')
@@ -0,0 +1,199 @@
+"""
+요청 지연 시간 측정 (Prometheus /metrics + Server-Timing)
+
+- 히스토그램: 엔드포인트별 전체 시간 / DB 시간 / 쿼리 수 / 템플릿 렌더링 시간, 외부 HTTP 호스트별 시간
+- gunicorn 워커마다 메모리에 집계 → METRICS_DIR/metrics-<pid>.json 으로 주기적으로 기록
+  /metrics는 모든 워커 파일을 합산 (어느 워커가 스크레이프를 받아도 같은 결과)
+  종료된 워커의 파일도 남겨 둠 → 누적 카운터가 줄어들지 않음
+- DB 시간: TimedConnection (psycopg2 connection_factory) → 모든 커서의 execute 시간을 리스너로 전달
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import psycopg2.extensions
+
+# 초 단위 (Prometheus 기본값 + 긴 요청)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HELP = {
+    'http_request_duration_seconds': '요청 처리 시간 (응답 시작까지)',
+    'http_request_db_seconds': '요청당 DB 쿼리 시간 합계',
+    'http_request_db_queries': '요청당 DB 쿼리 수',
+    'http_request_render_seconds': '요청당 템플릿 렌더링 시간',
+    'outbound_http_duration_seconds': '외부 HTTP 호출 시간 (Slack, SendGrid, Cloudinary)',
+}
+
+
+# ==================== DB 쿼리 시간 ====================
+
+# fn(cursor, sql, params, seconds) 목록 (쿼리가 끝날 때마다 호출, 예외가 나도 호출)
+query_listeners = []
+
+_timed_cursor_classes = {}
+
+
+def _timed_cursor_class(base):
+    cls = _timed_cursor_classes.get(base)
+    if cls is not None:
+        return cls
+
+    class TimedCursor(base):
+        def execute(self, query, vars=None):
+            started = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                elapsed = time.perf_counter() - started
+                for listener in query_listeners:
+                    listener(self, query, vars, elapsed)
+
+        def executemany(self, query, vars_list):
+            started = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                elapsed = time.perf_counter() - started
+                for listener in query_listeners:
+                    listener(self, query, None, elapsed)
+
+    TimedCursor.__name__ = f'Timed{base.__name__}'
+    _timed_cursor_classes[base] = TimedCursor
+    return TimedCursor
+
+
+class TimedConnection(psycopg2.extensions.connection):
+    """cursor()가 돌려주는 커서(RealDictCursor 등 포함)에 시간 측정을 덧씌움
+
+    사용: psycopg2.connect(dsn, connection_factory=TimedConnection)
+    """
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _timed_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+# ==================== 히스토그램 ====================
+
+class Registry:
+    """프로세스 내 히스토그램 모음 + 워커별 파일 기록/합산"""
+
+    def __init__(self, directory, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._histograms = {}   # (name, labels tuple) → [buckets, counts, sum, count]
+        self._pid = os.getpid()
+        self._last_flush = 0.0
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 이후: 부모에서 쌓인 값은 부모 파일에 있음
+                self._histograms = {}
+                self._pid = os.getpid()
+                self._last_flush = 0.0
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [buckets, [0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[1][i] += 1
+            histogram[2] += value
+            histogram[3] += 1
+
+    def _snapshot(self):
+        with self._lock:
+            return [
+                {'name': name, 'labels': dict(labels), 'buckets': list(h[0]),
+                 'counts': list(h[1]), 'sum': h[2], 'count': h[3]}
+                for (name, labels), h in self._histograms.items()
+            ]
+
+    def flush(self, force=False):
+        """이 워커의 누적값을 파일로 기록 (flush_interval마다, force면 즉시)"""
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        snapshot = self._snapshot()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)   # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록
+
+    def collect(self):
+        """모든 워커 파일 합산 → {(name, labels tuple): [buckets, counts, sum, count]}"""
+        merged = {}
+        try:
+            filenames = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            filenames = []
+        for filename in filenames:
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for entry in entries:
+                key = (entry['name'], tuple(sorted(entry['labels'].items())))
+                target = merged.get(key)
+                if target is None:
+                    merged[key] = [entry['buckets'], list(entry['counts']), entry['sum'], entry['count']]
+                elif target[0] == entry['buckets']:
+                    target[1] = [a + b for a, b in zip(target[1], entry['counts'])]
+                    target[2] += entry['sum']
+                    target[3] += entry['count']
+        return merged
+
+    def exposition(self):
+        """Prometheus 텍스트 형식"""
+        self.flush(force=True)
+        by_name = {}
+        for (name, labels), histogram in sorted(self.collect().items()):
+            by_name.setdefault(name, []).append((labels, histogram))
+
+        lines = []
+        for name, series in by_name.items():
+            if name in HELP:
+                lines.append(f'# HELP {name} {HELP[name]}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, (buckets, counts, total, count) in series:
+                # 파일에는 구간별 개수가 이미 누적(le 이하)으로 저장됨
+                for bound, bucket_count in zip(buckets, counts):
+                    lines.append(f'{name}_bucket{_labels(labels, le=_format_bound(bound))} {bucket_count}')
+                lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {count}')
+                lines.append(f'{name}_sum{_labels(labels)} {total:.6f}')
+                lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_bound(bound):
+    return f'{bound:g}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+registry = Registry(
+    os.environ.get('METRICS_DIR') or os.path.join(tempfile.gettempdir(), f'board-metrics-{os.getppid()}'),
+    flush_interval=float(os.environ.get('METRICS_FLUSH_INTERVAL', 5)),
+)
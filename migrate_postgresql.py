@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 import os
 import sys
 import psycopg2
+from schema_migrations import run_migrations
 
 load_dotenv()
 
@@ -44,42 +45,10 @@ def migrate():
         print("✓ PostgreSQL 연결 성공")
         cursor = conn.cursor()
         
-        # 1. users 테이블 생성
-        print("\n[1/4] users 테이블 생성 중...")
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(200) NOT NULL,
-                email_verified BOOLEAN DEFAULT FALSE,
-                verification_token VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        print("✓ users 테이블 생성 완료")
-        
-        # 2. posts 테이블에 컬럼 추가
-        print("\n[2/4] posts 테이블 업데이트 중...")
-        try:
-            cursor.execute('ALTER TABLE posts ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE SET NULL')
-            cursor.execute('ALTER TABLE posts ADD COLUMN IF NOT EXISTS ip_address VARCHAR(45)')
-            cursor.execute('ALTER TABLE posts ADD COLUMN IF NOT EXISTS user_agent TEXT')
-            print("✓ posts 테이블 컬럼 추가 완료")
-        except Exception as e:
-            print(f"  ℹ️  posts 테이블 컬럼이 이미 존재합니다: {e}")
-        
-        # 3. comments 테이블에 컬럼 추가
-        print("\n[3/4] comments 테이블 업데이트 중...")
-        try:
-            cursor.execute('ALTER TABLE comments ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE SET NULL')
-            cursor.execute('ALTER TABLE comments ADD COLUMN IF NOT EXISTS ip_address VARCHAR(45)')
-            cursor.execute('ALTER TABLE comments ADD COLUMN IF NOT EXISTS user_agent TEXT')
-            print("✓ comments 테이블 컬럼 추가 완료")
-        except Exception as e:
-            print(f"  ℹ️  comments 테이블 컬럼이 이미 존재합니다: {e}")
-        
-        conn.commit()
+        # 1~3. users 테이블 생성 + posts/comments 컬럼 추가 + 인덱스
+        #      (schema_migrations.py의 버전 관리 마이그레이션으로 일원화)
+        print("\n[1/4] 스키마 마이그레이션 적용 중...")
+        run_migrations(conn)
         
         # 4. 기존 데이터 확인
         print("\n[4/4] 기존 데이터 확인 중...")
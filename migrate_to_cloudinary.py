@@ -1,12 +1,25 @@
 """
 기존 uploads 폴더의 파일을 Cloudinary로 마이그레이션하는 스크립트
 
+- 여러 파일을 동시에 업로드 (--workers, 업로드는 대부분 네트워크 대기)
+- 업로드가 끝날 때마다 체크포인트 파일에 결과(게시글 id, URL, public_id)를 한 줄씩 기록
+  → 중단 후 다시 실행하면 이미 올린 파일은 다시 올리지 않고 DB 반영만 이어서 함
+- cloudinary_public_id가 이미 있는 게시글은 건너뜀
+- DB 반영은 --batch-size개씩 execute_values UPDATE 한 번 + 커밋
+
 사용법:
-1. 환경변수 설정
-2. python migrate_to_cloudinary.py 실행
+1. 환경변수 설정 (DATABASE_URL, CLOUDINARY_*)
+2. python migrate_to_cloudinary.py --dry-run     # 대상 파일 수/용량/예상 시간만 출력
+3. python migrate_to_cloudinary.py --workers 8   # 실행 (중단되면 같은 명령으로 이어서)
 """
 
+import argparse
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import cloudinary
 import cloudinary.uploader
 
@@ -16,7 +29,7 @@ USE_POSTGRES = DATABASE_URL is not None
 
 if USE_POSTGRES:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import RealDictCursor, execute_values
     if DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 else:
@@ -27,21 +40,13 @@ CLOUD_NAME = os.environ.get('CLOUDINARY_CLOUD_NAME')
 API_KEY = os.environ.get('CLOUDINARY_API_KEY')
 API_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
 
-if not all([CLOUD_NAME, API_KEY, API_SECRET]):
-    print("❌ 에러: Cloudinary 환경변수가 설정되지 않았습니다.")
-    print("필요한 환경변수:")
-    print("  - CLOUDINARY_CLOUD_NAME")
-    print("  - CLOUDINARY_API_KEY")
-    print("  - CLOUDINARY_API_SECRET")
-    exit(1)
+UPLOADS_DIR = 'uploads'
+CHECKPOINT_FILE = os.environ.get('CLOUDINARY_MIGRATION_CHECKPOINT', '.cloudinary_migration.jsonl')
 
-cloudinary.config(
-    cloud_name=CLOUD_NAME,
-    api_key=API_KEY,
-    api_secret=API_SECRET
-)
+# --dry-run 예상 시간 계산용 가정값 (업로드 하나당 대역폭 / 요청 고정 지연)
+ESTIMATE_MB_PER_SECOND = float(os.environ.get('CLOUDINARY_ESTIMATE_MBPS', 2.0))
+ESTIMATE_REQUEST_SECONDS = float(os.environ.get('CLOUDINARY_ESTIMATE_REQUEST_SECONDS', 0.8))
 
-UPLOADS_DIR = 'uploads'
 
 def get_db_connection():
     if USE_POSTGRES:
@@ -51,103 +56,238 @@ def get_db_connection():
         conn.row_factory = sqlite3.Row
         return conn
 
-def migrate_files():
+
+def configure_cloudinary():
+    if not all([CLOUD_NAME, API_KEY, API_SECRET]):
+        print("❌ 에러: Cloudinary 환경변수가 설정되지 않았습니다.")
+        print("필요한 환경변수:")
+        print("  - CLOUDINARY_CLOUD_NAME")
+        print("  - CLOUDINARY_API_KEY")
+        print("  - CLOUDINARY_API_SECRET")
+        exit(1)
+
+    cloudinary.config(
+        cloud_name=CLOUD_NAME,
+        api_key=API_KEY,
+        api_secret=API_SECRET
+    )
+
+
+# ==================== 체크포인트 ====================
+
+class Checkpoint:
+    """업로드 완료 기록 (JSON 한 줄 = 게시글 하나, 워커 스레드에서 바로 추가)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = {}   # post_id → {'id', 'url', 'public_id'}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # 기록 도중 중단된 마지막 줄
+                    self.done[entry['id']] = entry
+        self._file = None
+
+    def add(self, post_id, url, public_id):
+        entry = {'id': post_id, 'url': url, 'public_id': public_id}
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            self.done[post_id] = entry
+        return entry
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# ==================== DB ====================
+
+def fetch_pending_posts(cursor):
+    """파일이 있고 아직 Cloudinary로 옮기지 않은 게시글"""
+    cursor.execute("""
+        SELECT id, board_type, filename FROM posts
+        WHERE filename IS NOT NULL AND cloudinary_public_id IS NULL
+        ORDER BY id
+    """)
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def apply_updates(conn, cursor, entries):
+    """업로드 결과를 한 번에 반영 + 커밋 (그 사이 다른 경로로 옮겨진 글은 덮어쓰지 않음)"""
+    if not entries:
+        return 0
+    values = [(entry['id'], entry['url'], entry['public_id']) for entry in entries]
+    if USE_POSTGRES:
+        # version 증가 → 게시글 보기 ETag/페이지 캐시가 새 URL을 반영
+        execute_values(cursor, """
+            UPDATE posts p
+            SET cloudinary_url = v.url, cloudinary_public_id = v.public_id, version = p.version + 1
+            FROM (VALUES %s) AS v (id, url, public_id)
+            WHERE p.id = v.id AND p.cloudinary_public_id IS NULL
+        """, values, page_size=len(values))
+    else:
+        cursor.executemany("""
+            UPDATE posts
+            SET cloudinary_url = ?, cloudinary_public_id = ?
+            WHERE id = ? AND cloudinary_public_id IS NULL
+        """, [(url, public_id, post_id) for post_id, url, public_id in values])
+    updated = cursor.rowcount
+    conn.commit()
+    return updated
+
+
+# ==================== 업로드 ====================
+
+def upload_post_file(post, checkpoint):
+    """워커 스레드: 업로드 → 체크포인트 기록 (DB는 메인 스레드에서 배치로)"""
+    result = cloudinary.uploader.upload(
+        os.path.join(UPLOADS_DIR, post['filename']),
+        folder=f"nvidia8th_board/{post['board_type']}",
+        resource_type="auto",
+        use_filename=True
+    )
+    return checkpoint.add(post['id'], result['secure_url'], result['public_id'])
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}시간 {minutes}분"
+    if minutes:
+        return f"{minutes}분 {seconds}초"
+    return f"{seconds}초"
+
+
+def migrate_files(workers=8, batch_size=50, dry_run=False, checkpoint_path=CHECKPOINT_FILE):
     print("=" * 60)
-    print("📦 Cloudinary 파일 마이그레이션 시작")
+    print(f"📦 Cloudinary 파일 마이그레이션 {'계획 (dry run)' if dry_run else '시작'}")
     print("=" * 60)
-    
+
     # uploads 폴더 확인
     if not os.path.exists(UPLOADS_DIR):
         print(f"❌ {UPLOADS_DIR} 폴더가 없습니다.")
         return
-    
+
+    checkpoint = Checkpoint(checkpoint_path)
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=RealDictCursor) if USE_POSTGRES else conn.cursor()
-    
-    # 파일이 있는 게시글 조회
-    cursor.execute("SELECT id, board_type, filename FROM posts WHERE filename IS NOT NULL")
-    posts = [dict(row) for row in cursor.fetchall()]
-    
+
+    posts = fetch_pending_posts(cursor)
     if not posts:
         print("📝 마이그레이션할 파일이 없습니다.")
         cursor.close()
         conn.close()
         return
-    
-    print(f"📝 마이그레이션할 게시글: {len(posts)}개\n")
-    
-    success_count = 0
-    fail_count = 0
-    skip_count = 0
-    
-    for idx, post in enumerate(posts, 1):
-        post_id = post['id']
-        board_type = post['board_type']
-        filename = post['filename']
-        file_path = os.path.join(UPLOADS_DIR, filename)
-        
-        print(f"[{idx}/{len(posts)}] {filename}... ", end="")
-        
-        # 파일 존재 확인
+
+    # 이전 실행에서 업로드는 끝났지만 DB에 반영하지 못한 글 (다시 올리지 않음)
+    resumed = [checkpoint.done[post['id']] for post in posts if post['id'] in checkpoint.done]
+    to_upload = [post for post in posts if post['id'] not in checkpoint.done]
+
+    missing = []
+    pending = []
+    total_bytes = 0
+    for post in to_upload:
+        file_path = os.path.join(UPLOADS_DIR, post['filename'])
         if not os.path.exists(file_path):
-            print("❌ 파일 없음")
-            skip_count += 1
+            missing.append(post)
             continue
-        
-        try:
-            # Cloudinary 업로드
-            result = cloudinary.uploader.upload(
-                file_path,
-                folder=f"nvidia8th_board/{board_type}",
-                resource_type="auto",
-                use_filename=True
-            )
-            
-            cloudinary_url = result['secure_url']
-            cloudinary_public_id = result['public_id']
-            
-            # DB 업데이트
-            if USE_POSTGRES:
-                cursor.execute("""
-                    UPDATE posts 
-                    SET cloudinary_url = %s, cloudinary_public_id = %s
-                    WHERE id = %s
-                """, (cloudinary_url, cloudinary_public_id, post_id))
-            else:
-                cursor.execute("""
-                    UPDATE posts 
-                    SET cloudinary_url = ?, cloudinary_public_id = ?
-                    WHERE id = ?
-                """, (cloudinary_url, cloudinary_public_id, post_id))
-            
-            conn.commit()
-            print(f"✅ 업로드 완료")
+        total_bytes += os.path.getsize(file_path)
+        pending.append(post)
+
+    print(f"📝 대상 게시글: {len(posts)}개 (체크포인트에서 이어받기 {len(resumed)}개, "
+          f"업로드 {len(pending)}개, 파일 없음 {len(missing)}개)")
+    print(f"💾 업로드 용량: {total_bytes / 1024 / 1024:.1f}MB\n")
+
+    if dry_run:
+        # 업로드 하나 = 고정 지연 + 크기/대역폭, 워커 수만큼 동시에
+        serial = len(pending) * ESTIMATE_REQUEST_SECONDS + total_bytes / (ESTIMATE_MB_PER_SECOND * 1024 * 1024)
+        print(f"⏱️  예상 소요 시간: 약 {format_duration(serial / max(1, workers))} (워커 {workers}개)")
+        print(f"   가정: 업로드당 {ESTIMATE_REQUEST_SECONDS}초 + {ESTIMATE_MB_PER_SECOND}MB/s "
+              f"(CLOUDINARY_ESTIMATE_REQUEST_SECONDS / CLOUDINARY_ESTIMATE_MBPS)")
+        for post in missing[:20]:
+            print(f"   ❌ 파일 없음: [{post['id']}] {post['filename']}")
+        cursor.close()
+        conn.close()
+        return
+
+    configure_cloudinary()
+
+    success_count = 0
+    fail_count = 0
+    updated_count = apply_updates(conn, cursor, resumed)
+    if resumed:
+        print(f"♻️  이전 실행의 업로드 결과 {updated_count}개 반영\n")
+
+    started = time.monotonic()
+    uploaded_bytes = 0
+    batch = []
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = {pool.submit(upload_post_file, post, checkpoint): post for post in pending}
+        for idx, future in enumerate(as_completed(futures), 1):
+            post = futures[future]
+            try:
+                batch.append(future.result())
+            except Exception as e:
+                print(f"[{idx}/{len(pending)}] {post['filename']}... ❌ 실패: {str(e)}")
+                fail_count += 1
+                continue
+
             success_count += 1
-            
-        except Exception as e:
-            print(f"❌ 실패: {str(e)}")
-            fail_count += 1
-    
-    cursor.close()
-    conn.close()
-    
+            uploaded_bytes += os.path.getsize(os.path.join(UPLOADS_DIR, post['filename']))
+            elapsed = time.monotonic() - started
+            print(f"[{idx}/{len(pending)}] {post['filename']}... ✅ 업로드 완료 "
+                  f"({uploaded_bytes / 1024 / 1024 / max(elapsed, 0.001):.1f}MB/s)")
+
+            if len(batch) >= batch_size:
+                updated_count += apply_updates(conn, cursor, batch)
+                batch = []
+    finally:
+        # 중단(Ctrl+C) 시: 대기 중인 업로드는 취소, 진행 중인 것은 끝까지 → 체크포인트에 남음
+        pool.shutdown(wait=True, cancel_futures=True)
+        updated_count += apply_updates(conn, cursor, batch)
+        checkpoint.close()
+        cursor.close()
+        conn.close()
+
     print("\n" + "=" * 60)
     print("📊 마이그레이션 완료")
     print("=" * 60)
-    print(f"✅ 성공: {success_count}개")
-    print(f"❌ 실패: {fail_count}개")
-    print(f"⏭️  스킵: {skip_count}개 (파일 없음)")
+    print(f"✅ 성공: {success_count}개 ({format_duration(time.monotonic() - started)})")
+    print(f"❌ 실패: {fail_count}개 (다시 실행하면 재시도)")
+    print(f"⏭️  스킵: {len(missing)}개 (파일 없음)")
+    print(f"🗄️  DB 반영: {updated_count}개")
     print(f"📁 총합: {len(posts)}개")
     print("=" * 60)
-    
-    if success_count > 0:
+
+    if success_count > 0 and fail_count == 0:
         print("\n✨ 마이그레이션이 성공적으로 완료되었습니다!")
         print("이제 안전하게 재배포할 수 있습니다.")
 
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='uploads 폴더 파일을 Cloudinary로 옮기기')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('CLOUDINARY_MIGRATION_WORKERS', 8)),
+                        help='동시 업로드 수')
+    parser.add_argument('--batch-size', type=int, default=50, help='DB UPDATE 한 번에 반영할 게시글 수')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE, help='업로드 완료 기록 파일')
+    parser.add_argument('--dry-run', action='store_true', help='업로드 없이 대상/용량/예상 시간만 출력')
+    args = parser.parse_args()
+
     try:
-        migrate_files()
+        migrate_files(workers=args.workers, batch_size=args.batch_size, dry_run=args.dry_run,
+                      checkpoint_path=args.checkpoint)
     except KeyboardInterrupt:
-        print("\n\n⚠️  사용자에 의해 중단되었습니다.")
+        print("\n\n⚠️  사용자에 의해 중단되었습니다. 같은 명령으로 다시 실행하면 이어서 진행합니다.")
     except Exception as e:
         print(f"\n❌ 에러 발생: {str(e)}")
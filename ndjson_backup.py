@@ -0,0 +1,94 @@
+"""
+NDJSON 백업 스트림 (/admin/backup?format=ndjson)
+
+- 서버 측(named) 커서로 itersize 행씩 가져와 한 줄씩 JSON으로 내보냄 → 테이블 크기와 무관하게 메모리 일정
+- 모든 테이블을 한 REPEATABLE READ 스냅샷에서 읽음 (게시글/댓글이 서로 맞는 시점)
+- gzip 스트림으로 압축해서 조각 단위로 전송 (중간중간 flush → 받는 쪽이 바로 풀 수 있음)
+- 끊기면 마지막으로 받은 행의 테이블/id로 이어받기: ?table=comments&after_id=1234
+  (이어받은 파일은 그대로 이어 붙여도 됨: cat part1.ndjson.gz part2.ndjson.gz | gunzip)
+
+줄 형식:
+    {"type": "meta", "backup_date": ..., "tables": [...], "start_table": ..., "after_id": ...}
+    {"type": "row", "table": "posts", "data": {...}}
+    {"type": "end", "table": "posts", "count": 120, "last_id": 130}
+    {"type": "done"}                       ← 이 줄이 없으면 중간에 끊긴 백업
+"""
+
+import base64
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from psycopg2.extras import RealDictCursor
+
+BACKUP_TABLES = ('posts', 'comments')
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, memoryview):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    raise TypeError(f'JSON으로 바꿀 수 없는 값: {type(value).__name__}')
+
+
+def _line(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8') + b'\n'
+
+
+def ndjson_lines(conn, tables=BACKUP_TABLES, start_table=None, after_id=0, itersize=2000):
+    """백업 줄(bytes)을 itersize 행 묶음 단위로 yield
+
+    conn: 이 스트림 전용 커넥션 (스냅샷 트랜잭션을 끝까지 유지, 호출한 쪽에서 닫음)
+    start_table/after_id: 이어받기 시작점 (그 테이블의 id > after_id 부터, 이후 테이블은 처음부터)
+    """
+    conn.set_session(isolation_level='REPEATABLE READ', readonly=True)
+
+    if start_table is not None:
+        tables = tables[tables.index(start_table):]
+
+    yield _line({
+        'type': 'meta',
+        'backup_date': datetime.now().isoformat(),
+        'database_type': 'PostgreSQL',
+        'tables': list(tables),
+        'start_table': start_table,
+        'after_id': after_id,
+    })
+
+    for i, table in enumerate(tables):
+        table_after_id = after_id if (i == 0 and start_table is not None) else 0
+        cursor = conn.cursor(name=f'backup_{table}', cursor_factory=RealDictCursor)
+        cursor.itersize = itersize
+        cursor.execute(f'SELECT * FROM {table} WHERE id > %s ORDER BY id', (table_after_id,))
+
+        count = 0
+        last_id = table_after_id
+        chunk = []
+        for row in cursor:
+            chunk.append(_line({'type': 'row', 'table': table, 'data': row}))
+            count += 1
+            last_id = row['id']
+            if len(chunk) >= itersize:
+                yield b''.join(chunk)
+                chunk = []
+        cursor.close()
+
+        chunk.append(_line({'type': 'end', 'table': table, 'count': count, 'last_id': last_id}))
+        yield b''.join(chunk)
+
+    conn.rollback()
+    yield _line({'type': 'done'})
+
+
+def gzip_stream(chunks, level=6):
+    """bytes 조각 → gzip 조각 (조각마다 SYNC_FLUSH → 받은 데까지 풀 수 있음)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31 = gzip 헤더
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
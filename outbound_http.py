@@ -0,0 +1,156 @@
+"""
+외부 HTTP 호출용 공용 클라이언트 (Slack, SendGrid, Cloudinary)
+
+- 워커 프로세스마다 requests.Session 하나를 공유 → 호스트별 keep-alive 연결 재사용
+  (매 호출마다 TCP/TLS 핸드셰이크를 하지 않음)
+- 호스트별 기본 타임아웃 (OUTBOUND_TIMEOUTS="hooks.slack.com=5,api.sendgrid.com=10")
+- 호스트별 호출 수 / 오류 수 / 지연 시간 집계 (/admin/stats)
+- listeners: 호출마다 fn(host, seconds, status, error) 호출 (요청 시간 측정용)
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HOST_TIMEOUTS = {
+    'hooks.slack.com': 5,
+    'api.sendgrid.com': 10,
+    'api.cloudinary.com': 60,
+}
+
+
+def _parse_host_timeouts(value):
+    timeouts = dict(DEFAULT_HOST_TIMEOUTS)
+    for item in (value or '').split(','):
+        if '=' in item:
+            host, seconds = item.split('=', 1)
+            timeouts[host.strip()] = float(seconds)
+    return timeouts
+
+
+class OutboundClient:
+    """requests.Session 래퍼 (fork 이후 자식 프로세스에서는 새 Session 생성)"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, default_timeout=10, host_timeouts=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.default_timeout = default_timeout
+        self.host_timeouts = host_timeouts or {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._stats = {}
+        self.listeners = []
+
+    def _get_session(self):
+        if self._pid == os.getpid():
+            return self._session
+        with self._lock:
+            if self._pid != os.getpid():
+                session = requests.Session()
+                # 재시도는 호출하는 쪽(작업 큐/아웃박스)에서 백오프로 처리
+                adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                      pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+                self._stats = {}
+                self._pid = os.getpid()
+        return self._session
+
+    def _record(self, host, elapsed, status=None, error=None):
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                'requests': 0, 'errors': 0, 'http_errors': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'last_error': None,
+            })
+            ms = elapsed * 1000
+            stats['requests'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            if error is not None:
+                stats['errors'] += 1
+                stats['last_error'] = error
+            elif status >= 400:
+                stats['http_errors'] += 1
+        for listener in self.listeners:
+            listener(host, elapsed, status, error)
+
+    def request(self, method, url, **kwargs):
+        host = urlparse(url).hostname or ''
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.host_timeouts.get(host, self.default_timeout)
+
+        session = self._get_session()
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self._record(host, time.perf_counter() - started, error=type(e).__name__)
+            raise
+        self._record(host, time.perf_counter() - started, status=response.status_code)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                return {}
+            return {
+                host: {
+                    **stats,
+                    'total_ms': round(stats['total_ms'], 1),
+                    'max_ms': round(stats['max_ms'], 1),
+                    'avg_ms': round(stats['total_ms'] / stats['requests'], 1) if stats['requests'] else 0,
+                }
+                for host, stats in self._stats.items()
+            }
+
+
+class _CloudinaryResponse:
+    """cloudinary.uploader가 기대하는 urllib3 응답 형태 (status, data)"""
+
+    def __init__(self, response):
+        self.status = response.status_code
+        self.data = response.content
+
+
+class CloudinaryConnector:
+    """cloudinary.uploader._http 대체 → 업로드/삭제도 공용 Session을 거침
+
+    사용: cloudinary.uploader._http = CloudinaryConnector(outbound)
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def request(self, method, url, fields=None, headers=None, timeout=None, **kwargs):
+        data = []
+        files = []
+        for name, value in fields or []:
+            # handle_file_parameter()가 만든 (파일명, 내용) 튜플은 multipart 파일로
+            if isinstance(value, tuple):
+                files.append((name, value))
+            else:
+                data.append((name, value))
+
+        response = self.client.request(method, url, data=data, files=files or None,
+                                       headers=headers, timeout=timeout)
+        return _CloudinaryResponse(response)
+
+
+outbound = OutboundClient(
+    pool_connections=int(os.environ.get('OUTBOUND_POOL_CONNECTIONS', 10)),
+    pool_maxsize=int(os.environ.get('OUTBOUND_POOL_MAXSIZE', 10)),
+    default_timeout=float(os.environ.get('OUTBOUND_DEFAULT_TIMEOUT', 10)),
+    host_timeouts=_parse_host_timeouts(os.environ.get('OUTBOUND_TIMEOUTS')),
+)
@@ -0,0 +1,94 @@
+"""
+익명(비로그인) 요청용 전체 페이지 캐시
+
+- 크기 제한 LRU + TTL (프로세스 메모리)
+- 각 항목에 태그(board:free, post:12 ...)를 달아 두고, 글/댓글이 바뀌면 태그 단위로 삭제
+- 렌더링 도중 무효화가 일어나면(generation 변경) 그 결과는 저장하지 않음
+  → 커밋 직전에 읽은 옛 내용이 무효화 이후에 캐시에 들어가는 경합 방지
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class PageCache:
+    def __init__(self, maxsize=500, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key → (expires_at, tags, value)
+        self._tags = {}              # tag → set(key)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, tags, generation):
+        """generation: 렌더링 시작 시점의 self.generation"""
+        with self._lock:
+            if generation != self._generation:
+                return False
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, tags, value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+            return True
+
+    def _remove(self, key):
+        _, tags, _ = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, tags):
+        """태그가 하나라도 붙은 항목 삭제"""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,250 @@
+"""
+페이지 단위 조회 쿼리 (DB 왕복 1회)
+
+게시글 보기 / 프로필 페이지에 필요한 데이터를 한 문장으로 가져옴
+- 하위 목록(댓글, 작성 글 등)은 LATERAL + json_agg로 DB에서 묶어서 반환
+- json 컬럼은 psycopg2가 바로 list[dict]로 변환 → dict(row) 복사 없이 템플릿에 전달
+- json으로 넘어온 시각은 문자열이므로 datetime으로 되돌림 (|kst 필터용)
+"""
+
+from datetime import datetime
+
+
+def _parse_times(rows, *keys):
+    for row in rows:
+        for key in keys:
+            if row.get(key):
+                row[key] = datetime.fromisoformat(row[key])
+    return rows
+
+
+def _parse_threads(threads):
+    _parse_times(threads, 'created_at')
+    for thread in threads:
+        _parse_times(thread['replies'], 'created_at')
+    return threads
+
+
+# 한 답글 스레드 = 최상위 댓글 아래의 모든 하위 댓글 (답글의 답글 포함, 작성 순으로 평평하게)
+# 같은 게시글의 댓글만 따라감, UNION → parent_id 순환이 있어도 종료
+_THREAD_CTE = '''
+    WITH RECURSIVE thread AS (
+        SELECT id, author, content, user_id, created_at
+        FROM comments
+        WHERE parent_id = {root} AND post_id = {post}
+        UNION
+        SELECT c.id, c.author, c.content, c.user_id, c.created_at
+        FROM comments c
+        JOIN thread th ON c.parent_id = th.id
+        WHERE c.post_id = {post}
+    )
+'''
+
+# 최상위 댓글 한 페이지(키셋) + 각 댓글의 답글 수 / 앞부분 답글 → json 배열
+_THREADS_SUBQUERY = '''
+    SELECT json_agg(json_build_object(
+               'id', t.id,
+               'author', t.author,
+               'content', t.content,
+               'user_id', t.user_id,
+               'created_at', t.created_at,
+               'reply_count', r.reply_count,
+               'replies', COALESCE(r.replies, '[]'::json)
+           ) ORDER BY t.created_at, t.id)
+    FROM (
+        SELECT id, author, content, user_id, created_at
+        FROM comments
+        WHERE post_id = %(post_id)s AND parent_id IS NULL
+          AND (%(after_time)s IS NULL OR (created_at, id) > (%(after_time)s, %(after_id)s))
+        ORDER BY created_at, id
+        LIMIT %(limit)s
+    ) t
+    LEFT JOIN LATERAL (
+        ''' + _THREAD_CTE.format(root='t.id', post='%(post_id)s') + '''
+        SELECT (SELECT COUNT(*) FROM thread) AS reply_count,
+               (SELECT json_agg(x ORDER BY x.created_at, x.id)
+                FROM (SELECT * FROM thread ORDER BY created_at, id LIMIT %(preview)s) x) AS replies
+    ) r ON TRUE
+'''
+
+
+def _thread_params(post_id, after, limit, preview):
+    return {
+        'post_id': post_id,
+        'after_time': after[0] if after else None,
+        'after_id': after[1] if after else None,
+        # 다음 페이지 유무 확인용으로 1개 더
+        'limit': limit + 1,
+        'preview': preview,
+    }
+
+
+def fetch_post_page(cursor, post_id, limit=50, preview=3):
+    """게시글 + 최상위 댓글 첫 페이지(답글 미리보기 포함) → post dict, 없으면 None
+
+    post['comments']: 최상위 댓글 목록 (limit개 초과분이 있으면 limit+1개)
+    post['last_comment_id']: 이 글의 마지막 댓글 id (새 댓글 조회의 시작점)
+    각 댓글: replies(앞의 preview개), reply_count(전체 답글 수)
+    본문 표시에 필요 없는 댓글 컬럼(password, ip_address, user_agent)은 가져오지 않음
+    """
+    cursor.execute('''
+        SELECT p.*,
+               (SELECT MAX(id) FROM comments WHERE post_id = p.id) AS last_comment_id,
+               COALESCE((''' + _THREADS_SUBQUERY + '''), '[]'::json) AS comments
+        FROM posts p
+        WHERE p.id = %(post_id)s
+    ''', _thread_params(post_id, None, limit, preview))
+    post = cursor.fetchone()
+    if post is None:
+        return None
+
+    _parse_threads(post['comments'])
+    return post
+
+
+def fetch_comment_threads(cursor, post_id, after, limit=50, preview=3):
+    """최상위 댓글 다음 페이지 (after: (created_at, id) 커서) → 목록 (limit개 초과 시 limit+1개)"""
+    cursor.execute(
+        'SELECT COALESCE((' + _THREADS_SUBQUERY + "), '[]'::json) AS comments",
+        _thread_params(post_id, after, limit, preview)
+    )
+    return _parse_threads(cursor.fetchone()['comments'])
+
+
+def fetch_replies(cursor, root_id, after, limit=50):
+    """최상위 댓글의 답글 다음 페이지 → (post_id, 답글 목록), 댓글이 없으면 (None, [])
+
+    after: (created_at, id) 커서 (None이면 처음부터), limit개 초과 시 limit+1개 반환
+    """
+    cursor.execute('SELECT post_id FROM comments WHERE id = %s', (root_id,))
+    root = cursor.fetchone()
+    if root is None:
+        return None, []
+
+    cursor.execute(_THREAD_CTE.format(root='%(root_id)s', post='%(post_id)s') + '''
+        SELECT id, author, content, user_id, created_at
+        FROM thread
+        WHERE %(after_time)s IS NULL OR (created_at, id) > (%(after_time)s, %(after_id)s)
+        ORDER BY created_at, id
+        LIMIT %(limit)s
+    ''', {
+        'root_id': root_id,
+        'post_id': root['post_id'],
+        'after_time': after[0] if after else None,
+        'after_id': after[1] if after else None,
+        'limit': limit + 1,
+    })
+    return root['post_id'], cursor.fetchall()
+
+
+def fetch_comments_since(cursor, post_id, after_id, limit=100):
+    """after_id 이후에 달린 댓글 (id 순) → 목록 (limit개 초과 시 limit+1개)
+
+    각 댓글의 root_id: 속한 최상위 댓글 id (최상위 댓글이면 자기 자신, 스레드가 끊겼으면 None)
+    """
+    cursor.execute('''
+        WITH RECURSIVE fresh AS (
+            SELECT id, parent_id, author, content, user_id, created_at
+            FROM comments
+            WHERE post_id = %(post_id)s AND id > %(after_id)s
+            ORDER BY id
+            LIMIT %(limit)s
+        ), ancestors AS (
+            SELECT id AS comment_id, parent_id, id AS ancestor_id, 0 AS depth
+            FROM fresh
+            UNION ALL
+            SELECT a.comment_id, c.parent_id, c.id, a.depth + 1
+            FROM ancestors a
+            JOIN comments c ON c.id = a.parent_id AND c.post_id = %(post_id)s
+            WHERE a.depth < 100
+        )
+        SELECT f.id, f.author, f.content, f.user_id, f.created_at,
+               (SELECT a.ancestor_id FROM ancestors a
+                WHERE a.comment_id = f.id AND a.parent_id IS NULL) AS root_id
+        FROM fresh f
+        ORDER BY f.id
+    ''', {'post_id': post_id, 'after_id': after_id, 'limit': limit + 1})
+    return cursor.fetchall()
+
+
+def fetch_thread_root(cursor, post_id, comment_id):
+    """댓글이 속한 최상위 댓글 id (최상위 댓글이면 자기 자신), 이 글의 댓글이 아니면 None"""
+    cursor.execute('''
+        WITH RECURSIVE ancestors AS (
+            SELECT id, parent_id, 0 AS depth
+            FROM comments
+            WHERE id = %(comment_id)s AND post_id = %(post_id)s
+            UNION ALL
+            SELECT c.id, c.parent_id, a.depth + 1
+            FROM ancestors a
+            JOIN comments c ON c.id = a.parent_id AND c.post_id = %(post_id)s
+            WHERE a.depth < 100
+        )
+        SELECT id FROM ancestors WHERE parent_id IS NULL
+    ''', {'post_id': post_id, 'comment_id': comment_id})
+    row = cursor.fetchone()
+    return row['id'] if row else None
+
+
+# 프로필 버전 (ETag용): 작성 글/댓글의 개수·최신 id·최종 수정 시각 (user_id 인덱스로 집계)
+PROFILE_VERSION_SUBQUERY = '''
+    SELECT p.*, c.*
+    FROM (SELECT COUNT(*) AS post_count, MAX(id) AS post_max_id,
+                 MAX(updated_at) AS post_updated_at
+          FROM posts WHERE user_id = u.id) p,
+         (SELECT COUNT(*) AS comment_count, MAX(c.id) AS comment_max_id,
+                 GREATEST(MAX(c.created_at), MAX(cp.updated_at)) AS comment_updated_at
+          FROM comments c JOIN posts cp ON cp.id = c.post_id
+          WHERE c.user_id = u.id) c
+'''
+
+
+def fetch_profile_page(cursor, user_id, limit=20):
+    """사용자 + 버전 정보 + 최근 작성 글/댓글 → user dict (user['posts'], user['comments']), 없으면 None"""
+    cursor.execute('''
+        SELECT u.id, u.username, u.created_at, v.*,
+               COALESCE(rp.posts, '[]'::json) AS posts,
+               COALESCE(rc.comments, '[]'::json) AS comments
+        FROM users u
+        CROSS JOIN LATERAL (%s) v
+        LEFT JOIN LATERAL (
+            SELECT json_agg(t ORDER BY t.created_at DESC) AS posts
+            FROM (
+                SELECT id, title, board_type, created_at
+                FROM posts
+                WHERE user_id = u.id
+                ORDER BY created_at DESC
+                LIMIT %%(limit)s
+            ) t
+        ) rp ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT json_agg(t ORDER BY t.created_at DESC) AS comments
+            FROM (
+                SELECT c.id, c.content, c.created_at, p.id AS post_id, p.title AS post_title
+                FROM comments c
+                JOIN posts p ON c.post_id = p.id
+                WHERE c.user_id = u.id
+                ORDER BY c.created_at DESC
+                LIMIT %%(limit)s
+            ) t
+        ) rc ON TRUE
+        WHERE u.id = %%(user_id)s
+    ''' % PROFILE_VERSION_SUBQUERY, {'user_id': user_id, 'limit': limit})
+    user = cursor.fetchone()
+    if user is None:
+        return None
+
+    _parse_times(user['posts'], 'created_at')
+    _parse_times(user['comments'], 'created_at')
+    return user
+
+
+def fetch_profile_version(cursor, user_id):
+    """프로필 버전만 조회 (조건부 요청의 304 판단용), 없으면 None"""
+    cursor.execute('''
+        SELECT u.id, u.created_at, v.*
+        FROM users u
+        CROSS JOIN LATERAL (%s) v
+        WHERE u.id = %%(user_id)s
+    ''' % PROFILE_VERSION_SUBQUERY, {'user_id': user_id})
+    return cursor.fetchone()
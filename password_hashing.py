@@ -0,0 +1,101 @@
+"""
+비밀번호 해시 (동시 실행 수 제한 + 시간 집계)
+
+- scrypt/pbkdf2는 일부러 CPU를 많이 쓰는 연산 → 로그인 폭주나 대입 공격 때 워커 스레드를 모두 잡아먹음
+- 워커 프로세스당 동시 해시 수를 제한하고, 잠깐 기다려도 자리가 없으면 HashingBusy (→ 503)
+- 알고리즘/강도는 PASSWORD_HASH_METHOD (Werkzeug 형식, 예: "scrypt:32768:8:1", "pbkdf2:sha256:600000")
+- 설정과 다른 방식으로 저장된 해시는 needs_rehash() → 로그인 성공 시 새 방식으로 다시 저장
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    """동시 해시 수 초과 (잠시 후 재시도)"""
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', concurrency=2, wait_timeout=0.5, sample_size=500):
+        self.method = method
+        self.concurrency = concurrency
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._prefix = None
+        self._timings = {'hash': deque(maxlen=sample_size), 'verify': deque(maxlen=sample_size)}
+        self.in_flight = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    def _run(self, kind, func, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy(f"비밀번호 해시 대기 시간 초과 (동시 {self.concurrency}개)")
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self._timings[kind].append(elapsed)
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run('verify', check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """저장된 해시의 방식/강도가 현재 설정과 다르면 True"""
+        if self._prefix is None:
+            # "scrypt" → "scrypt:32768:8:1" 처럼 기본값이 채워진 형태로 비교
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return pwhash.split('$', 1)[0] != self._prefix
+
+    def record_rehash(self):
+        with self._lock:
+            self.rehashed += 1
+
+    def stats(self):
+        with self._lock:
+            timings = {kind: sorted(values) for kind, values in self._timings.items()}
+            result = {
+                'method': self.method,
+                'concurrency': self.concurrency,
+                'in_flight': self.in_flight,
+                'rejected': self.rejected,
+                'rehashed': self.rehashed,
+            }
+        for kind, values in timings.items():
+            result[f'{kind}_ms'] = {
+                'count': len(values),
+                'p50': round(_percentile(values, 50), 1),
+                'p95': round(_percentile(values, 95), 1),
+                'p99': round(_percentile(values, 99), 1),
+                'max': round(values[-1], 1) if values else 0.0,
+            }
+        return result
+
+
+password_hasher = PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'),
+    concurrency=int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2)),
+    wait_timeout=float(os.environ.get('PASSWORD_HASH_WAIT', 0.5)),
+)
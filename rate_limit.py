@@ -0,0 +1,181 @@
+"""
+요청 빈도 제한 (토큰 버킷)
+
+- 정책: 이름 + 키 종류(ip / user / username) + "횟수/기간" (예: "10/minute")
+  → 기간마다 횟수만큼 토큰이 차고, 요청마다 1개 사용, 최대 보유량 = 횟수 (순간 폭주 허용량)
+- 저장소
+  MemoryBackend   : 워커 프로세스 메모리 (기본값, 워커마다 따로 셈)
+  PostgresBackend : rate_limits 테이블 공유 → 워커/노드 전체에서 같은 버킷
+                    (INSERT ... ON CONFLICT 한 문장으로 충전 + 차감, 행 잠금으로 원자적)
+- 저장소 오류 시에는 요청을 막지 않음 (fail open) → 오류 수만 집계
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_rate(value):
+    """"10/minute" → (10, 60), "5/30" → (5, 30)"""
+    count, period = value.strip().split('/', 1)
+    period = period.strip()
+    seconds = PERIODS[period] if period in PERIODS else float(period)
+    return int(count), float(seconds)
+
+
+class Limit:
+    def __init__(self, scope, rate):
+        self.scope = scope                      # 'ip' / 'user' / 'username'
+        self.burst, self.period = parse_rate(rate)
+        self.rate = self.burst / self.period    # 초당 충전되는 토큰
+
+    def __str__(self):
+        return f'{self.scope}={self.burst}/{self.period:g}s'
+
+
+def parse_limits(spec):
+    """"ip=10/minute,username=5/minute" → [Limit, ...]"""
+    limits = []
+    for item in spec.split(','):
+        if '=' in item:
+            scope, rate = item.split('=', 1)
+            limits.append(Limit(scope.strip(), rate))
+    return limits
+
+
+class MemoryBackend:
+    """프로세스 메모리 토큰 버킷 (키 수 제한 LRU → 오래 안 쓴 키부터 버림)"""
+
+    name = 'memory'
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()   # key → (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        """→ (허용 여부, 남은 토큰)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def size(self):
+        return len(self._buckets)
+
+
+class PostgresBackend:
+    """rate_limits 테이블 공유 토큰 버킷
+
+    get_conn: 커넥션을 돌려주는 함수 (요청 중이면 요청용 커넥션, 차감 후 바로 커밋)
+    """
+
+    name = 'postgres'
+
+    # 충전량 계산식은 SET 절마다 기존 행(rate_limits.*) 기준으로 계산됨
+    _AVAILABLE = ('LEAST(%(burst)s, rate_limits.tokens + '
+                  'EXTRACT(EPOCH FROM clock_timestamp() - rate_limits.updated_at) * %(rate)s)')
+    _TAKE = f'''
+        INSERT INTO rate_limits (key, tokens, allowed, updated_at)
+        VALUES (%(key)s, %(burst)s - %(cost)s, TRUE, clock_timestamp())
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = CASE WHEN {_AVAILABLE} >= %(cost)s THEN {_AVAILABLE} - %(cost)s ELSE {_AVAILABLE} END,
+            allowed = {_AVAILABLE} >= %(cost)s,
+            updated_at = clock_timestamp()
+        RETURNING allowed, tokens
+    '''
+
+    def __init__(self, get_conn, cleanup_every=1000, retention=86400):
+        self.get_conn = get_conn
+        self.cleanup_every = cleanup_every
+        self.retention = retention
+        self._calls = 0
+
+    def take(self, key, rate, burst, cost=1):
+        conn = self.get_conn()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self._TAKE, {'key': key, 'rate': rate, 'burst': burst, 'cost': cost})
+            allowed, tokens = cursor.fetchone()
+
+            # 가끔씩 오래된 버킷 정리 (그 사이 가득 찼을 것이므로 지워도 결과 동일)
+            self._calls += 1
+            if self._calls % self.cleanup_every == 0:
+                cursor.execute(
+                    "DELETE FROM rate_limits WHERE updated_at < clock_timestamp() - %s * INTERVAL '1 second'",
+                    (self.retention,)
+                )
+            conn.commit()
+            return allowed, tokens
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def size(self):
+        return None
+
+
+class RateLimiter:
+    def __init__(self, backend, policies):
+        """policies: {정책 이름: [Limit, ...]}"""
+        self.backend = backend
+        self.policies = policies
+        self._lock = threading.Lock()
+        self._stats = {name: {'allowed': 0, 'rejected': 0} for name in policies}
+        self.errors = 0
+        self.last_error = None
+
+    def check(self, policy, identities, cost=1):
+        """identities: {'ip': ..., 'user': ..., 'username': ...} (값이 없는 종류는 건너뜀)
+
+        → 거절이면 Retry-After 초(int), 허용이면 None
+        """
+        retry_after = None
+        for limit in self.policies.get(policy, ()):
+            identity = identities.get(limit.scope)
+            if identity in (None, ''):
+                continue
+            key = f'{policy}:{limit.scope}:{str(identity)[:100]}'
+            try:
+                allowed, tokens = self.backend.take(key, limit.rate, limit.burst, cost)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = f'{type(e).__name__}: {e}'
+                continue
+            if not allowed:
+                wait = math.ceil((cost - tokens) / limit.rate)
+                retry_after = max(retry_after or 0, wait, 1)
+
+        with self._lock:
+            stats = self._stats.setdefault(policy, {'allowed': 0, 'rejected': 0})
+            stats['rejected' if retry_after else 'allowed'] += 1
+        return retry_after
+
+    def scopes(self, policy):
+        return {limit.scope for limit in self.policies.get(policy, ())}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.backend.name,
+                'keys': self.backend.size(),
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'policies': {
+                    name: {'limits': [str(limit) for limit in limits], **self._stats[name]}
+                    for name, limits in self.policies.items()
+                },
+            }
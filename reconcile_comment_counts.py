@@ -0,0 +1,102 @@
+"""
+posts.comment_count 정합성 복구 스크립트
+
+트리거(schema_migrations.py 003)로 유지되는 comment_count가 실제 댓글 수와
+다른 게시글을 id 구간 단위로 찾아 고칩니다. 구간마다 커밋하므로
+운영 중에도 긴 잠금 없이 실행할 수 있습니다.
+
+실행 방법:
+    python reconcile_comment_counts.py                  # 복구
+    python reconcile_comment_counts.py --dry-run        # 어긋난 개수만 확인
+    python reconcile_comment_counts.py --batch-size 5000
+"""
+
+from dotenv import load_dotenv
+import argparse
+import os
+import sys
+import psycopg2
+
+load_dotenv()
+
+
+def reconcile(conn, batch_size=1000, dry_run=False):
+    """comment_count 복구, 고친(또는 어긋난) 게시글 수 반환"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM posts')
+    min_id, max_id = cursor.fetchone()
+    conn.commit()
+
+    fixed = 0
+    start = min_id - 1
+    while start < max_id:
+        end = start + batch_size
+
+        # 구간의 게시글을 먼저 잠금 → 동시에 작성되는 댓글의 트리거는 커밋까지 대기하고,
+        # 그 이후의 집계 쿼리는 이미 커밋된 댓글을 모두 봄
+        cursor.execute(
+            'SELECT id FROM posts WHERE id > %s AND id <= %s FOR UPDATE',
+            (start, end)
+        )
+
+        cursor.execute('''
+            SELECT p.id, p.comment_count, COUNT(c.id) AS actual
+            FROM posts p
+            LEFT JOIN comments c ON c.post_id = p.id
+            WHERE p.id > %s AND p.id <= %s
+            GROUP BY p.id
+            HAVING p.comment_count <> COUNT(c.id)
+        ''', (start, end))
+        drifted = cursor.fetchall()
+
+        for post_id, stored, actual in drifted:
+            print(f"   - 게시글 {post_id}: {stored} → {actual}")
+
+        if drifted and not dry_run:
+            cursor.execute('''
+                UPDATE posts p
+                SET comment_count = v.actual
+                FROM (SELECT unnest(%s::int[]) AS id, unnest(%s::int[]) AS actual) v
+                WHERE p.id = v.id
+            ''', ([row[0] for row in drifted], [row[2] for row in drifted]))
+
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+
+        fixed += len(drifted)
+        start = end
+
+    cursor.close()
+    return fixed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='posts.comment_count 정합성 복구')
+    parser.add_argument('--batch-size', type=int, default=1000, help='한 번에 검사할 게시글 id 구간 크기')
+    parser.add_argument('--dry-run', action='store_true', help='수정하지 않고 어긋난 게시글만 출력')
+    args = parser.parse_args()
+
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if not DATABASE_URL:
+        print("❌ DATABASE_URL이 설정되지 않았습니다!")
+        sys.exit(1)
+
+    if DATABASE_URL.startswith("postgres://"):
+        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+    print("=" * 60)
+    print("comment_count 정합성 검사" + (" (dry-run)" if args.dry_run else ""))
+    print("=" * 60)
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        count = reconcile(conn, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    if args.dry_run:
+        print(f"\n🔎 어긋난 게시글: {count}개")
+    else:
+        print(f"\n✅ 복구 완료: {count}개 게시글 수정")
@@ -0,0 +1,518 @@
+"""
+버전 관리 스키마 마이그레이션
+
+- schema_migrations 테이블에 적용된 버전을 기록
+- 모든 단계는 여러 번 실행해도 안전하도록(idempotent) 작성
+- 인덱스는 CREATE INDEX CONCURRENTLY로 생성 → 운영 중에도 테이블 잠금 없이 적용
+
+실행 방법:
+    python schema_migrations.py            # 미적용 마이그레이션 실행
+    python schema_migrations.py status     # 적용 현황 보기
+"""
+
+import os
+import sys
+import psycopg2
+
+# 여러 gunicorn 워커/노드가 동시에 실행해도 한 곳에서만 적용되도록 잠금
+MIGRATION_LOCK_KEY = 8_2025_0001
+
+
+class ConcurrentIndex:
+    """CREATE INDEX CONCURRENTLY 단계 (트랜잭션 밖에서 실행)"""
+
+    def __init__(self, name, table, columns, unique=False, where=None):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+        self.where = where
+
+    def apply(self, cursor):
+        cursor.execute('''
+            SELECT i.indisvalid
+            FROM pg_class c
+            JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+        ''', (self.name,))
+        row = cursor.fetchone()
+
+        if row and row[0]:
+            return
+        if row:
+            # 이전에 중단된 CONCURRENTLY 빌드는 INVALID 인덱스를 남김 → 삭제 후 재생성
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {self.name}')
+
+        unique = 'UNIQUE ' if self.unique else ''
+        where = f' WHERE {self.where}' if self.where else ''
+        cursor.execute(
+            f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {self.name} '
+            f'ON {self.table} ({self.columns}){where}'
+        )
+
+    def __str__(self):
+        where = f' WHERE {self.where}' if self.where else ''
+        return f'인덱스 {self.name} ON {self.table} ({self.columns}){where}'
+
+
+# (버전, 이름, 단계 목록) — 한 번 배포된 마이그레이션은 수정하지 말고 새 버전을 추가할 것
+MIGRATIONS = [
+    (1, 'baseline_tables', [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(200) NOT NULL,
+            email_verified BOOLEAN DEFAULT FALSE,
+            verification_token VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS posts (
+            id SERIAL PRIMARY KEY,
+            board_type VARCHAR(20) NOT NULL,
+            title VARCHAR(200) NOT NULL,
+            author VARCHAR(100) NOT NULL,
+            password VARCHAR(200),
+            content TEXT,
+            filename VARCHAR(200),
+            cloudinary_url TEXT,
+            cloudinary_public_id TEXT,
+            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS comments (
+            id SERIAL PRIMARY KEY,
+            post_id INTEGER REFERENCES posts(id) ON DELETE CASCADE,
+            parent_id INTEGER REFERENCES comments(id) ON DELETE CASCADE,
+            author VARCHAR(100) NOT NULL,
+            password VARCHAR(200),
+            content TEXT NOT NULL,
+            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # 구버전 DB (migrate_postgresql.py / fix_password_constraint.py 이전) 보정
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS cloudinary_url TEXT',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS cloudinary_public_id TEXT',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE SET NULL',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS ip_address VARCHAR(45)',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS user_agent TEXT',
+        'ALTER TABLE posts ALTER COLUMN password DROP NOT NULL',
+        'ALTER TABLE comments ADD COLUMN IF NOT EXISTS parent_id INTEGER REFERENCES comments(id) ON DELETE CASCADE',
+        'ALTER TABLE comments ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE SET NULL',
+        'ALTER TABLE comments ADD COLUMN IF NOT EXISTS ip_address VARCHAR(45)',
+        'ALTER TABLE comments ADD COLUMN IF NOT EXISTS user_agent TEXT',
+        'ALTER TABLE comments ALTER COLUMN password DROP NOT NULL',
+    ]),
+    (2, 'hot_path_indexes', [
+        # 게시판 목록: WHERE board_type = ? ORDER BY created_at DESC, id DESC (키셋 페이지네이션)
+        ConcurrentIndex('idx_posts_board_created', 'posts', 'board_type, created_at DESC, id DESC'),
+        # 프로필: 작성 글 / 작성 댓글
+        ConcurrentIndex('idx_posts_user_created', 'posts', 'user_id, created_at'),
+        ConcurrentIndex('idx_comments_user_created', 'comments', 'user_id, created_at'),
+        # 게시글 보기: 댓글 목록
+        ConcurrentIndex('idx_comments_post_created', 'comments', 'post_id, created_at'),
+        # 부모 댓글 삭제 시 ON DELETE CASCADE 대상 탐색
+        ConcurrentIndex('idx_comments_parent', 'comments', 'parent_id'),
+    ]),
+    (3, 'posts_comment_count', [
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0',
+        # 트리거로 유지 → add_comment / delete_comment / ON DELETE CASCADE 경로 모두 정확
+        '''
+        CREATE OR REPLACE FUNCTION posts_comment_count_trg() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+                RETURN NEW;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE posts SET comment_count = comment_count - 1 WHERE id = OLD.post_id;
+                RETURN OLD;
+            ELSIF NEW.post_id IS DISTINCT FROM OLD.post_id THEN
+                UPDATE posts SET comment_count = comment_count - 1 WHERE id = OLD.post_id;
+                UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        'DROP TRIGGER IF EXISTS comments_comment_count ON comments',
+        '''
+        CREATE TRIGGER comments_comment_count
+        AFTER INSERT OR DELETE OR UPDATE OF post_id ON comments
+        FOR EACH ROW EXECUTE FUNCTION posts_comment_count_trg()
+        ''',
+        # 트리거 생성과 같은 트랜잭션에서 기존 값 채움 (comments 쓰기는 커밋까지 대기)
+        '''
+        UPDATE posts p
+        SET comment_count = c.cnt
+        FROM (SELECT post_id, COUNT(*) AS cnt FROM comments GROUP BY post_id) c
+        WHERE p.id = c.post_id AND p.comment_count <> c.cnt
+        ''',
+    ]),
+    (4, 'posts_summary_columns', [
+        # 기존 글은 backfill_posts.py summaries로 채움 (excerpt IS NULL = 미처리)
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS thumbnail_url TEXT',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS excerpt VARCHAR(200)',
+    ]),
+    (5, 'posts_sanitized_content', [
+        # sanitizer_version이 현재 정책과 다르면(NULL 포함) 백그라운드에서 다시 정리
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS content_sanitized TEXT',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS sanitizer_version INTEGER',
+    ]),
+    (6, 'email_outbox', [
+        # 회원가입 등과 같은 트랜잭션에서 INSERT → email_outbox.py 워커가 발송
+        '''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id BIGSERIAL PRIMARY KEY,
+            kind VARCHAR(50) NOT NULL,
+            recipient VARCHAR(100) NOT NULL,
+            payload JSONB NOT NULL DEFAULT '{}',
+            status VARCHAR(10) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            claim_token VARCHAR(32),
+            locked_until TIMESTAMPTZ,
+            last_error TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            sent_at TIMESTAMPTZ
+        )
+        ''',
+        # 선점 쿼리용 (발송 완료/실패 행은 인덱스에서 제외)
+        '''
+        CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+        ON email_outbox (next_attempt_at)
+        WHERE status IN ('pending', 'sending')
+        ''',
+    ]),
+    (7, 'post_and_board_versions', [
+        # 조건부 GET(ETag / Last-Modified)용 버전 정보
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP',
+        'UPDATE posts SET updated_at = created_at WHERE updated_at IS NULL',
+        'ALTER TABLE posts ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP',
+        'ALTER TABLE posts ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1',
+        # 댓글 추가/삭제도 게시글 버전을 올림 (보기 페이지 내용이 바뀜)
+        '''
+        CREATE OR REPLACE FUNCTION posts_comment_count_trg() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET comment_count = comment_count + 1, version = version + 1,
+                                 updated_at = CURRENT_TIMESTAMP
+                WHERE id = NEW.post_id;
+                RETURN NEW;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE posts SET comment_count = comment_count - 1, version = version + 1,
+                                 updated_at = CURRENT_TIMESTAMP
+                WHERE id = OLD.post_id;
+                RETURN OLD;
+            ELSIF NEW.post_id IS DISTINCT FROM OLD.post_id THEN
+                UPDATE posts SET comment_count = comment_count - 1, version = version + 1,
+                                 updated_at = CURRENT_TIMESTAMP
+                WHERE id = OLD.post_id;
+                UPDATE posts SET comment_count = comment_count + 1, version = version + 1,
+                                 updated_at = CURRENT_TIMESTAMP
+                WHERE id = NEW.post_id;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        # 게시판 목록 버전: posts에 어떤 변경이든 생기면 해당 게시판 버전 증가
+        '''
+        CREATE TABLE IF NOT EXISTS board_versions (
+            board_type VARCHAR(20) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE OR REPLACE FUNCTION board_versions_trg() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO board_versions (board_type) VALUES (NEW.board_type)
+                ON CONFLICT (board_type) DO UPDATE
+                SET version = board_versions.version + 1, updated_at = CURRENT_TIMESTAMP;
+            END IF;
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND NEW.board_type IS DISTINCT FROM OLD.board_type) THEN
+                INSERT INTO board_versions (board_type) VALUES (OLD.board_type)
+                ON CONFLICT (board_type) DO UPDATE
+                SET version = board_versions.version + 1, updated_at = CURRENT_TIMESTAMP;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        'DROP TRIGGER IF EXISTS posts_board_version ON posts',
+        '''
+        CREATE TRIGGER posts_board_version
+        AFTER INSERT OR DELETE OR UPDATE ON posts
+        FOR EACH ROW EXECUTE FUNCTION board_versions_trg()
+        ''',
+        '''
+        INSERT INTO board_versions (board_type, updated_at)
+        SELECT board_type, MAX(updated_at) FROM posts GROUP BY board_type
+        ON CONFLICT (board_type) DO NOTHING
+        ''',
+    ]),
+    (8, 'comment_thread_pages', [
+        # 다른 게시글의 댓글을 부모로 가리키는 답글(잘못된 parent_id)은 최상위 댓글로 보존
+        '''
+        UPDATE comments c
+        SET parent_id = NULL
+        WHERE c.parent_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM comments p WHERE p.id = c.parent_id AND p.post_id = c.post_id
+          )
+        ''',
+        # 최상위 댓글 키셋 인덱스는 버전 11 (CONCURRENTLY 단계는 별도 마이그레이션)
+    ]),
+    (9, 'rate_limits', [
+        # 여러 워커/노드가 공유하는 토큰 버킷 (RATE_LIMIT_BACKEND=postgres)
+        # UNLOGGED: WAL을 쓰지 않아 빠름, 장애 후 비워져도 버킷이 다시 가득 찬 상태일 뿐
+        '''
+        CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits (
+            key VARCHAR(200) PRIMARY KEY,
+            tokens DOUBLE PRECISION NOT NULL,
+            allowed BOOLEAN NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_rate_limits_updated ON rate_limits (updated_at)',
+    ]),
+    (10, 'incremental_backup_tracking', [
+        # 증분 백업(backup_db.py backup --incremental): 마지막 백업 이후 바뀐 행 = updated_at이 기준 시각 이후
+        'ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP',
+        'UPDATE users SET updated_at = created_at WHERE updated_at IS NULL',
+        'ALTER TABLE users ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP',
+        'ALTER TABLE comments ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP',
+        'UPDATE comments SET updated_at = created_at WHERE updated_at IS NULL',
+        'ALTER TABLE comments ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP',
+        'ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ',
+        'UPDATE email_outbox SET updated_at = COALESCE(sent_at, created_at) WHERE updated_at IS NULL',
+        'ALTER TABLE email_outbox ALTER COLUMN updated_at SET DEFAULT NOW()',
+        # 어떤 경로로 바뀌든(앱, 트리거, 수동 SQL) updated_at 갱신
+        # clock_timestamp: 트랜잭션 시작이 아니라 실제 변경 시각 (커밋 시각에 더 가까움)
+        '''
+        CREATE OR REPLACE FUNCTION touch_updated_at_trg() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        'DROP TRIGGER IF EXISTS users_touch_updated_at ON users',
+        'CREATE TRIGGER users_touch_updated_at BEFORE INSERT OR UPDATE ON users '
+        'FOR EACH ROW EXECUTE FUNCTION touch_updated_at_trg()',
+        'DROP TRIGGER IF EXISTS posts_touch_updated_at ON posts',
+        'CREATE TRIGGER posts_touch_updated_at BEFORE INSERT OR UPDATE ON posts '
+        'FOR EACH ROW EXECUTE FUNCTION touch_updated_at_trg()',
+        'DROP TRIGGER IF EXISTS comments_touch_updated_at ON comments',
+        'CREATE TRIGGER comments_touch_updated_at BEFORE INSERT OR UPDATE ON comments '
+        'FOR EACH ROW EXECUTE FUNCTION touch_updated_at_trg()',
+        'DROP TRIGGER IF EXISTS email_outbox_touch_updated_at ON email_outbox',
+        'CREATE TRIGGER email_outbox_touch_updated_at BEFORE INSERT OR UPDATE ON email_outbox '
+        'FOR EACH ROW EXECUTE FUNCTION touch_updated_at_trg()',
+        # 삭제된 행 기록 (ON DELETE CASCADE로 지워진 댓글 포함) → 증분 백업에 삭제로 반영
+        '''
+        CREATE TABLE IF NOT EXISTS backup_tombstones (
+            id BIGSERIAL PRIMARY KEY,
+            table_name VARCHAR(63) NOT NULL,
+            row_key TEXT NOT NULL,
+            deleted_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_backup_tombstones_deleted ON backup_tombstones (deleted_at)',
+        # 문장 단위 트리거 + 전이 테이블: 게시글 삭제로 댓글 수천 개가 지워져도 INSERT 한 번
+        # TG_ARGV[0] = 기본 키 컬럼
+        '''
+        CREATE OR REPLACE FUNCTION backup_tombstones_trg() RETURNS trigger AS $$
+        BEGIN
+            EXECUTE format(
+                'INSERT INTO backup_tombstones (table_name, row_key) SELECT %L, (%I)::text FROM deleted_rows',
+                TG_TABLE_NAME, TG_ARGV[0]
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        ''',
+        'DROP TRIGGER IF EXISTS users_backup_tombstones ON users',
+        "CREATE TRIGGER users_backup_tombstones AFTER DELETE ON users REFERENCING OLD TABLE AS deleted_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION backup_tombstones_trg('id')",
+        'DROP TRIGGER IF EXISTS posts_backup_tombstones ON posts',
+        "CREATE TRIGGER posts_backup_tombstones AFTER DELETE ON posts REFERENCING OLD TABLE AS deleted_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION backup_tombstones_trg('id')",
+        'DROP TRIGGER IF EXISTS comments_backup_tombstones ON comments',
+        "CREATE TRIGGER comments_backup_tombstones AFTER DELETE ON comments REFERENCING OLD TABLE AS deleted_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION backup_tombstones_trg('id')",
+        'DROP TRIGGER IF EXISTS email_outbox_backup_tombstones ON email_outbox',
+        "CREATE TRIGGER email_outbox_backup_tombstones AFTER DELETE ON email_outbox REFERENCING OLD TABLE AS deleted_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION backup_tombstones_trg('id')",
+        'DROP TRIGGER IF EXISTS board_versions_backup_tombstones ON board_versions',
+        "CREATE TRIGGER board_versions_backup_tombstones AFTER DELETE ON board_versions "
+        "REFERENCING OLD TABLE AS deleted_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION backup_tombstones_trg('board_type')",
+        # 이 DB의 백업 체인 id: 복원하면 새 id → 복원 이전 백업에 증분을 이어 붙이지 않음
+        '''
+        CREATE TABLE IF NOT EXISTS backup_state (
+            id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+            database_id TEXT NOT NULL,
+            restored_at TIMESTAMPTZ,
+            restored_from TEXT
+        )
+        ''',
+        "INSERT INTO backup_state (database_id) VALUES (md5(random()::text || clock_timestamp()::text)) "
+        "ON CONFLICT (id) DO NOTHING",
+        # updated_at 인덱스는 버전 12
+    ]),
+    # CONCURRENTLY 인덱스는 트랜잭션 밖에서 실행되므로 인덱스만 담은 마이그레이션으로 분리
+    # (이미 8/10에서 만들어진 DB에서는 유효한 인덱스가 있으므로 기록만 남김)
+    (11, 'comment_thread_roots_index', [
+        # 게시글 보기: 최상위 댓글 키셋 페이지 (post_id, created_at, id)
+        ConcurrentIndex('idx_comments_post_roots', 'comments', 'post_id, created_at, id',
+                        where='parent_id IS NULL'),
+    ]),
+    (12, 'comments_updated_index', [
+        # 증분 백업의 변경 행 조회 (댓글이 가장 큰 테이블)
+        # posts에는 만들지 않음: 댓글마다 comment_count 갱신이 HOT 업데이트로 남도록
+        ConcurrentIndex('idx_comments_updated', 'comments', 'updated_at'),
+    ]),
+]
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def applied_versions(cursor):
+    _ensure_migrations_table(cursor)
+    cursor.execute('SELECT version FROM schema_migrations')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _apply(conn, version, name, steps):
+    concurrent = any(isinstance(step, ConcurrentIndex) for step in steps)
+    if concurrent and not all(isinstance(step, ConcurrentIndex) for step in steps):
+        # 섞으면 나머지 DDL/DML까지 autocommit으로 실행됨 → 중간 실패 시 절반만 적용된 스키마
+        raise ValueError(f'마이그레이션 {version:03d}_{name}: ConcurrentIndex는 별도 버전으로 분리해야 합니다')
+
+    # CONCURRENTLY는 트랜잭션 안에서 실행할 수 없으므로 autocommit으로 한 단계씩 실행
+    # (인덱스만 담은 마이그레이션, 각 단계는 이미 있으면 건너뜀)
+    conn.autocommit = concurrent
+    cursor = conn.cursor()
+    try:
+        for step in steps:
+            if isinstance(step, ConcurrentIndex):
+                print(f"   - {step}")
+                step.apply(cursor)
+            else:
+                cursor.execute(step)
+
+        cursor.execute(
+            'INSERT INTO schema_migrations (version, name) VALUES (%s, %s) ON CONFLICT (version) DO NOTHING',
+            (version, name)
+        )
+        if not concurrent:
+            conn.commit()
+    except Exception:
+        if not conn.autocommit:
+            conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.autocommit = True
+
+
+def run_migrations(conn, verbose=True):
+    """미적용 마이그레이션을 버전 순서대로 적용
+
+    Returns: 이번에 적용한 버전 목록
+    """
+    previous_autocommit = conn.autocommit
+    conn.autocommit = True
+    cursor = conn.cursor()
+    applied_now = []
+
+    try:
+        cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_KEY,))
+        try:
+            done = applied_versions(cursor)
+            for version, name, steps in sorted(MIGRATIONS, key=lambda m: m[0]):
+                if version in done:
+                    continue
+                if verbose:
+                    print(f"🔄 마이그레이션 {version:03d}_{name} 적용 중...")
+                _apply(conn, version, name, steps)
+                applied_now.append(version)
+                if verbose:
+                    print(f"✅ 마이그레이션 {version:03d}_{name} 완료")
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+    finally:
+        cursor.close()
+        conn.autocommit = previous_autocommit
+
+    if verbose and not applied_now:
+        print("✅ 스키마가 최신 상태입니다.")
+    return applied_now
+
+
+def print_status(conn):
+    conn.autocommit = True
+    cursor = conn.cursor()
+    _ensure_migrations_table(cursor)
+    cursor.execute('SELECT version, name, applied_at FROM schema_migrations')
+    applied = {row[0]: row for row in cursor.fetchall()}
+    cursor.close()
+
+    print("=" * 60)
+    print("스키마 마이그레이션 현황")
+    print("=" * 60)
+    for version, name, _ in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            print(f"✅ {version:03d}_{name}  ({applied[version][2]:%Y-%m-%d %H:%M})")
+        else:
+            print(f"⏳ {version:03d}_{name}  (미적용)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if not DATABASE_URL:
+        print("❌ DATABASE_URL이 설정되지 않았습니다!")
+        sys.exit(1)
+
+    if DATABASE_URL.startswith("postgres://"):
+        DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'up'
+
+    conn = psycopg2.connect(DATABASE_URL)
+    try:
+        if command == 'up':
+            run_migrations(conn)
+        elif command == 'status':
+            print_status(conn)
+        else:
+            print(f"❌ 알 수 없는 명령어: {command}")
+            print("   사용 가능한 명령어: up, status")
+            sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,207 @@
+"""
+요청 단위 SQL 프로파일러
+
+- 쿼리마다 지문(fingerprint: 값/자리표시자를 ?로 바꾼 SQL), 파라미터 수, 시간, 반환 행 수 기록
+- 느린 쿼리(SQL_SLOW_MS 이상) 로그 + 일부 표본은 EXPLAIN (ANALYZE, BUFFERS) 결과를 백그라운드로 수집
+  (조회문만, 부수 효과가 있는 함수 호출은 제외, 읽기 전용 트랜잭션에서 실행)
+- 한 요청에서 같은 지문이 SQL_N_PLUS_ONE 번 이상 → N+1 의심으로 표시
+- 최근 요청 요약 / 지문별 누적 / 엔드포인트별 N+1 횟수 → /admin/sql-profile
+"""
+
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s')
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query):
+    """SQL → 값이 빠진 모양 (같은 모양의 쿼리는 같은 지문)"""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    query = _COMMENTS.sub(' ', str(query))
+    query = _STRINGS.sub('?', query)
+    query = _PLACEHOLDERS.sub('?', query)
+    query = _NUMBERS.sub('?', query)
+    query = _IN_LISTS.sub('(...)', query)
+    return _SPACES.sub(' ', query).strip()
+
+
+def _param_count(params):
+    if params is None:
+        return 0
+    try:
+        return len(params)
+    except TypeError:
+        return 1
+
+
+# EXPLAIN ANALYZE는 쿼리를 실제로 실행함 → 읽기 전용 트랜잭션에서도 부수 효과가 있는 함수는 제외
+_SIDE_EFFECTS = ('INSERT ', 'UPDATE ', 'DELETE ', 'FOR UPDATE', 'FOR SHARE',
+                 'PG_ADVISORY', 'PG_TRY_ADVISORY', 'PG_NOTIFY', 'NEXTVAL', 'SETVAL', 'PG_SLEEP')
+
+
+def _is_read_only(fp):
+    upper = fp.upper()
+    head = upper.lstrip('( ').split(' ', 1)[0]
+    if head not in ('SELECT', 'WITH'):
+        return False
+    return not any(word in upper for word in _SIDE_EFFECTS)
+
+
+class RequestProfile:
+    """한 요청 동안의 쿼리 목록"""
+
+    def __init__(self):
+        self.statements = []   # (fingerprint, 파라미터 수, 초, 행 수)
+
+    def record(self, fp, params, seconds, rows):
+        self.statements.append((fp, _param_count(params), seconds, rows))
+
+
+class SqlProfiler:
+    def __init__(self, slow_ms=200, n_plus_one=5, explain_sample=0.0, explain_interval=600,
+                 recent_size=100, max_fingerprints=500):
+        self.slow_ms = slow_ms
+        self.n_plus_one = n_plus_one
+        self.explain_sample = explain_sample        # 느린 쿼리 중 EXPLAIN할 비율 (0~1)
+        self.explain_interval = explain_interval    # 같은 지문은 이 간격(초)에 한 번만
+        self.max_fingerprints = max_fingerprints
+        self.explain_submit = None                  # fn(fingerprint, sql) → 백그라운드 실행 (app에서 연결)
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent_size)
+        self._fingerprints = OrderedDict()          # fp → {calls, total_ms, max_ms, rows}
+        self._endpoints = {}                        # endpoint → {requests, queries, n_plus_one: {fp: 횟수}}
+        self._explains = deque(maxlen=20)
+        self._explained_at = {}
+        self._sequence = 0
+        self.slow_count = 0
+
+    # ---------- 쿼리 단위 ----------
+
+    def on_query(self, profile, cursor, query, params, seconds, endpoint=None):
+        """TimedConnection 리스너에서 호출 (profile: 요청 중이 아니면 None)"""
+        fp = fingerprint(query)
+        if fp.upper().startswith('EXPLAIN'):
+            return
+        rows = cursor.rowcount if cursor.rowcount is not None else -1
+        if profile is not None:
+            profile.record(fp, params, seconds, rows)
+
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._fingerprints.pop(fp, None) or {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0}
+            stats['calls'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['rows'] += max(rows, 0)
+            self._fingerprints[fp] = stats
+            while len(self._fingerprints) > self.max_fingerprints:
+                self._fingerprints.popitem(last=False)
+
+        if ms >= self.slow_ms:
+            self._on_slow(cursor, query, params, fp, ms, rows, endpoint)
+
+    def _on_slow(self, cursor, query, params, fp, ms, rows, endpoint):
+        with self._lock:
+            self.slow_count += 1
+        print(f"🐢 느린 쿼리 {ms:.0f}ms ({rows}행) [{endpoint or '백그라운드'}] {fp[:300]}")
+
+        if not (self.explain_submit and self.explain_sample > 0 and _is_read_only(fp)):
+            return
+        if random.random() >= self.explain_sample:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(fp, -self.explain_interval) < self.explain_interval:
+                return
+            self._explained_at[fp] = now
+        try:
+            sql = cursor.mogrify(query, params)
+        except Exception:
+            return
+        self.explain_submit(fp, sql)
+
+    def add_explain(self, fp, plan, error=None):
+        with self._lock:
+            self._explains.append({
+                'fingerprint': fp,
+                'captured_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'plan': plan,
+                'error': error,
+            })
+
+    # ---------- 요청 단위 ----------
+
+    def finish(self, profile, endpoint, method, path):
+        """요청 종료 → 요약 dict (N+1 의심 지문 포함)"""
+        counts = {}
+        for fp, _, seconds, _ in profile.statements:
+            count, total = counts.get(fp, (0, 0.0))
+            counts[fp] = (count + 1, total + seconds)
+        repeated = {fp: count for fp, (count, _) in counts.items() if count >= self.n_plus_one}
+
+        slowest = sorted(profile.statements, key=lambda s: s[2], reverse=True)[:5]
+        with self._lock:
+            self._sequence += 1
+            summary = {
+                'id': self._sequence,
+                'endpoint': endpoint,
+                'method': method,
+                'path': path,
+                'queries': len(profile.statements),
+                'db_ms': round(sum(s[2] for s in profile.statements) * 1000, 2),
+                'rows': sum(max(s[3], 0) for s in profile.statements),
+                'n_plus_one': [{'fingerprint': fp, 'count': count} for fp, count in repeated.items()],
+                'slowest': [
+                    {'fingerprint': fp, 'params': n, 'ms': round(seconds * 1000, 2), 'rows': rows}
+                    for fp, n, seconds, rows in slowest
+                ],
+            }
+            self._recent.append(summary)
+
+            stats = self._endpoints.setdefault(endpoint, {'requests': 0, 'queries': 0, 'n_plus_one': {}})
+            stats['requests'] += 1
+            stats['queries'] += len(profile.statements)
+            for fp in repeated:
+                stats['n_plus_one'][fp] = stats['n_plus_one'].get(fp, 0) + 1
+
+        if repeated:
+            worst = max(repeated, key=repeated.get)
+            print(f"⚠️ N+1 의심 [{endpoint}] {path}: 같은 모양 쿼리 {repeated[worst]}회 → {worst[:200]}")
+        return summary
+
+    def report(self, request_id=None, top=20):
+        with self._lock:
+            if request_id is not None:
+                return next((r for r in self._recent if r['id'] == request_id), None)
+            fingerprints = sorted(self._fingerprints.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+            return {
+                'slow_ms': self.slow_ms,
+                'n_plus_one_threshold': self.n_plus_one,
+                'slow_queries': self.slow_count,
+                'top_fingerprints': [
+                    {'fingerprint': fp, **stats, 'total_ms': round(stats['total_ms'], 2),
+                     'max_ms': round(stats['max_ms'], 2),
+                     'avg_ms': round(stats['total_ms'] / stats['calls'], 2)}
+                    for fp, stats in fingerprints[:top]
+                ],
+                'endpoints': {
+                    endpoint: {**stats, 'queries_per_request': round(stats['queries'] / stats['requests'], 1)}
+                    for endpoint, stats in sorted(self._endpoints.items())
+                },
+                'n_plus_one_routes': sorted(
+                    endpoint for endpoint, stats in self._endpoints.items() if stats['n_plus_one']
+                ),
+                'recent_requests': list(self._recent)[-top:],
+                'explains': list(self._explains),
+            }